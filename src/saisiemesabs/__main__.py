@@ -1,5 +1,33 @@
-from saisiemesabs.app import main
+import sys
 
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:2] == ["reduce"]:
+        from saisiemesabs.batch import main_reduce
+        main_reduce()
+    elif sys.argv[1:2] == ["anomalies"]:
+        from saisiemesabs.anomalies import main_anomalies
+        main_anomalies()
+    elif sys.argv[1:2] == ["baseline"]:
+        from saisiemesabs.baseline import main_baseline
+        main_baseline()
+    elif sys.argv[1:2] == ["reprocess"]:
+        from saisiemesabs.multistation import main_reprocess
+        main_reprocess()
+    elif sys.argv[1:2] == ["summary"]:
+        from saisiemesabs.summary import main_summary
+        main_summary()
+    elif sys.argv[1:2] == ["index"]:
+        from saisiemesabs.reindex import main_index
+        main_index()
+    else:
+        # Instance résidente: lui transmettre les arguments, sans charger Qt
+        from saisiemesabs.resident import forward, socket_path
+        reponse = forward(sys.argv[1:], socket_path(__package__))
+        if reponse == "ok":
+            sys.exit(0)
+        if reponse is not None:
+            print(reponse, file=sys.stderr)
+            sys.exit(1)
+        from saisiemesabs.app import main
+        main()
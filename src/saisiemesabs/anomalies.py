@@ -0,0 +1,226 @@
+""" Détection des résidus anormaux à partir de l'historique de la station
+
+Pour chaque position (série, ligne) d'une session, la médiane et l'écart
+absolu médian (MAD) des résidus des FENETRE dernières sessions archivées
+sont précalculés hors ligne:
+
+    python -m saisiemesabs anomalies --station paf --years 2015-2025
+
+La table d'une station (16 positions, 200 octets) est relue au démarrage
+sans NumPy. Pendant la saisie, un résidu est anormal s'il sort de la bande
+médiane ± SEUIL_MAD * 1.4826 * MAD: deux comparaisons d'entiers.
+"""
+# pylint: disable= invalid-name
+
+import struct
+import logging
+import pathlib
+import argparse
+from typing import Optional
+
+from .cli import command_parser, setup_command
+from .pointfixe import MESURE_ECHELLE
+from .refile import (
+    FormatReError,
+    expand_path_re,
+    file_year,
+    iter_archive,
+    read_session,
+)
+
+log = logging.getLogger(__name__)
+
+# Signature en tête des tables (8 octets)
+ENTETE = b"SMABSOUT"
+# Par position: médiane (nT), MAD (nT), nombre de sessions
+FORMAT_POSITION = struct.Struct("<ffi")
+# Nombre de sessions récentes utilisées pour les statistiques
+FENETRE = 200
+# Nombre minimal de sessions pour utiliser la table
+MINIMUM = 20
+# Largeur de la bande, en écarts-types robustes
+SEUIL_MAD = 4.0
+# MAD minimal (nT), pour une position trop régulière
+MAD_MINIMUM = 0.5
+
+
+def table_path(dossier: pathlib.Path, station: str) -> pathlib.Path:
+    """ Fichier de la table d'une station
+
+    Args:
+        dossier (pathlib.Path): Dossier des tables
+        station (str): Nom de la station
+
+    Returns:
+        pathlib.Path: Chemin de la table
+    """
+    return pathlib.Path(dossier) / f"{station.lower()}.tbl"
+
+
+class TableAnomalies:
+    """ Bandes de résidus normaux des 16 positions d'une session
+    """
+    __slots__ = ("positions", "bornes")
+
+    def __init__(self, positions: list) -> None:
+        """ Table d'une station
+
+        Args:
+            positions (list): 16 tuples (médiane, mad, n) en nT, dans
+                              l'ordre série puis ligne
+        """
+        self.positions = [tuple(position) for position in positions]
+        # Bornes précalculées en dixièmes de nT, None sans historique
+        self.bornes = []
+        for mediane, mad, n in self.positions:
+            if n < MINIMUM:
+                self.bornes.append(None)
+                continue
+            largeur = SEUIL_MAD * 1.4826 * max(mad, MAD_MINIMUM)
+            self.bornes.append((
+                round((mediane - largeur) * MESURE_ECHELLE),
+                round((mediane + largeur) * MESURE_ECHELLE)))
+
+    def is_strange(self, serie: int, ligne: int,
+                   mesure: int) -> Optional[bool]:
+        """ Le résidu sort-il de la bande de sa position ?
+
+        Args:
+            serie (int): Numéro de la série (0 à 3)
+            ligne (int): Numéro de la ligne (0 à 3)
+            mesure (int): Résidu en dixièmes de nT (voir pointfixe)
+
+        Returns:
+            bool: Résidu anormal, None si l'historique est insuffisant
+        """
+        bornes = self.bornes[4 * serie + ligne]
+        if bornes is None:
+            return None
+        return not bornes[0] <= mesure <= bornes[1]
+
+    @classmethod
+    def load(cls, chemin: pathlib.Path) -> Optional["TableAnomalies"]:
+        """ Relit une table
+
+        Args:
+            chemin (pathlib.Path): Fichier de la table
+
+        Returns:
+            TableAnomalies: Table, None si absente ou illisible
+        """
+        try:
+            with open(chemin, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+        if (not data.startswith(ENTETE) or len(data) !=
+                len(ENTETE) + 16 * FORMAT_POSITION.size):
+            log.warning("Table d'anomalies %s illisible", chemin)
+            return None
+        return cls(list(FORMAT_POSITION.iter_unpack(data[len(ENTETE):])))
+
+    def save(self, chemin: pathlib.Path) -> None:
+        """ Écrit la table
+
+        Args:
+            chemin (pathlib.Path): Fichier de la table
+        """
+        chemin = pathlib.Path(chemin)
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        with open(chemin, "wb") as file:
+            file.write(ENTETE + b"".join(
+                FORMAT_POSITION.pack(*position)
+                for position in self.positions))
+
+
+def build_table(sessions, fenetre: int = FENETRE) -> TableAnomalies:
+    """ Calcule la table à partir des sessions archivées d'une station
+
+    Args:
+        sessions (Iterable[Session]): Sessions (refile ou ArchiveIndex)
+        fenetre (int, optional): Nombre de sessions récentes utilisées.
+                                 Defaults to FENETRE.
+
+    Returns:
+        TableAnomalies: Table de la station
+    """
+    # Import tardif: NumPy n'est utile qu'à la construction
+    # pylint: disable= import-outside-toplevel
+    import numpy as np
+    from .reduction import sessions_to_arrays
+
+    sessions = sorted(sessions,
+                      key=lambda s: (s.date, s.lignes[0].heure))[-fenetre:]
+    if not sessions:
+        return TableAnomalies([(0.0, 0.0, 0)] * 16)
+    mesures = sessions_to_arrays(sessions)[4].reshape(len(sessions), 16)
+    mediane = np.nanmedian(mesures, axis=0)
+    mad = np.nanmedian(np.abs(mesures - mediane), axis=0)
+    n = np.count_nonzero(~np.isnan(mesures), axis=0)
+    return TableAnomalies(list(zip(mediane.tolist(), mad.tolist(),
+                                   n.tolist())))
+
+
+def iter_station_sessions(modele: str, station: str, annees: range):
+    """ Sessions d'une station lues dans l'archive PATH_RE
+
+    Chaque dossier n'est parcouru qu'une fois: sans $YY dans PATH_RE, il
+    contient toutes les années, les fichiers sont répartis par année
+    d'après leur nom (voir refile.file_year).
+
+    Args:
+        modele (str): Chemin PATH_RE de la configuration
+        station (str): Nom de la station
+        annees (range): Années
+
+    Yields:
+        Session: Sessions lisibles, année par année
+    """
+    parAnnee = {annee: [] for annee in annees}
+    for racine in dict.fromkeys(expand_path_re(modele, station, annee)
+                                for annee in annees):
+        for chemin in iter_archive(racine):
+            chemins = parAnnee.get(file_year(chemin))
+            if chemins is not None:
+                chemins.append(chemin)
+    for chemins in parAnnee.values():
+        for chemin in chemins:
+            try:
+                yield read_session(chemin)
+            except (FormatReError, UnicodeDecodeError, OSError) as exc:
+                log.warning("Fichier ignoré: %s", exc)
+
+
+def main_anomalies(argv: list = None) -> None:
+    """ Point d'entrée de la commande 'anomalies'
+
+    Args:
+        argv (list, optional): Arguments. Defaults to sys.argv[2:].
+    """
+    parser = argparse.ArgumentParser(
+        prog="saisiemesabs anomalies", parents=[command_parser()],
+        description="Calcule la table des résidus normaux d'une station")
+    parser.add_argument("--index", type=pathlib.Path,
+                        help="Lit les sessions dans un index (reindex) "
+                        "plutôt que dans l'archive")
+    parser.add_argument("--fenetre", type=int, default=FENETRE,
+                        help="Nombre de sessions récentes utilisées "
+                        f"(par défaut: {FENETRE})")
+    args, conf, dataDir = setup_command(parser, argv)
+    dossier = dataDir / "anomalies"
+
+    for station in args.station or [conf["Station"]]:
+        if args.index:
+            # pylint: disable= import-outside-toplevel
+            from .reindex import ArchiveIndex
+            with ArchiveIndex(args.index) as index:
+                sessions = [session for annee in args.years
+                            for session in index.sessions(station, annee)]
+        else:
+            sessions = iter_station_sessions(conf["Chemin_Sauvegarde"],
+                                             station, args.years)
+        table = build_table(sessions, args.fenetre)
+        chemin = table_path(dossier, station)
+        table.save(chemin)
+        log.info("%s: table écrite dans %s (%d sessions)", station, chemin,
+                 max(n for _, _, n in table.positions))
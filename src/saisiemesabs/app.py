@@ -5,29 +5,48 @@ pour les îles subantarctiques
 # pylint: disable= invalid-name
 
 import importlib.metadata
-import configparser
-from datetime import datetime
+from datetime import datetime, timedelta
 import sys
 import logging
+import logging.handlers
+import queue
 import pathlib
 import argparse
 import webbrowser
 import subprocess
 import traceback
 from shutil import which
+from functools import partial
+from typing import Optional
 
-from PySide6 import QtWidgets, QtCore
-from PySide6.QtGui import QIcon, Qt, QAction, QShortcut, QFont
+from . import profiling
+with profiling.etape("import PySide6"):
+    from PySide6 import QtWidgets, QtCore
+    from PySide6.QtGui import QIcon, Qt, QAction, QShortcut, QFont
+    from PySide6.QtNetwork import QLocalServer, QLocalSocket
 
-from .resources import ressources_rc
 from .customwidgets import (
     Logo,
     Mesure,
+    MyLineEdit,
     SaisieDate,
     SaisieAngle,
     CalibrationAzimuth,
-    date_re
+    angle_auto,
+    angle_re,
+    date_re,
+    load_resources
 )
+from . import config, resident
+from .anomalies import TableAnomalies, table_path
+from .autocomplete import AutoComplete, Regle
+from .config import analyse_conf, get_conf, get_dataDir
+from .refile import expand_path_re, iter_lines, session_from_records
+from .writer import SaveTask
+from .journal import Journal
+from .model import SessionMesure
+from .pointfixe import ANGLE_ECHELLE, MESURE_ECHELLE, parse_angle, parse_mesure
+from .temps import continuous_times, parse_hhmmss
 
 # Définition du logger
 log = logging.getLogger(__name__)
@@ -41,6 +60,10 @@ log_stream_handler.setFormatter(
 )
 # Ajout du handler au logger
 log.addHandler(log_stream_handler)
+# Les messages de la configuration (module config) suivent ceux de
+# l'application
+config.log.setLevel(logging.DEBUG)
+config.log.addHandler(log_stream_handler)
 
 
 # Ajout d'un gestionnaire des erreurs innatendues
@@ -57,31 +80,59 @@ DEBUG = False
 class SaisieMesAbs(QtWidgets.QMainWindow):
     """ Fenêtre principale
     """
+    # Jour du variomètre chargé par le pool: station, jour, erreur (vide si
+    # le chargement a réussi)
+    variometreCharge = QtCore.Signal(str, object, str)
 
     def __init__(self, date: str,
                  metadata: dict,
                  configuration: dict,
-                 pathEditor: str = None) -> None:
+                 pathEditor: str = None,
+                 journal: Journal = None,
+                 dataDir: pathlib.Path = None,
+                 multiSession: bool = False,
+                 afficher: bool = True) -> None:
         super().__init__()
         # Récupération de la date de la mesure
         self.initdate = date
+        # Date du jour: recalculée à chaque nouvelle session
+        self.dateAuto = date == datetime.today().strftime("%d/%m/%y")
+        # Mode multi-sessions: après enregistrement, le formulaire est remis
+        # à zéro au lieu de quitter l'application
+        self.multiSession = multiSession
+        self.numSession = 1
+        # La mesure affichée a été enregistrée (voir closeEvent)
+        self.enregistree = False
         # Récupération des metadata
         self.metadata = metadata
         # Récupération du fichier de configuration
         self.configuration = configuration
         # Récupération de l'editeur
         self.editeur = pathEditor
+        # Dossier de données (cache des logos), None pour ne rien écrire
+        self.dataDir = dataDir
         # Initialisation de l'interface
         log.debug("Debut initialisation UI")
-        self.initUi(metadata['version'])
+        with profiling.etape("initUi"):
+            self.initUi(metadata['version'])
         log.debug("Fin initialisation UI")
-        self.show()
+        # Journal de sauvegarde automatique de la saisie
+        self.journal = journal
+        if self.journal:
+            self.restaurerJournal()
+            self.connecterJournal()
+        # Fenêtre préparée à l'avance par l'instance résidente: affichée à
+        # la première requête (voir preparer)
+        if afficher:
+            self.show()
 
     def initUi(self, version: str) -> None:
         """initialisation de la fenêtre principale
         """
         # Titre & Icone
         self.setWindowTitle(f"Enregistrement des mesures magnétiques (v{version})")
+        with profiling.etape("ressources"):
+            load_resources()
         self.setWindowIcon(QIcon(':/icon.png'))
         # Définition des 4 mesure (déclinaison 1&2, inclinaison 1&2)
         # Array comprennant les 4 widgets de mesure
@@ -96,13 +147,6 @@ class SaisieMesAbs(QtWidgets.QMainWindow):
                 self.configuration['Delai']["Etape"],
             )
         )
-        # Trigger pour l'autocompletion
-        # Quand l'angle de la premiere ligne est rentré:
-        # Mise à jour de l'angle EST des cadres 1 et 3 (inc 1 & 2)
-        # Mise à jour des angles du cadre 2 (déc 2)
-        self.mesure[0].ligne[0]["angle"].textChanged.connect(
-            lambda: self.updateAngleOther(0)
-        )
         # Définition du cadre 1 sup-droit: inclinaison 1
         self.mesure.append(
             Mesure(
@@ -113,12 +157,6 @@ class SaisieMesAbs(QtWidgets.QMainWindow):
                 self.configuration['Delai']["Etape"],
             )
         )
-        # Trigger pour l'autocompletion
-        # Quand l'angle de la premiere ligne est rentré:
-        # Mise à jour des angles du cadre 3 (inc 2)
-        self.mesure[1].ligne[0]["angle"].textChanged.connect(
-            lambda: self.updateAngleOther(1)
-        )
         # Définition du cadre 2 inf-gauche: déclinaison 2
         self.mesure.append(
             Mesure(
@@ -129,12 +167,6 @@ class SaisieMesAbs(QtWidgets.QMainWindow):
                 self.configuration['Delai']["Etape"],
             )
         )
-        # Trigger pour l'autocompletion
-        # Quand l'angle de la premiere ligne est rentré:
-        # Mise à jour de l'angle EST de cadre 3 (inc 2)
-        self.mesure[2].ligne[0]["angle"].textChanged.connect(
-            lambda: self.updateAngleOther(2)
-        )
         # Définition du cadre 3 inf-droit: inclinaison 2
         self.mesure.append(
             Mesure(
@@ -149,11 +181,6 @@ class SaisieMesAbs(QtWidgets.QMainWindow):
         # Définition des mesures d'angle des 2 visées de cible
         # Visée 1
         self.vise1 = CalibrationAzimuth(1, self.configuration["Calibration"])
-        # Quand l'angle haut de la visée 1 est entré
-        # MaJ de l'angle haut de la visée 2
-        self.vise1.angleVH.textChanged.connect(
-            self.updateCalibration
-        )
         # Visée 2
         self.vise2 = CalibrationAzimuth(2, self.configuration["Calibration"])
         # GROUPE CONTEXTUEL
@@ -185,8 +212,11 @@ class SaisieMesAbs(QtWidgets.QMainWindow):
         # Définition des logos
         self.logoGroup = QtWidgets.QGroupBox("Programme IPEV-EOST n°139")
         self.logoGroup.setMaximumHeight(self.contexte.sizeHint().height())
-        logoEOST = Logo(":/Logo_EOST.png", self.layoutCon.sizeHint().height())
-        logoIPEV = Logo(":/Logo_IPEV.png", self.layoutCon.sizeHint().height())
+        cacheLogo = self.dataDir / "cache" if self.dataDir else None
+        logoEOST = Logo(":/Logo_EOST.png", self.layoutCon.sizeHint().height(),
+                        cacheLogo)
+        logoIPEV = Logo(":/Logo_IPEV.png", self.layoutCon.sizeHint().height(),
+                        cacheLogo)
         # Arrangement dans un layout
         self.layoutLogo = QtWidgets.QHBoxLayout()
         self.layoutLogo.addWidget(logoEOST)
@@ -257,12 +287,342 @@ class SaisieMesAbs(QtWidgets.QMainWindow):
         aide.addAction(self.actionSos)
         aide.addAction(self.actionInfos)
         self.setMenuBar(self.menuBar)
+        # Modèle de données, tenu à jour par les champs de saisie
+        self.modele = SessionMesure()
+        self.lierModele()
+        # Autocomplétion: graphe de dépendances entre les champs
+        self.autoComplete = AutoComplete(self.champsSaisie(),
+                                         self.reglesAutoComplete())
+        # Détection des résidus anormaux selon l'historique de la station
+        self.chargerAnomalies()
+        self.station.editingFinished.connect(self.chargerAnomalies)
+        # Contrôle des séries par rapport aux dernières lignes de base,
+        # chargées après le premier affichage (import de NumPy)
+        self.reference = None
+        # Fichiers du variomètre lus dans le pool (voir prechargerVariometre)
+        self.variometre = None
+        self.prechargements = set()
+        self.variometreIllisible = set()
+        self.variometreCharge.connect(self.variometreTermine)
+        QtCore.QTimer.singleShot(0, self.chargerReference)
+        self.station.editingFinished.connect(self.chargerReference)
+        self.date.editingFinished.connect(self.chargerReference)
+        for i, eMesure in enumerate(self.mesure):
+            for champ in eMesure.champs(f"mesure{i}").values():
+                champ.editingFinished.connect(
+                    partial(self.controlerSerie, i))
+        # La déclinaison dépend aussi de l'azimuth et des visées
+        for champ in (self.angleAR, self.vise1.angleVH, self.vise1.angleVB,
+                      self.vise2.angleVH, self.vise2.angleVB):
+            champ.editingFinished.connect(partial(self.controlerSerie, 0))
+            champ.editingFinished.connect(partial(self.controlerSerie, 2))
         # Focus la premiere ligne à editer, pour etre plus rapide
         self.vise1.angleVH.setFocus()
         self.vise1.angleVH.selectAll()
-        # Affichage de la fenêtre
+
+    def champsSaisie(self) -> dict:
+        """ Renvoie les champs saisissables, identifiés par une clé stable
+
+        Returns:
+            dict: {clé: QLineEdit}
+        """
+        champs = {
+            "station": self.station,
+            "date": self.date,
+            "azimuth": self.angleAR,
+        }
+        champs.update(self.vise1.champs("vise1"))
+        champs.update(self.vise2.champs("vise2"))
+        for i, eMesure in enumerate(self.mesure):
+            champs.update(eMesure.champs(f"mesure{i}"))
+        return champs
+
+    def lierModele(self) -> None:
+        """ Chaque champ de saisie écrit son texte dans le modèle
+        """
+        for cle, champ in self.champsSaisie().items():
+            ecrire = self.modele.setter(cle)
+            ecrire(champ.text())
+            champ.textChanged.connect(ecrire)
+
+    def connecterJournal(self) -> None:
+        """ Enregistre chaque saisie manuelle dans le journal
+        """
+        for cle, champ in self.champsSaisie().items():
+            champ.textEdited.connect(
+                lambda text, cle=cle: self.journal.record(cle, text))
+        self.modifAngle.toggled.connect(
+            lambda checked: self.journal.record("modifAngle", checked))
+
+    def restaurerJournal(self) -> None:
+        """ Reconstruit le formulaire à partir du journal, en une passe
+        """
+        valeurs = self.journal.load()
+        if not valeurs:
+            return
+        log.info("♻️  - Restauration de la saisie interrompue (%s)",
+                 self.journal.chemin)
+        # Les angles calculés édités à la main doivent être activés avant
+        self.modifAngle.setChecked(bool(valeurs.pop("modifAngle", False)))
+        champs = self.champsSaisie()
+        for cle, valeur in valeurs.items():
+            champ = champs.get(cle)
+            if champ is None:
+                continue
+            if isinstance(champ, MyLineEdit):
+                champ.setText(valeur, True)
+                champ.editedByHand = True
+                champ.rewrite()
+            else:
+                champ.setText(valeur)
+
+    def nouvelleSession(self) -> None:
+        """ Remet le formulaire à zéro pour une nouvelle mesure, sans
+            relancer l'application (mode multi-sessions)
+            La configuration est relue pour recalculer les valeurs initiales
+            de l'autocomplétion, la date du jour est mise à jour
+        """
+        try:
+            self.configuration = analyse_conf(
+                self.configuration["Chemin_conf"])
+        except ValueError:
+            log.warning("Configuration précédente conservée")
+        if self.dateAuto:
+            self.initdate = datetime.today().strftime("%d/%m/%y")
+        self.reinitialiser()
+        if self.journal:
+            self.journal.clear()
+        self.numSession += 1
+        log.info("🆕 - Nouvelle session de mesure (n°%d)", self.numSession)
+        self.btnEnregistrer.setDisabled(False)
+        self.vise1.angleVH.setFocus()
+        self.vise1.angleVH.selectAll()
+
+    def reinitialiser(self) -> None:
+        """ Remet le formulaire à l'état d'un démarrage selon la date et la
+            configuration courantes
+        """
+        # Les valeurs initiales ne doivent pas être propagées: le formulaire
+        # revient à l'état d'un démarrage
+        self.enregistree = False
+        with self.autoComplete.suspendu():
+            self.modifAngle.setChecked(False)
+            self.station.setText(self.configuration["Station"].upper())
+            self.date.setText(self.initdate)
+            # Le texte initial (---.----) reste le modèle de saisie
+            self.angleAR.reset()
+            self.angleAR.setText(self.configuration["Azimuth_Rep"])
+            self.vise1.reset(self.configuration["Calibration"])
+            self.vise2.reset(self.configuration["Calibration"])
+            for eMesure in self.mesure:
+                eMesure.reset(self.configuration["Angle"],
+                              self.configuration["Delai"]["Etape"])
+        self.chargerAnomalies()
+        self.chargerReference()
+
+    def preparer(self, date: str, configuration: dict, pathEditor: str,
+                 journal: Journal, multiSession: bool) -> None:
+        """ Applique les arguments d'une requête à une fenêtre préparée à
+            l'avance (instance résidente) puis l'affiche
+
+        Args:
+            date (str): Date de la mesure (jj/mm/aa)
+            configuration (dict): Configuration (voir analyse_conf)
+            pathEditor (str): Éditeur de la configuration
+            journal (Journal): Journal de sauvegarde automatique
+            multiSession (bool): Mode multi-sessions
+        """
+        self.initdate = date
+        self.dateAuto = date == datetime.today().strftime("%d/%m/%y")
+        self.configuration = configuration
+        self.editeur = pathEditor
+        self.multiSession = multiSession
+        self.reinitialiser()
+        # Le journal n'est branché qu'après la remise à zéro: une saisie
+        # interrompue est restaurée par-dessus
+        self.journal = journal
+        if self.journal:
+            self.restaurerJournal()
+            self.connecterJournal()
+        self.vise1.angleVH.setFocus()
+        self.vise1.angleVH.selectAll()
         self.show()
 
+    def chargerAnomalies(self) -> None:
+        """ Charge la table des résidus normaux de la station (voir
+            anomalies), s'il y en a une
+        """
+        table = None
+        if self.dataDir:
+            table = TableAnomalies.load(table_path(
+                self.dataDir / "anomalies", self.station.text()))
+        for i, eMesure in enumerate(self.mesure):
+            for j, eLigne in enumerate(eMesure.ligne):
+                eLigne["mesure"].detecteur = (
+                    partial(table.is_strange, i, j) if table else None)
+                eLigne["mesure"].invalidate()
+        if table:
+            log.debug("Table d'anomalies chargée pour %s",
+                      self.station.text())
+
+    def chargerReference(self) -> None:
+        """ Charge les dernières lignes de base de la station (voir
+            baseline.Reference), s'il y en a
+            Avec un variomètre configuré, les séries sont comparées aux
+            lignes de base, sinon aux valeurs absolues
+        """
+        self.reference = None
+        if self.dataDir and date_re.match(self.date.text()):
+            # Import tardif: NumPy n'est pas nécessaire au démarrage
+            # pylint: disable= import-outside-toplevel
+            from .baseline import Reference
+            from .variometre import Variometre
+            cheminVario = self.configuration["Chemin_Vario"]
+            if not cheminVario:
+                self.variometre = None
+            elif (self.variometre is None
+                  or self.variometre.dossier != pathlib.Path(cheminVario)):
+                self.variometre = Variometre(
+                    cheminVario, self.dataDir / "cache" / "variometre")
+            self.reference = Reference.load(
+                self.dataDir / "lignes_de_base", self.station.text(),
+                2000 + int(self.date.text()[6:8]),
+                variometre=self.variometre)
+        self.variometreIllisible.clear()
+        self.prechargerVariometre()
+        for i in range(len(self.mesure)):
+            self.controlerSerie(i)
+
+    def prechargerVariometre(self) -> None:
+        """ Lit dans le pool de threads les fichiers du variomètre du jour
+            de la mesure et du lendemain: la lecture d'un fichier IAGA-2002
+            bloquerait la saisie
+        """
+        if self.variometre is None:
+            return
+        try:
+            jour = datetime.strptime(self.date.text(), "%d/%m/%y").date()
+        except ValueError:
+            return
+        cle = (self.station.text().lower(), jour)
+        if cle in self.prechargements:
+            return
+        self.prechargements.add(cle)
+        baseline_pool().start(partial(
+            preload_variometer_task, self.variometre, self.station.text(),
+            jour, self.variometreCharge))
+
+    def variometreTermine(self, station: str, jour, erreur: str) -> None:
+        """ Les fichiers du variomètre d'un jour sont lus: les séries en
+            attente sont contrôlées
+
+        Args:
+            station (str): Code IAGA de la station
+            jour (date): Jour de la mesure
+            erreur (str): Message d'erreur, vide si la lecture a réussi
+        """
+        cle = (station.lower(), jour)
+        self.prechargements.discard(cle)
+        if erreur:
+            log.warning("Variomètre illisible: %s", erreur)
+            self.variometreIllisible.add(cle)
+        for i in range(len(self.mesure)):
+            self.controlerSerie(i)
+
+    def controlerSerie(self, numMesure: int) -> None:
+        """ Calcule la D ou l'I provisoire d'une série complète et affiche
+            son écart aux dernières lignes de base de la station
+
+        Args:
+            numMesure (int): Numéro de la série (0 à 3)
+        """
+        eMesure = self.mesure[numMesure]
+        serie = self.modele.series[numMesure]
+        nom = serie.typeMesure
+        if (self.reference is None or not serie.valide()
+                or nom not in self.reference.mediane):
+            eMesure.setControle("")
+            return
+        # pylint: disable= import-outside-toplevel
+        from .baseline import SEUIL_ECART, provisional
+        angles = [parse_angle(ligne.angle) / ANGLE_ECHELLE
+                  for ligne in serie.lignes]
+        mesures = [parse_mesure(ligne.mesure) / MESURE_ECHELLE
+                   for ligne in serie.lignes]
+        if nom == "inclinaison":
+            valeur = provisional(nom, angles, mesures,
+                                 self.configuration["Intensite"])
+        else:
+            modele = self.modele
+            if not (angle_re.match(modele.azimuth) and all(
+                    angle_re.match(v.haut) and angle_re.match(v.bas)
+                    for v in modele.visees)):
+                eMesure.setControle("")
+                return
+            visees = [[parse_angle(v.haut) / ANGLE_ECHELLE,
+                       parse_angle(v.bas) / ANGLE_ECHELLE]
+                      for v in modele.visees]
+            valeur = provisional(
+                nom, angles, mesures, self.configuration["Intensite"],
+                self.reference.inclinaison, visees,
+                parse_angle(modele.azimuth) / ANGLE_ECHELLE)
+        try:
+            jour = datetime.strptime(self.date.text(), "%d/%m/%y").date()
+            heures = [parse_hhmmss(ligne.heure) for ligne in serie.lignes]
+        except ValueError:
+            eMesure.setControle("")
+            return
+        variometre = self.reference.variometre
+        illisible = (self.station.text().lower(),
+                     jour) in self.variometreIllisible
+        if (variometre is not None and not illisible
+                and not variometre.ready(self.station.text(), jour,
+                                         continuous_times([heures])[0])):
+            eMesure.setControle(f"{nom[0].upper()} = {valeur:.4f} gr\n"
+                                "en attente du variomètre")
+            self.prechargerVariometre()
+            return
+        comparee = None
+        if not illisible:
+            comparee = self.reference.compared(nom, valeur,
+                                               self.station.text(), jour,
+                                               heures)
+        if comparee is None:
+            eMesure.setControle(f"{nom[0].upper()} = {valeur:.4f} gr\n"
+                                "pas de données du variomètre")
+            return
+        ecart, nombreEcarts = self.reference.deviation(nom, comparee)
+        eMesure.setControle(
+            f"{nom[0].upper()} = {valeur:.4f} gr\n"
+            f"écart: {ecart:+.4f} gr ({self.reference.points} mesures)",
+            "etrange" if nombreEcarts > SEUIL_ECART else "valide")
+
+    def closeEvent(self, event) -> None:
+        """ Le journal n'est effacé qu'après l'enregistrement de la mesure
+            ou si l'utilisateur confirme l'abandon de la saisie; sinon il
+            est gardé pour le prochain lancement
+        """
+        if self.journal:
+            abandon = self.enregistree or self.journal.empty()
+            if not abandon:
+                reponse = QtWidgets.QMessageBox.question(
+                    self, "Saisie non enregistrée",
+                    "La saisie n'est pas enregistrée. L'abandonner ?\n"
+                    "(Non: elle sera restaurée au prochain lancement)",
+                    QtWidgets.QMessageBox.StandardButton.Yes
+                    | QtWidgets.QMessageBox.StandardButton.No
+                    | QtWidgets.QMessageBox.StandardButton.Cancel,
+                    QtWidgets.QMessageBox.StandardButton.Cancel)
+                if reponse == QtWidgets.QMessageBox.StandardButton.Cancel:
+                    event.ignore()
+                    return
+                abandon = reponse == QtWidgets.QMessageBox.StandardButton.Yes
+            if abandon:
+                self.journal.clear()
+            else:
+                self.journal.sync()
+        super().closeEvent(event)
+
     def openHelp(self) -> None:
         """ Ouvre le lien vers la documentation
         """
@@ -299,71 +659,56 @@ class SaisieMesAbs(QtWidgets.QMainWindow):
         for i in range(4):
             self.mesure[i].stopUpdate(not btn.isChecked())
 
-    def updateAngleOther(self, numMesure: int) -> None:
-        """ Ordonne la mise à jour des angles de mesure pour l'autocompletion
+    def reglesAutoComplete(self) -> list:
+        """ Règles d'autocomplétion entre les cadres
+            (les règles internes sont fournies par Mesure et
+            CalibrationAzimuth)
 
-        Args:
-            numMesure (int): index du demandeur de mise à jour
-        """
-        # Si les angles sont édités manuellement, on quitte la fonction
-        if self.modifAngle.isChecked():
-            return
-        # Si l'utilisateur a entré une valeur non vide dans la mesure 1
-        if numMesure == 0 and self.mesure[0].ligne[0]["angle"].isValid(False):
-            # maj angle est magnetique de la mesure 2
-            self.mesure[1].updateEst(
-                float(self.mesure[0].ligne[0]["angle"].text())
-            )
-            # maj angles de la mesure 3
-            self.mesure[2].updateAngle(
-                float(self.mesure[0].ligne[0]["angle"].text()), True
-            )
-            # maj angle est magnetique de la mesure 4
-            self.mesure[3].updateEst(
-                float(self.mesure[0].ligne[0]["angle"].text())
-            )
-            return
-        # maj des angles de la mesure 4 à partir de ceux de la mesure 2
-        if numMesure == 1 and self.mesure[1].ligne[0]["angle"].isValid(False):
-            self.mesure[3].updateAngle(
-                float(self.mesure[1].ligne[0]["angle"].text()), True
-            )
-            return
-        # maj de l'angle de l'est magnetique de la mesure 4
-        # à partir de ceux de la mesure 3
-        if numMesure == 2 and self.mesure[2].ligne[0]["angle"].isValid(False):
-            self.mesure[3].updateEst(
-                float(self.mesure[2].ligne[0]["angle"].text())
-            )
-
-    def updateCalibration(self) -> None:
-        """ Met à jour les angles de la deuxième visé
-            à partir de la première pour autocomplet
+        Returns:
+            list: Liste de Regle
         """
-        if self.vise2.updatable and self.vise1.angleVH.isValid(False):
-            self.vise2.angleVH.setText(self.vise1.angleVH.text())
+        def autoAngle(numMesure):
+            # Si les angles sont édités manuellement, pas d'autocomplétion
+            return lambda: (not self.modifAngle.isChecked() and
+                            self.mesure[numMesure].ligne[0]["angle"]
+                            .isValid(False))
+
+        regles = [
+            # Angle de la déc 1 -> est magnétique de l'inc 1
+            Regle("mesure1.est", ("mesure0.0.angle",),
+                  angle_auto, autoAngle(0)),
+            # Angle de la déc 1 -> angles de la déc 2
+            Regle("mesure2.0.angle", ("mesure0.0.angle",),
+                  angle_auto, autoAngle(0)),
+            # Angle de l'inc 1 -> angles de l'inc 2
+            Regle("mesure3.0.angle", ("mesure1.0.angle",),
+                  angle_auto, autoAngle(1)),
+            # Angle de la déc 2 -> est magnétique de l'inc 2
+            Regle("mesure3.est", ("mesure2.0.angle",),
+                  angle_auto, autoAngle(2)),
+            # Visée 1 sonde en haut -> visée 2 sonde en haut
+            Regle("vise2.haut", ("vise1.haut",), lambda angle: angle,
+                  lambda: (self.vise2.updatable and
+                           self.vise1.angleVH.isValid(False))),
+        ]
+        regles += self.vise1.regles("vise1") + self.vise2.regles("vise2")
+        for i, eMesure in enumerate(self.mesure):
+            regles += eMesure.regles(f"mesure{i}")
+        return regles
 
     def formatSaveData(self) -> str:
         """ Génère une sauvegarde des mesures au fromat re
+            à partir du modèle (voir SessionMesure)
 
         Returns:
             str: Sauvegarde formattée
         """
-        tempSave = (
-            f'{self.station.text().lower()} '
-            f'{self.date.text().replace("/", " ")}'
-            ' Methode des residus\n'
-            f'visees balise\n'
-            f' {self.angleAR.text()}\n'
-            f'{self.vise1.getAzi()[0]} {self.vise1.getAzi()[1]}\n'
-            f'{self.vise2.getAzi()[0]} {self.vise2.getAzi()[1]}\n'
-        )
-        for eMesure in self.mesure:
-            tempSave += (f"{self.dicDataToString(eMesure.getData())}\n")
-        return tempSave
+        return self.modele.to_re()
 
     def enregistrer(self) -> None:
         """ Enregistre les données dans un fichier re et quitte l'application
+            (sauf en mode multi-sessions)
+            L'écriture est faite en tâche de fond (voir SaveTask)
         """
         # Force un reflow des widgets pour garantir un bon affichage
         self.setFocus()
@@ -384,50 +729,86 @@ class SaisieMesAbs(QtWidgets.QMainWindow):
         saveMesure = self.formatSaveData()
         log.debug(saveMesure)
 
-        # Sauvegarde dans le fichier
-        saveFilename = self.generateFileName()
-        saveFile = self.generatePath() / saveFilename
-        try:
-            with open(saveFile, "w", encoding='utf-8') as file:
-                file.write(saveMesure)
-            log.info("✅ - Mesure sauvegardée sous %s", saveFile)
-        except (FileNotFoundError, PermissionError) as exc:
-            log.critical(
-                "Erreur lors de l'enregistrement de %s: %s",
-                saveFile, exc
-            )
-            # Tentative de sauvegarde dans le répertoire courant
-            log.critical(
-                "Ecriture des données dans le repertoire courant ./%s",
-                saveFilename
-            )
-            saveFile = pathlib.Path(f"./{saveFilename}")
-            with open(saveFile, "w", encoding='utf-8') as file:
-                file.write(saveMesure)
-            log.info("Mesure sauvegardée sous %s", saveFile)
+        # Sauvegarde dans le fichier, dans un thread pour garder l'UI réactive
+        saveFile = self.generatePath() / self.generateFileName()
+        self.texteEnregistre = saveMesure
+        self.btnEnregistrer.setDisabled(True)
+        self.saveTask = SaveTask(saveFile, saveMesure,
+                                 self.configuration["Fsync"])
+        self.saveTask.signals.saved.connect(self.enregistrementTermine)
+        self.saveTask.signals.fallback.connect(self.enregistrementRepli)
+        self.saveTask.signals.unsynced.connect(
+            self.enregistrementNonSynchronise)
+        self.saveTask.signals.failed.connect(self.enregistrementEchoue)
+        QtCore.QThreadPool.globalInstance().start(self.saveTask)
+
+    def enregistrementTermine(self, saveFile: str) -> None:
+        """ Appelé quand le fichier est écrit, quitte l'application
+            (ou passe à la mesure suivante en mode multi-sessions)
+
+        Args:
+            saveFile (str): Chemin du fichier écrit
+        """
+        log.info("✅ - Mesure sauvegardée sous %s", saveFile)
+        self.enregistree = True
+        if self.dataDir:
+            # Copie des paramètres: la configuration peut être relue
+            # (nouvelleSession) pendant la mise à jour
+            baseline_pool().start(partial(
+                update_baseline_task, self.texteEnregistre, saveFile,
+                self.dataDir, self.configuration["Intensite"],
+                self.configuration["Chemin_Vario"]))
+            baseline_pool().start(partial(
+                index_file_task, saveFile, self.dataDir))
+        if self.multiSession:
+            self.nouvelleSession()
+            return
         # Ferme l'application après l'enregistrement
         self.close()
 
-    def dicDataToString(self, dicData: dict) -> str:
-        """ Convertit un dictionnaire de donnée en string pour l'enregistrement
+    def enregistrementRepli(self, saveFile: str, erreur: str,
+                            repli: str) -> None:
+        """ Appelé quand l'écriture échoue et est retentée dans le répertoire
+            courant
 
         Args:
-            dicData (dict): dictionnaire de donnée générer par Mesure
+            saveFile (str): Chemin du fichier tenté
+            erreur (str): Message d'erreur
+            repli (str): Chemin de repli
+        """
+        log.critical(
+            "Erreur lors de l'enregistrement de %s: %s",
+            saveFile, erreur
+        )
+        log.critical(
+            "Ecriture des données dans le repertoire courant %s",
+            repli
+        )
 
-        Returns:
-            str: string de donnée format EOST
-        """
-        text = ""
-        if dicData['est']:
-            text += f"est magnetique : {dicData['est']}\n"
-        text += f"{dicData['nom']}\n"
-        for dicDataMes in dicData['mesures']:
-            text += (
-                f"{dicDataMes['heure']}\t"
-                f"{dicDataMes['angle'].rjust(8)}\t"
-                f"{dicDataMes['mesure']}\n"
-            )
-        return text
+    def enregistrementNonSynchronise(self, saveFile: str,
+                                     erreur: str) -> None:
+        """ Appelé quand le fichier est écrit mais que la synchronisation de
+            son dossier a échoué (l'enregistrement se poursuit)
+
+        Args:
+            saveFile (str): Chemin du fichier écrit
+            erreur (str): Message d'erreur
+        """
+        log.warning("%s est écrit mais son dossier n'a pas pu être "
+                    "synchronisé sur le disque: %s", saveFile, erreur)
+
+    def enregistrementEchoue(self, saveFile: str, erreur: str) -> None:
+        """ Appelé quand l'écriture a définitivement échoué
+
+        Args:
+            saveFile (str): Chemin du fichier tenté
+            erreur (str): Message d'erreur
+        """
+        self.btnEnregistrer.setDisabled(False)
+        log.critical(
+            "Erreur lors de l'enregistrement de %s: %s",
+            saveFile, erreur
+        )
 
     def validateAll(self) -> bool:
         """ Valide l'ensemble des données saisies et autocomplétés
@@ -435,8 +816,11 @@ class SaisieMesAbs(QtWidgets.QMainWindow):
         Returns:
             bool: True si ensemble données valide, False sinon
         """
+        # Chaque champ garde sa validation en cache: seuls les champs modifiés
+        # depuis la dernière validation sont réellement revérifiés
         mesValide = self.angleAR.isValid()
-        mesValide = all(eMesure.validate() for eMesure in self.mesure)
+        for eMesure in self.mesure:
+            mesValide = eMesure.validate() & mesValide
         return mesValide & self.vise1.validate() & self.vise2.validate()
 
     def generatePath(self) -> pathlib.Path:
@@ -446,10 +830,10 @@ class SaisieMesAbs(QtWidgets.QMainWindow):
         Returns:
             pathlib.Path: path définit dans le fichier conf
         """
-        return pathlib.Path(
-            self.configuration["Chemin_Sauvegarde"]
-            .replace("$YY", self.date.text()[6:8])
-            .replace("$STATION", self.station.text().lower())
+        return expand_path_re(
+            self.configuration["Chemin_Sauvegarde"],
+            self.station.text(),
+            self.date.text()[6:8]
         )
 
     def generateFileName(self) -> str:
@@ -466,192 +850,180 @@ class SaisieMesAbs(QtWidgets.QMainWindow):
         )
 
 
-def is_a_date(date) -> bool:
-    """Renvoie True si la date jj/mm/aa est valide
+# Pool des mises à jour des lignes de base (voir baseline_pool)
+_poolLignesDeBase = None
 
-    Args:
-        date (str): Date a valider au format jj/mm/aa
+
+def baseline_pool() -> QtCore.QThreadPool:
+    """ Pool d'un seul thread pour les mises à jour des lignes de base
+
+    Chaque mise à jour relit et réécrit les fichiers de la série: deux
+    enregistrements rapprochés (--multi) sont traités l'un après l'autre.
 
     Returns:
-        bool: Date valide ou pas
+        QtCore.QThreadPool: Pool partagé par toutes les fenêtres
     """
-    return date_re.match(date)
+    global _poolLignesDeBase  # pylint: disable= global-statement
+    if _poolLignesDeBase is None:
+        _poolLignesDeBase = QtCore.QThreadPool()
+        _poolLignesDeBase.setMaxThreadCount(1)
+    return _poolLignesDeBase
 
 
-def analyse_conf(chemin_fichier: pathlib.Path) -> dict:
-    """ Analyse de la configuration
+def update_baseline_task(texte: str, saveFile: str, dataDir: pathlib.Path,
+                         intensite: float, cheminVario: str) -> None:
+    """ Ajoute une mesure enregistrée à la série de lignes de base de sa
+        station (exécuté dans le pool de threads)
 
     Args:
-        chemin_fichier (pathlib.Path): Chemin du fichier de configuration
-
-    Raises:
-        ValueError: La configuration est mauvaise
+        texte (str): Mesure au format re
+        saveFile (str): Chemin du fichier enregistré
+        dataDir (pathlib.Path): Dossier de données de l'application
+        intensite (float): Intensité totale F (nT)
+        cheminVario (str): Dossier des fichiers du variomètre, vide si aucun
+    """
+    # Import tardif: numpy n'est pas nécessaire au démarrage
+    # pylint: disable= import-outside-toplevel
+    from .baseline import update_baseline
+    from .variometre import Variometre
+    try:
+        session = session_from_records(iter_lines(texte.splitlines()),
+                                       saveFile)
+        variometre = None
+        if cheminVario:
+            variometre = Variometre(cheminVario,
+                                    dataDir / "cache" / "variometre")
+        stats = update_baseline(dataDir / "lignes_de_base", session,
+                                intensite, variometre=variometre)
+    except (ValueError, OSError) as exc:
+        log.warning("Ligne de base non mise à jour: %s", exc)
+        return
+    log.info("📈 - Ligne de base %s %d mise à jour (%d points)",
+             session.station, session.date.year, stats["points"])
+
+
+def index_file_task(saveFile: str, dataDir: pathlib.Path) -> None:
+    """ Ajoute une mesure enregistrée à l'index des archives, s'il a été
+        construit (commande 'index') (exécuté dans le pool de threads)
 
-    Returns:
-        dict: Renvoi les valeurs de configuration
+    Args:
+        saveFile (str): Chemin du fichier enregistré
+        dataDir (pathlib.Path): Dossier de données de l'application
     """
+    # pylint: disable= import-outside-toplevel
+    import sqlite3
+    from .reindex import ArchiveIndex, index_path
+    chemin = index_path(dataDir)
+    if not chemin.exists():
+        return
     try:
-        log.info("🔍 - Analyse du fichier %s", chemin_fichier)
-
-        # Initialisation du parser de configuration
-        contentConfig = configparser.ConfigParser()
-        contentConfig.read(chemin_fichier)
-
-        # Vérification si la section "STATION" et "AUTOCOMPLETE" sont présentes
-        if not contentConfig.has_section("STATION"):
-            raise ValueError("La section 'STATION' est manquante dans le fichier de configuration")
-        if not contentConfig.has_section("AUTOCOMPLETE"):
-            raise ValueError("La section 'AUTOCOMPLETE' est manquante dans le fichier de configuration")
-
-        # Extraction des valeurs de configuration
-        configuration = {
-            "Chemin_conf": chemin_fichier,
-            "Station": contentConfig.get("STATION", "NOM_STATION", fallback="NA"),  # Valeur par défaut si manquante
-            "Azimuth_Rep": contentConfig.get("STATION", "AZIMUTH_REPERE", fallback="---.----"),
-            "Chemin_Sauvegarde": contentConfig.get("STATION", "PATH_RE", fallback="./"),
-            'Angle': {
-                "inc": contentConfig.get("AUTOCOMPLETE", "AUTO_INC_ANGLE", fallback="---.----"),
-                "dec": contentConfig.get("AUTOCOMPLETE", "AUTO_DEC_ANGLE", fallback="---.----")
-            },
-            'Calibration': {
-                "haut": contentConfig.get("AUTOCOMPLETE", "AUTO_CAL_ANGLE_HAUT", fallback="---.----"),
-                "bas": contentConfig.get("AUTOCOMPLETE", "AUTO_CAL_ANGLE_BAS", fallback="---.----")
-            },
-            'Delai': {
-                "Etape": contentConfig.getint("AUTOCOMPLETE", "SEC_ENTRE_MESURES", fallback=45),
-                "Mesure": contentConfig.getint("AUTOCOMPLETE", "SEC_ENTRE_ETAPES", fallback=70)
-            }
-        }
+        with ArchiveIndex(chemin) as index:
+            index.index_file(pathlib.Path(saveFile))
+    except (sqlite3.Error, OSError) as exc:
+        log.warning("Index %s non mis à jour: %s", chemin, exc)
 
-        # Retourner la configuration sous forme de dictionnaire
-        return configuration
 
-    except (ValueError, configparser.MissingSectionHeaderError, configparser.NoOptionError) as exc:
-        log.error("Le fichier de configuration %s n'est pas valide. "
-                  "Erreur: %s", chemin_fichier, exc)
-        raise ValueError(f"Le fichier de configuration '{chemin_fichier}' "
-                         "n'est pas valide") from exc
+def preload_variometer_task(variometre, station: str, jour,
+                            signal: QtCore.SignalInstance) -> None:
+    """ Charge les fichiers du variomètre d'un jour et du lendemain
+        (exécuté dans le pool de threads)
 
+    Args:
+        variometre (variometre.Variometre): Fichiers du variomètre
+        station (str): Code IAGA de la station
+        jour (date): Jour de la mesure
+        signal (QtCore.SignalInstance): Signal émis à la fin (station, jour,
+                                        erreur)
+    """
+    erreur = ""
+    try:
+        for decalage in range(2):
+            variometre.day(station, jour + timedelta(days=decalage))
+    except (ValueError, OSError) as exc:
+        erreur = str(exc)
+    signal.emit(station, jour, erreur)
 
-def get_dataDir(app_name: str) -> pathlib.Path:
-    """ Renvoi le dossier où stocker la configuration
-        Le créé s'il n'existe pas
 
-    Args:
-        app_name (str): Nom de l'application
+def is_a_date(date) -> bool:
+    """Renvoie True si la date jj/mm/aa est valide
 
-    Raises:
-        SystemError: L'OS n'est pas compatible
+    Args:
+        date (str): Date a valider au format jj/mm/aa
 
     Returns:
-        pathlib.Path: Dossier où stocker la configuration
+        bool: Date valide ou pas
     """
+    return date_re.match(date)
 
-    home = pathlib.Path.home()
-
-    if sys.platform == "linux":
-        dataDir = home / ".local/share"
-    else:
-        log.critical("Plateforme inconnue ! %s", sys.platform)
-        raise SystemError
-
-    myDataDir = dataDir / app_name
-
-    try:
-        myDataDir.mkdir(parents=True, exist_ok=True)
-        log.debug("Le dossier data local n'existait pas et a été créé")
-    except Exception as exc:
-        log.debug("Erreur lors de la création du dossier: %s", exc)
-        raise
-    return myDataDir
 
+class FirstPaintFilter(QtCore.QObject):
+    """ Filtre d'évènements appelant une fonction au premier affichage
+    """
 
-def create_default_conf(path: pathlib.Path):
-    """ Créé un fichier de configuration au chemin donnée
+    def __init__(self, widget: QtWidgets.QWidget, callback) -> None:
+        """ Surveille le premier évènement Paint d'un widget
 
-    Args:
-        path (pathlib.Path): Chemin du fichier de configuration
+        Args:
+            widget (QtWidgets.QWidget): Widget surveillé
+            callback (Callable): Fonction appelée au premier affichage
+        """
+        super().__init__(widget)
+        self.callback = callback
+        widget.installEventFilter(self)
+
+    def eventFilter(self, watched, event) -> bool:
+        if event.type() == QtCore.QEvent.Paint:
+            watched.removeEventFilter(self)
+            # Appel après la fin du dessin
+            QtCore.QTimer.singleShot(0, self.callback)
+        return False
+
+
+class NotificationHandler(logging.handlers.QueueHandler):
+    """ Handler de log non bloquant: l'enregistrement est mis en file et le
+        panneau de notification est prévenu par un signal Qt (sûr entre
+        threads)
     """
-    # Contenu par défaut pour la configuration de la station
-    default_conf = (
-        "[STATION]\n\n"
-        "# Nom de la station en minuscules\n"
-        "NOM_STATION     = NA\n\n"
-        "# Chemin où enregistrer les mesures\n"
-        "# - $YY sera remplacé par les deux derniers chiffres de l'année de la mesure\n"
-        "# - $STATION par le nom de la station en minuscules\n"
-        "PATH_RE         = /home/$STATION/$STATION$YY/mes-abs/mes-jour\n\n"
-        "# Azimuth de la cible\n"
-        "AZIMUTH_REPERE  = 52.35840\n\n"
-        "[AUTOCOMPLETE]\n"
-        "AUTO_INC_ANGLE      = 123.----\n"
-        "AUTO_DEC_ANGLE      = 233.----\n"
-        "AUTO_CAL_ANGLE_HAUT = 247.75--\n"
-        "AUTO_CAL_ANGLE_BAS  = 47.75--\n"
-        "SEC_ENTRE_MESURES   = 45\n"
-        "SEC_ENTRE_ETAPES    = 70\n\n\n"
-        "# N'oubliez pas de relancer l'application !\n"
-    )
-    with open(path, "w", encoding='utf-8') as file:
-        file.write(default_conf)
 
+    def __init__(self, signal: QtCore.SignalInstance) -> None:
+        """ Handler alimentant une file
 
-def get_conf(app_name: str, conf_path: pathlib.Path = None) -> pathlib.Path:
-    """ Obtenir le chemin du fichier de configuration
-        Si l'application n'a pas de fichier de conf par défaut, en créer un
-        Si un chemin est donné, verifier sa validité
-        Sinon utiliser le chemin par défaut de l'application
+        Args:
+            signal (QtCore.SignalInstance): Signal émis à chaque
+                                            enregistrement
+        """
+        super().__init__(queue.SimpleQueue())
+        self.setLevel(logging.WARNING)
+        self.signal = signal
+        # Le signal n'est émis que pour le premier message d'une rafale
+        self.signale = False
 
-    Args:
-        app_name (str): Nom de l'application
-        conf_path (pathlib.Path, optional): Chemin vers le fichier conf.
-                                            Defaults to None.
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.queue.put_nowait(record)
+        if not self.signale:
+            self.signale = True
+            self.signal.emit()
 
-    Returns:
-        pathlib.Path: Le chemin du fichier de configuration
-    """
-    if not conf_path:
-        log.debug("Pas de conf donné")
-        conf_path = get_dataDir(app_name) / "configuration.txt"
-        if not conf_path.is_file():
-            log.warning(
-                "Le fichier de configuration %s n'existe pas -> création",
-                conf_path)
-            # Création du fichier conf
-            create_default_conf(conf_path)
-        try:
-            return analyse_conf(conf_path)
-        except (KeyError, ValueError):
-            log.critical("Il semble que votre configuration par "
-                         "défaut soit incompatible ou corrompue.")
-            log.warning("Création d'une nouvelle config")
-            create_default_conf(conf_path)
-            return analyse_conf(conf_path)
-
-    # Verifier que le fichier fonctionne
-    config_tocheck = configparser.ConfigParser()
-    log.info("Verification du fichier de configuration")
-    try:
-        log.debug(conf_path.absolute())
-        config_tocheck.read(conf_path.absolute())
-        return analyse_conf(conf_path)
-
-    except (ValueError, KeyError):
-        log.warning("Utilisation du fichier conf par défaut")
-        return get_conf(app_name, None)
 
+class NotificationPanel(QtWidgets.QDialog):
+    """ Panneau non modal affichant les avertissements et erreurs
 
-class PopUpLogger(logging.Handler, QtWidgets.QDialog):
+    Les messages identiques sont regroupés et le panneau n'est redessiné
+    qu'au plus une fois par DELAI_MS.
+    """
+    DELAI_MS = 250
+    # Émis (depuis n'importe quel thread) quand un message est en file
+    pending = QtCore.Signal()
 
     def __init__(self):
-        logging.Handler.__init__(self)
         QtWidgets.QDialog.__init__(self)
-        self.setLevel(logging.WARNING)
-        self.setWindowTitle("LOGGER")
+        self.setWindowTitle("Attention")
+        self.setModal(False)
         self.header = QtWidgets.QLabel("Un evenement vient de se produire")
         self.message = QtWidgets.QTextEdit()
+        self.message.setReadOnly(True)
         self.message.setMinimumWidth(600)
-        self.message.setMaximumHeight(80)
+        self.message.setMaximumHeight(120)
         self.message.setFrameStyle(1)
         self.message.setFont(QFont('Monospace', 10))
         self.button = QtWidgets.QPushButton("OK")
@@ -661,16 +1033,50 @@ class PopUpLogger(logging.Handler, QtWidgets.QDialog):
         layout.addWidget(self.message)
         layout.addWidget(self.button, alignment=QtCore.Qt.AlignRight)
         layout.setSizeConstraint(QtWidgets.QLayout.SetFixedSize)
-        self.button.clicked.connect(lambda: QtWidgets.QDialog.close(self))
+        self.button.clicked.connect(self.acquitter)
+        # Messages affichés: {message: nombre d'occurrences}
+        self.messages = {}
+        # Limitation du nombre de redessins
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DELAI_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.pending.connect(self.schedule)
+        self.handler = NotificationHandler(self.pending)
+
+    def schedule(self) -> None:
+        """ Programme un redessin, s'il n'y en a pas déjà un de prévu
+        """
+        if not self.timer.isActive():
+            self.timer.start()
 
-    def emit(self, record: logging.LogRecord):
-        msg = self.format(record)
-        msg = msg.replace(":", ":\n")
-        self.message.setText(msg)
-        self.setWindowTitle("Attention")
-        self.button.setFocus()
-        self.exec()
-        self.activateWindow()
+    def refresh(self) -> None:
+        """ Vide la file, regroupe les messages répétés et affiche le panneau
+        """
+        # Raz avant de vider la file: un message arrivé pendant la lecture
+        # réémettra le signal
+        self.handler.signale = False
+        file = self.handler.queue
+        nouveau = False
+        while not file.empty():
+            record = file.get_nowait()
+            self.messages[record.message] = \
+                self.messages.get(record.message, 0) + 1
+            nouveau = True
+        if not nouveau:
+            return
+        self.message.setPlainText("\n".join(
+            message if nombre == 1 else f"{message} (x{nombre})"
+            for message, nombre in self.messages.items()
+        ))
+        self.show()
+        self.raise_()
+
+    def acquitter(self) -> None:
+        """ Efface les messages lus et ferme le panneau
+        """
+        self.messages.clear()
+        self.close()
 
 
 class PopUpCredit(QtWidgets.QDialog):
@@ -718,25 +1124,13 @@ class PopUpCredit(QtWidgets.QDialog):
         self.activateWindow()
 
 
-def main() -> None:
-    """Fonction principale du programme."""
-
-    # Trouver le nom du module qui a été utilisé pour démarrer l'application
-    app_module = sys.modules["__main__"].__package__
-
-    # Récupérer les métadonnées de l'application
-    metadata = importlib.metadata.metadata(app_module)
-
-    QtWidgets.QApplication.setApplicationName(metadata["Formal-Name"])
+def build_parser() -> argparse.ArgumentParser:
+    """ Arguments de la ligne de commande, aussi utilisés pour les requêtes
+        transmises à l'instance résidente
 
-    app = QtWidgets.QApplication(sys.argv)
-    log.debug("Démarrage de l'application")
-
-    # Création d'une fenetre POPUP pour afficher les erreurs
-    popupLog = PopUpLogger()
-    log.addHandler(popupLog)
-
-    # Parser les arguments CLI
+    Returns:
+        argparse.ArgumentParser: Parser des arguments
+    """
     parser = argparse.ArgumentParser()
     # Date
     parser.add_argument(
@@ -761,7 +1155,314 @@ def main() -> None:
                         type=str,
                         help="Permet de choisir un éditeur GUI "
                         "(gedit, gvim, etc.)")
+    # Mode multi-sessions
+    parser.add_argument('--multi',
+                        action='store_true',
+                        help="Ne quitte pas après l'enregistrement: le "
+                        "formulaire est remis à zéro pour la mesure suivante")
+    # Instance résidente
+    parser.add_argument('--resident',
+                        action='store_true',
+                        help="Reste en tâche de fond: les lancements suivants "
+                        "ouvrent leur fenêtre dans cette instance, sans "
+                        "recharger Qt")
+    # Profilage du démarrage
+    parser.add_argument('--profile-startup',
+                        type=pathlib.Path, nargs='?', const='-',
+                        metavar="FICHIER",
+                        help="Écrit les temps de démarrage au format JSON "
+                        "dans FICHIER (par défaut: sortie standard)")
+
+    return parser
+
+
+def window_options(args: argparse.Namespace, metadata: dict,
+                   cwd: pathlib.Path = None) -> tuple:
+    """ Date, configuration et éditeur d'une fenêtre de saisie selon les
+        arguments
+
+    Args:
+        args (argparse.Namespace): Arguments (voir build_parser)
+        metadata (dict): Métadonnées de l'application
+        cwd (pathlib.Path, optional): Répertoire des chemins relatifs
+                                      (requête d'un autre processus).
+                                      Defaults to None.
+
+    Raises:
+        ValueError: Configuration invalide ou éditeur introuvable
+
+    Returns:
+        tuple (str, dict, str): date, configuration et éditeur (None par
+                                défaut)
+    """
+    # Récupération du fichier de configuration
+    with profiling.etape("get_conf"):
+        if args.conf:
+            conf = get_conf(metadata["Formal-Name"],
+                            cwd / args.conf if cwd else args.conf)
+        else:
+            conf = get_conf(metadata["Formal-Name"], None)
+
+    log.info("🎛️  - Configuration: %s", conf['Chemin_conf'])
+
+    # Vérifier si l'argument 'date' est fourni
+    if not args.date:
+        dateMes = datetime.today().strftime("%d/%m/%y")
+        log.info("📆 - Date actuelle choisie")
+    else:
+        dateMes = args.date.strftime("%d/%m/%y")
+        log.info("📆 - Date choisie : %s", dateMes)
+
+    pathEditor: Optional[str] = None
+    if args.editor:
+        pathEditor = which(args.editor)
+        if not pathEditor:
+            raise ValueError(f"L'éditeur {args.editor} n'existe pas !")
+        log.info("🖋️  - Éditeur %s sélectionné", pathEditor)
+    return dateMes, conf, pathEditor
+
+
+def create_window(args: argparse.Namespace, metadata: dict,
+                  cwd: pathlib.Path = None) -> SaisieMesAbs:
+    """ Ouvre une fenêtre de saisie selon les arguments
+
+    Args:
+        args (argparse.Namespace): Arguments (voir build_parser)
+        metadata (dict): Métadonnées de l'application
+        cwd (pathlib.Path, optional): Répertoire des chemins relatifs
+                                      (requête d'un autre processus).
+                                      Defaults to None.
+
+    Raises:
+        ValueError: Configuration invalide ou éditeur introuvable
+
+    Returns:
+        SaisieMesAbs: Fenêtre de saisie
+    """
+    dateMes, conf, pathEditor = window_options(args, metadata, cwd)
+    dataDir = get_dataDir(metadata["Formal-Name"])
+    journal = Journal(dataDir / "journal.txt")
+    return SaisieMesAbs(dateMes, metadata, conf, pathEditor, journal,
+                        dataDir, args.multi)
+
+
+class ResidentServer(QtCore.QObject):
+    """ Instance résidente: chaque requête reçue sur la socket locale ouvre
+        (ou remet au premier plan) la fenêtre de saisie
+
+    Une fenêtre cachée est construite à l'avance, au démarrage puis après
+    chaque fermeture: une requête n'a plus qu'à lui appliquer la date et la
+    configuration demandées avant de l'afficher.
+    """
+
+    def __init__(self, chemin: pathlib.Path, parser: argparse.ArgumentParser,
+                 metadata: dict) -> None:
+        """ Écoute sur la socket locale
+
+        Args:
+            chemin (pathlib.Path): Chemin de la socket (voir
+                                   resident.socket_path)
+            parser (argparse.ArgumentParser): Parser des arguments transmis
+            metadata (dict): Métadonnées de l'application
 
+        Raises:
+            OSError: Écoute impossible
+        """
+        super().__init__()
+        self.parser = parser
+        self.metadata = metadata
+        self.dataDir = get_dataDir(metadata["Formal-Name"])
+        self.fenetre = None
+        # Fenêtre cachée prête pour la prochaine requête
+        self.reserve = None
+        self.serveur = QLocalServer(self)
+        self.serveur.setSocketOptions(QLocalServer.UserAccessOption)
+        if not self.serveur.listen(str(chemin)):
+            # Socket orpheline d'une instance arrêtée brutalement
+            QLocalServer.removeServer(str(chemin))
+            if not self.serveur.listen(str(chemin)):
+                raise OSError(self.serveur.errorString())
+        self.serveur.newConnection.connect(self.connexion)
+        QtCore.QTimer.singleShot(0, self.preparer)
+
+    def preparer(self) -> None:
+        """ Construit la fenêtre cachée de la prochaine requête (date du jour
+            et configuration par défaut, remplacées à l'ouverture)
+        """
+        if self.reserve is not None or (self.fenetre is not None
+                                        and self.fenetre.isVisible()):
+            return
+        try:
+            conf = get_conf(self.metadata["Formal-Name"], None)
+        except ValueError as exc:
+            log.warning("Fenêtre non préparée: %s", exc)
+            return
+        with profiling.etape("fenêtre préparée"):
+            self.reserve = SaisieMesAbs(
+                datetime.today().strftime("%d/%m/%y"), self.metadata, conf,
+                dataDir=self.dataDir, afficher=False)
+        log.debug("Fenêtre de saisie préparée")
+
+    def eventFilter(self, watched, event) -> bool:
+        # Fenêtre fermée: la suivante est préparée pendant l'attente
+        if watched is self.fenetre and event.type() == QtCore.QEvent.Hide:
+            QtCore.QTimer.singleShot(0, self.preparer)
+        return False
+
+    def connexion(self) -> None:
+        """ Nouveaux clients
+        """
+        while self.serveur.hasPendingConnections():
+            client = self.serveur.nextPendingConnection()
+            client.readyRead.connect(lambda client=client: self.lire(client))
+            client.disconnected.connect(client.deleteLater)
+
+    def lire(self, client: QLocalSocket) -> None:
+        """ Traite la requête d'un client (une ligne) et lui répond
+
+        Args:
+            client (QLocalSocket): Client
+        """
+        if not client.canReadLine():
+            return
+        try:
+            argv, cwd = resident.decode_request(bytes(client.readLine()))
+            reponse = self.ouvrir(argv, pathlib.Path(cwd))
+        except ValueError as exc:
+            reponse = str(exc)
+        client.write(reponse.encode("utf-8") + b"\n")
+        client.flush()
+        client.disconnectFromServer()
+
+    def conflit(self, args: argparse.Namespace,
+                cwd: pathlib.Path) -> Optional[str]:
+        """ Vérifie qu'une requête est compatible avec la saisie en cours
+
+        Args:
+            args (argparse.Namespace): Arguments du client
+            cwd (pathlib.Path): Répertoire courant du client
+
+        Returns:
+            str: Message d'erreur, None si la requête ne demande ni une
+                 autre date ni une autre configuration
+        """
+        if args.date and args.date.strftime("%d/%m/%y") != \
+                self.fenetre.initdate:
+            return (f"Une saisie du {self.fenetre.initdate} est déjà en "
+                    "cours: terminez-la avant d'en ouvrir une autre")
+        if args.conf:
+            demande = (cwd / args.conf).resolve()
+            actuelle = pathlib.Path(
+                self.fenetre.configuration["Chemin_conf"]).resolve()
+            if demande != actuelle:
+                return (f"Une saisie avec la configuration {actuelle} est "
+                        "déjà en cours: terminez-la avant d'en ouvrir une "
+                        "autre")
+        return None
+
+    def ouvrir(self, argv: list, cwd: pathlib.Path) -> str:
+        """ Ouvre la fenêtre de saisie demandée
+
+        Une seule saisie à la fois (un seul journal): si une fenêtre est
+        déjà ouverte, elle est remise au premier plan, ou la requête est
+        refusée si elle demande une autre date ou une autre configuration.
+
+        Args:
+            argv (list): Arguments du client
+            cwd (pathlib.Path): Répertoire courant du client
+
+        Returns:
+            str: "ok" ou message d'erreur
+        """
+        try:
+            args = self.parser.parse_args(argv)
+        except SystemExit:
+            return f"Arguments invalides: {' '.join(argv)}"
+        if self.fenetre is not None and self.fenetre.isVisible():
+            message = self.conflit(args, cwd)
+            if message:
+                log.warning("%s", message)
+                return message
+            log.info("Une saisie est déjà en cours")
+        else:
+            try:
+                dateMes, conf, pathEditor = window_options(
+                    args, self.metadata, cwd)
+            except ValueError as exc:
+                log.warning("%s", exc)
+                return str(exc)
+            if self.reserve is None:
+                self.preparer()
+            if self.reserve is None:
+                return "Fenêtre de saisie indisponible"
+            if self.fenetre is not None:
+                self.fenetre.deleteLater()
+            self.fenetre, self.reserve = self.reserve, None
+            self.fenetre.installEventFilter(self)
+            self.fenetre.preparer(dateMes, conf, pathEditor,
+                                  Journal(self.dataDir / "journal.txt"),
+                                  args.multi)
+        self.fenetre.raise_()
+        self.fenetre.activateWindow()
+        return "ok"
+
+    def close(self) -> None:
+        """ Arrête l'écoute (la socket est supprimée)
+        """
+        self.serveur.close()
+
+
+def create_tray(serveur: ResidentServer) -> Optional[QtWidgets.QSystemTrayIcon]:
+    """ Icône de l'instance résidente dans la zone de notification
+
+    Args:
+        serveur (ResidentServer): Instance résidente
+
+    Returns:
+        QtWidgets.QSystemTrayIcon: Icône, None si pas de zone de notification
+    """
+    if not QtWidgets.QSystemTrayIcon.isSystemTrayAvailable():
+        return None
+    load_resources()
+    tray = QtWidgets.QSystemTrayIcon(QIcon(':/icon.png'))
+    tray.setToolTip(QtWidgets.QApplication.applicationName())
+    menu = QtWidgets.QMenu()
+    menu.addAction("Nouvelle mesure",
+                   lambda: serveur.ouvrir([], pathlib.Path.cwd()))
+    menu.addAction("Quitter", QtWidgets.QApplication.quit)
+    tray.setContextMenu(menu)
+    # Le menu n'appartient pas à l'icône: garder une référence
+    tray.menu = menu
+    tray.activated.connect(
+        lambda raison: raison == QtWidgets.QSystemTrayIcon.Trigger
+        and serveur.ouvrir([], pathlib.Path.cwd()))
+    tray.show()
+    return tray
+
+
+def main() -> None:
+    """Fonction principale du programme."""
+
+    # Trouver le nom du module qui a été utilisé pour démarrer l'application
+    app_module = sys.modules["__main__"].__package__
+
+    # Récupérer les métadonnées de l'application
+    with profiling.etape("importlib.metadata"):
+        metadata = importlib.metadata.metadata(app_module)
+
+    QtWidgets.QApplication.setApplicationName(metadata["Formal-Name"])
+
+    with profiling.etape("QApplication"):
+        app = QtWidgets.QApplication(sys.argv)
+    log.debug("Démarrage de l'application")
+
+    # Création d'un panneau non bloquant pour afficher les erreurs
+    popupLog = NotificationPanel()
+    log.addHandler(popupLog.handler)
+    config.log.addHandler(popupLog.handler)
+
+    # Parser les arguments CLI
+    parser = build_parser()
     args = parser.parse_args()
 
     # Mode debug
@@ -777,6 +1478,7 @@ def main() -> None:
         log.setLevel(logging.INFO)
     elif args.verbosity > 1:
         log.setLevel(logging.DEBUG)
+    config.log.setLevel(log.level)
 
     log.info("🧑 - Programme par \033[35m%s\033[0m", metadata["author"])
     log.info("📬 - Merci de reporter tous bugs à l'adresse mail suivante: "
@@ -788,29 +1490,39 @@ def main() -> None:
     log.debug("Mode: DEBUG=%s", DEBUG)
     log.debug("Métadonnées: %s", metadata)
 
-    # Récupération du fichier de configuration
-    if args.conf:
-        conf = get_conf(metadata["Formal-Name"], args.conf)
-    else:
-        conf = get_conf(metadata["Formal-Name"], None)
-
-    log.info("🎛️  - Configuration: %s", conf['Chemin_conf'])
-
-    # Vérifier si l'argument 'date' est fourni
-    if not args.date:
-        dateMes = datetime.today().strftime("%d/%m/%y")
-        log.info("📆 - Date actuelle choisie")
-    else:
-        dateMes = args.date.strftime("%d/%m/%y")
-        log.info("📆 - Date choisie : %s", dateMes)
-
-    pathEditor: Optional[str] = None
-    if args.editor:
-        pathEditor = which(args.editor)
-        if not pathEditor:
-            log.warning("L'éditeur %s n'existe pas !", args.editor)
+    if args.resident:
+        chemin = resident.socket_path(__package__)
+        try:
+            serveur = ResidentServer(chemin, parser, metadata)
+        except OSError as exc:
+            log.critical("Instance résidente impossible sur %s: %s",
+                         chemin, exc)
             sys.exit(1)
-        log.info("🖋️  - Éditeur %s sélectionné", pathEditor)
+        # Les fenêtres se ferment, l'instance reste
+        app.setQuitOnLastWindowClosed(False)
+        app.aboutToQuit.connect(serveur.close)
+        tray = create_tray(serveur)
+        log.info("🛰️  - Instance résidente en écoute sur %s%s", chemin,
+                 "" if tray else " (pas de zone de notification)")
+        retour = app.exec()
+        QtCore.QThreadPool.globalInstance().waitForDone()
+        baseline_pool().waitForDone()
+        sys.exit(retour)
 
-    main_window = SaisieMesAbs(dateMes, metadata, conf, pathEditor)
-    sys.exit(app.exec())
+    try:
+        main_window = create_window(args, metadata)
+    except ValueError as exc:
+        log.warning("%s", exc)
+        sys.exit(1)
+    if args.profile_startup:
+        def firstPaint():
+            profiling.mark("premier affichage")
+            profiling.write_report(args.profile_startup)
+            log.info("⏱️  - Temps de démarrage écrits dans %s",
+                     args.profile_startup)
+        FirstPaintFilter(main_window, firstPaint)
+    retour = app.exec()
+    # Attente d'une éventuelle écriture en cours
+    QtCore.QThreadPool.globalInstance().waitForDone()
+    baseline_pool().waitForDone()
+    sys.exit(retour)
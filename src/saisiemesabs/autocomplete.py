@@ -0,0 +1,134 @@
+""" Moteur d'autocomplétion par graphe de dépendances
+
+Chaque champ calculé est décrit par une Regle: ses champs sources, la
+fonction qui calcule sa valeur et une condition d'application. À chaque
+modification d'un champ, les règles concernées sont évaluées une seule fois,
+dans l'ordre topologique, pendant le même passage dans la boucle
+d'évènements: Qt regroupe alors les mises à jour en un seul affichage.
+"""
+# pylint: disable= invalid-name
+
+from contextlib import contextmanager
+from typing import Callable, NamedTuple, Optional
+
+
+class Regle(NamedTuple):
+    """ Valeur d'un champ calculée à partir d'autres champs
+    """
+    # Clé du champ calculé
+    cible: str
+    # Clés des champs sources
+    sources: tuple
+    # Calcul à partir du texte des sources, None pour ne rien changer
+    calcul: Callable[..., Optional[str]]
+    # Condition d'application (sans argument), None pour toujours
+    condition: Optional[Callable[[], bool]] = None
+
+
+class AutoComplete:
+    """ Graphe de dépendances entre les champs de saisie
+    """
+
+    def __init__(self, champs: dict, regles: list) -> None:
+        """ Construit le graphe et se connecte aux champs sources
+
+        Args:
+            champs (dict): {clé: champ}, les champs doivent fournir text(),
+                           setText() et le signal textChanged
+            regles (list): Liste de Regle, une seule par champ calculé
+
+        Raises:
+            ValueError: Deux règles pour un même champ, ou cycle
+        """
+        self.champs = champs
+        self.regles = self._tri_topologique(regles)
+        # Règles concernées par chaque source, dans l'ordre topologique
+        self.aval = {}
+        for cle in {source for regle in self.regles
+                    for source in regle.sources}:
+            atteints = {cle}
+            regles = []
+            for regle in self.regles:
+                if atteints.intersection(regle.sources):
+                    atteints.add(regle.cible)
+                    regles.append(regle)
+            self.aval[cle] = tuple(regles)
+            champs[cle].textChanged.connect(
+                lambda _text, cle=cle: self.propagate(cle))
+        self.enCours = False
+        # Nombre de règles évaluées depuis la création (pour les bancs)
+        self.evaluations = 0
+
+    @staticmethod
+    def _tri_topologique(regles: list) -> list:
+        """ Ordonne les règles pour qu'une règle passe après ses sources
+        """
+        parCible = {}
+        for regle in regles:
+            if regle.cible in parCible:
+                raise ValueError(f"Plusieurs règles pour {regle.cible}")
+            parCible[regle.cible] = regle
+        ordre = []
+        etat = {}
+
+        def visite(cible):
+            if etat.get(cible) == "fait":
+                return
+            if etat.get(cible) == "en cours":
+                raise ValueError(f"Dépendance circulaire sur {cible}")
+            etat[cible] = "en cours"
+            for source in parCible[cible].sources:
+                if source in parCible:
+                    visite(source)
+            etat[cible] = "fait"
+            ordre.append(parCible[cible])
+
+        for regle in regles:
+            visite(regle.cible)
+        return ordre
+
+    @contextmanager
+    def suspendu(self):
+        """ Aucune propagation pendant le bloc (réinitialisation du
+            formulaire)
+        """
+        enCours = self.enCours
+        self.enCours = True
+        try:
+            yield
+        finally:
+            self.enCours = enCours
+
+    def propagate(self, cle: str) -> None:
+        """ Recalcule les champs qui dépendent du champ modifié
+
+        Les setText faits ici réémettent textChanged: ces appels réentrants
+        sont ignorés, le parcours en aval les couvre déjà.
+
+        Args:
+            cle (str): Clé du champ modifié
+        """
+        if self.enCours:
+            return
+        self.enCours = True
+        try:
+            modifies = {cle}
+            for regle in self.aval.get(cle, ()):
+                if not modifies.intersection(regle.sources):
+                    continue
+                if regle.condition is not None and not regle.condition():
+                    continue
+                self.evaluations += 1
+                valeur = regle.calcul(
+                    *(self.champs[source].text() for source in regle.sources))
+                if valeur is None:
+                    continue
+                cible = self.champs[regle.cible]
+                avant = cible.text()
+                cible.setText(valeur)
+                if cible.text() != avant:
+                    modifies.add(regle.cible)
+                    # Raz des couleurs
+                    cible.setEtat(None)
+        finally:
+            self.enCours = False
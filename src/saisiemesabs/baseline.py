@@ -0,0 +1,577 @@
+""" Séries de lignes de base, mises à jour à chaque enregistrement
+
+Une série par station et par année, dans deux fichiers:
+
+    paf2022.bin    points de taille fixe (DTYPE_POINT) ajoutés en fin de
+                   fichier, relus par np.memmap sans analyse
+    paf2022.json   statistiques de la série, mises à jour point par point
+                   (algorithme de Welford) sans relire l'historique
+
+La ligne de base d'une composante est la valeur absolue moins la valeur du
+variomètre à l'instant de la mesure (grades pour D et I). Sans variomètre,
+seules les valeurs absolues sont enregistrées (lignes de base à NaN).
+
+Les séries peuvent être reconstruites hors ligne depuis l'archive:
+
+    python -m saisiemesabs baseline --station paf --years 2015-2025
+
+Pendant la saisie, la D ou l'I provisoire de chaque série complète est
+comparée aux DERNIERS points de la station (voir Reference).
+"""
+# pylint: disable= invalid-name
+
+import os
+import json
+import logging
+import pathlib
+import argparse
+import tempfile
+from datetime import date
+from typing import Optional
+
+import numpy as np
+
+from .reduction import (
+    GRADES_PAR_RADIAN,
+    Reduction,
+    lecture_mire,
+    reduce,
+    reduce_declinaison,
+    reduce_inclinaison,
+    sessions_to_arrays,
+    wrap
+)
+from .cli import command_parser, setup_command
+from .temps import continuous_times, instants_array
+
+log = logging.getLogger(__name__)
+
+# Signature en tête des fichiers .bin (16 octets)
+ENTETE = b"SMABS-BASELINE01"
+
+DTYPE_POINT = np.dtype([
+    ("temps", "<i8"),         # secondes depuis 1970 (UTC), première ligne
+    ("declinaison", "<f8"),   # D absolue, moyenne des deux paires (grades)
+    ("inclinaison", "<f8"),   # I absolue (grades)
+    ("mire", "<f8"),          # lecture moyenne de la cible (grades)
+    ("baseD", "<f8"),         # D absolue - D du variomètre (grades)
+    ("baseI", "<f8"),         # I absolue - I du variomètre (grades)
+])
+# Colonnes suivies par les statistiques
+COLONNES_STATS = DTYPE_POINT.names[1:]
+# Nombre de points récents comparés à la saisie
+DERNIERS = 20
+# Écart-type robuste minimal (grades), pour une série trop régulière
+ECART_MINIMUM = 0.002
+# Écart signalé, en écarts-types robustes
+SEUIL_ECART = 4.0
+
+
+def store_path(dossier: pathlib.Path, station: str,
+               annee: int) -> pathlib.Path:
+    """ Fichier .bin de la série d'une station pour une année
+
+    Args:
+        dossier (pathlib.Path): Dossier des séries
+        station (str): Nom de la station
+        annee (int): Année sur 4 chiffres
+
+    Returns:
+        pathlib.Path: Chemin du fichier .bin
+    """
+    return pathlib.Path(dossier) / f"{station.lower()}{annee:04d}.bin"
+
+
+def make_points(sessions, intensite: float, hemisphereSud: bool = True,
+                variometre=None) -> np.ndarray:
+    """ Réduit N sessions en N points de série, en un seul calcul
+
+    Args:
+        sessions (Iterable[Session]): Sessions de mesure (refile)
+        intensite (float): Intensité totale F (nT)
+        hemisphereSud (bool, optional): Inclinaison négative.
+                                        Defaults to True.
+        variometre (Variometre, optional): Variomètre de la station, None
+                                           pour ne pas calculer les lignes
+                                           de base. Defaults to None.
+
+    Returns:
+        np.ndarray: (N,) points DTYPE_POINT
+    """
+    sessions = list(sessions)
+    return points_from_arrays([session.station for session in sessions],
+                              [session.date for session in sessions],
+                              sessions_to_arrays(sessions), intensite,
+                              hemisphereSud, variometre)
+
+
+def points_from_arrays(stations, jours, tableaux: tuple, intensite: float,
+                       hemisphereSud: bool = True, variometre=None,
+                       reduction: Reduction = None) -> np.ndarray:
+    """ Points de série de N sessions déjà converties en tableaux
+
+    Args:
+        stations (Sequence[str]): (N,) station de chaque session
+        jours (Sequence[date]): (N,) jour de chaque session
+        tableaux (tuple): azimuth, visees, heures, angles, mesures (voir
+                          sessions_to_arrays)
+        intensite (float): Intensité totale F (nT)
+        hemisphereSud (bool, optional): Inclinaison négative.
+                                        Defaults to True.
+        variometre (Variometre, optional): Variomètre de la station.
+                                           Defaults to None.
+        reduction (Reduction, optional): Réduction déjà calculée des
+                                         tableaux. Defaults to None.
+
+    Returns:
+        np.ndarray: (N,) points DTYPE_POINT
+    """
+    azimuth, visees, heures, angles, mesures = tableaux
+    points = np.zeros(len(azimuth), dtype=DTYPE_POINT)
+    if not len(points):
+        return points
+    if reduction is None:
+        reduction = reduce(azimuth, visees, angles, mesures, intensite,
+                           hemisphereSud)
+    # Secondes depuis 1970 (UTC) de la première ligne
+    points["temps"] = instants_array(jours, np.asarray(heures)[:, 0, 0])
+    points["declinaison"] = reduction.declinaison.mean(axis=-1)
+    points["inclinaison"] = reduction.inclinaison.mean(axis=-1)
+    points["mire"] = reduction.mire
+    points["baseD"] = np.nan
+    points["baseI"] = np.nan
+    if variometre is not None:
+        valeurs, composantes = variometre.values_arrays(stations, jours,
+                                                        heures)
+        if all(nom in composantes for nom in "XYZ"):
+            x, y, z = (valeurs[..., composantes.index(nom)] for nom in "XYZ")
+            # D et I du variomètre, moyennées sur chaque série (4 lignes)
+            decVario = np.arctan2(y, x).mean(axis=-1) * GRADES_PAR_RADIAN
+            incVario = (np.arctan2(z, np.hypot(x, y)).mean(axis=-1)
+                        * GRADES_PAR_RADIAN)
+            points["baseD"] = wrap(reduction.declinaison
+                                   - decVario[:, 0::2]).mean(axis=-1)
+            points["baseI"] = wrap(reduction.inclinaison
+                                   - incVario[:, 1::2]).mean(axis=-1)
+    return points
+
+
+def make_point(session, intensite: float, hemisphereSud: bool = True,
+               variometre=None) -> np.ndarray:
+    """ Réduit une session en un point de la série
+
+    Args:
+        session (Session): Session de mesure (refile)
+        intensite (float): Intensité totale F (nT)
+        hemisphereSud (bool, optional): Inclinaison négative.
+                                        Defaults to True.
+        variometre (Variometre, optional): Variomètre de la station.
+                                           Defaults to None.
+
+    Returns:
+        np.ndarray: Point (tableau de 1 élément DTYPE_POINT)
+    """
+    return make_points([session], intensite, hemisphereSud, variometre)
+
+
+def read_points(chemin: pathlib.Path) -> np.ndarray:
+    """ Points d'une série, en lecture seule (memmap)
+
+    Un dernier point tronqué (arrêt brutal pendant l'écriture) est ignoré.
+
+    Args:
+        chemin (pathlib.Path): Fichier .bin
+
+    Raises:
+        ValueError: Le fichier n'est pas une série de lignes de base
+
+    Returns:
+        np.ndarray: Points DTYPE_POINT, vide si le fichier n'existe pas
+    """
+    try:
+        taille = os.path.getsize(chemin)
+    except FileNotFoundError:
+        return np.zeros(0, dtype=DTYPE_POINT)
+    with open(chemin, "rb") as file:
+        if file.read(len(ENTETE)) != ENTETE:
+            raise ValueError(f"{chemin}: pas une série de lignes de base")
+    nombre = (taille - len(ENTETE)) // DTYPE_POINT.itemsize
+    if nombre == 0:
+        return np.zeros(0, dtype=DTYPE_POINT)
+    return np.memmap(chemin, dtype=DTYPE_POINT, mode="r",
+                     offset=len(ENTETE), shape=(nombre,))
+
+
+def read_stats(chemin: pathlib.Path) -> dict:
+    """ Statistiques d'une série (fichier .json à côté du .bin)
+
+    Args:
+        chemin (pathlib.Path): Fichier .bin
+
+    Returns:
+        dict: Statistiques, vides si absentes
+    """
+    try:
+        with open(chemin.with_suffix(".json"), "r", encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def update_stats(stats: dict, point: np.ndarray) -> dict:
+    """ Ajoute un point aux statistiques (moyenne et écart-type par
+        l'algorithme de Welford, NaN ignorés)
+
+    Args:
+        stats (dict): Statistiques courantes (voir read_stats)
+        point (np.ndarray): Point DTYPE_POINT
+
+    Returns:
+        dict: Nouvelles statistiques
+    """
+    temps = int(point["temps"][0])
+    stats = {
+        "points": stats.get("points", 0) + 1,
+        "premier": min(stats.get("premier", temps), temps),
+        "dernier": max(stats.get("dernier", temps), temps),
+        "colonnes": dict(stats.get("colonnes", {})),
+    }
+    for nom in COLONNES_STATS:
+        valeur = float(point[nom][0])
+        colonne = stats["colonnes"].get(nom, {"n": 0, "moyenne": 0.0,
+                                              "m2": 0.0})
+        if not np.isnan(valeur):
+            n = colonne["n"] + 1
+            ecart = valeur - colonne["moyenne"]
+            moyenne = colonne["moyenne"] + ecart / n
+            m2 = colonne["m2"] + ecart * (valeur - moyenne)
+            colonne = {"n": n, "moyenne": moyenne, "m2": m2,
+                       "ecart_type": (m2 / (n - 1)) ** 0.5 if n > 1 else 0.0,
+                       "derniere": valeur}
+        stats["colonnes"][nom] = colonne
+    return stats
+
+
+def append_point(chemin: pathlib.Path, point: np.ndarray) -> dict:
+    """ Ajoute un point en fin de série et met à jour ses statistiques
+
+    Un point du même instant (fichier re enregistré une seconde fois)
+    remplace l'ancien: la série est alors réécrite et ses statistiques
+    recalculées.
+
+    Les appels pour un même fichier ne doivent pas être concurrents (voir
+    app.baseline_pool).
+
+    Args:
+        chemin (pathlib.Path): Fichier .bin
+        point (np.ndarray): Point DTYPE_POINT
+
+    Returns:
+        dict: Statistiques de la série
+    """
+    chemin = pathlib.Path(chemin)
+    points = read_points(chemin)
+    existant = np.flatnonzero(points["temps"] == point["temps"][0])
+    if len(existant):
+        # Copie: le memmap est libéré avant le remplacement du fichier
+        points = np.array(points)
+        points[existant[0]] = point[0]
+        return write_series(chemin, points)
+    del points
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    with open(chemin, "ab") as file:
+        if file.tell() == 0:
+            file.write(ENTETE)
+        else:
+            # Un point tronqué par un arrêt brutal est écrasé
+            reste = (file.tell() - len(ENTETE)) % DTYPE_POINT.itemsize
+            if reste:
+                file.truncate(file.tell() - reste)
+        file.write(np.ascontiguousarray(point, dtype=DTYPE_POINT).tobytes())
+    stats = update_stats(read_stats(chemin), point)
+    fd, temporaire = tempfile.mkstemp(dir=chemin.parent,
+                                      prefix=f".{chemin.stem}.",
+                                      suffix=".tmp")
+    with os.fdopen(fd, "w", encoding='utf-8') as file:
+        json.dump(stats, file, indent=1)
+    os.replace(temporaire, chemin.with_suffix(".json"))
+    return stats
+
+
+def update_baseline(dossier: pathlib.Path, session, intensite: float,
+                    hemisphereSud: bool = True, variometre=None) -> dict:
+    """ Ajoute une session enregistrée à la série de sa station et année
+
+    Args:
+        dossier (pathlib.Path): Dossier des séries
+        session (Session): Session de mesure (refile)
+        intensite (float): Intensité totale F (nT)
+        hemisphereSud (bool, optional): Inclinaison négative.
+                                        Defaults to True.
+        variometre (Variometre, optional): Variomètre de la station.
+                                           Defaults to None.
+
+    Returns:
+        dict: Statistiques de la série
+    """
+    point = make_point(session, intensite, hemisphereSud, variometre)
+    return append_point(store_path(dossier, session.station,
+                                   session.date.year), point)
+
+
+def write_series(chemin: pathlib.Path, points: np.ndarray) -> dict:
+    """ Réécrit une série complète et ses statistiques
+
+    Args:
+        chemin (pathlib.Path): Fichier .bin
+        points (np.ndarray): Points DTYPE_POINT, triés par temps
+
+    Returns:
+        dict: Statistiques de la série
+    """
+    chemin = pathlib.Path(chemin)
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    stats = {}
+    for i in range(len(points)):
+        stats = update_stats(stats, points[i:i + 1])
+    for donnees, cible in (
+            (ENTETE + np.ascontiguousarray(points, DTYPE_POINT).tobytes(),
+             chemin),
+            (json.dumps(stats, indent=1).encode("utf-8"),
+             chemin.with_suffix(".json"))):
+        fd, temporaire = tempfile.mkstemp(dir=chemin.parent,
+                                          prefix=f".{chemin.stem}.",
+                                          suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(donnees)
+        os.replace(temporaire, cible)
+    return stats
+
+
+def rebuild(dossier: pathlib.Path, sessions, intensite: float,
+            hemisphereSud: bool = True, variometre=None) -> dict:
+    """ Reconstruit les séries à partir des sessions archivées
+
+    Args:
+        dossier (pathlib.Path): Dossier des séries
+        sessions (Iterable[Session]): Sessions de mesure (refile)
+        intensite (float): Intensité totale F (nT)
+        hemisphereSud (bool, optional): Inclinaison négative.
+                                        Defaults to True.
+        variometre (Variometre, optional): Variomètre de la station.
+                                           Defaults to None.
+
+    Returns:
+        dict: {chemin: nombre de points} des séries écrites
+    """
+    groupes = {}
+    for session in sessions:
+        groupes.setdefault((session.station, session.date.year),
+                           []).append(session)
+    ecrits = {}
+    for (station, annee), groupe in groupes.items():
+        points = make_points(groupe, intensite, hemisphereSud, variometre)
+        points = points[np.argsort(points["temps"], kind="stable")]
+        chemin = store_path(dossier, station, annee)
+        write_series(chemin, points)
+        ecrits[chemin] = len(points)
+    return ecrits
+
+
+def read_series(dossier: pathlib.Path, station: str, annees) -> np.ndarray:
+    """ Points de plusieurs années d'une station, dans l'ordre
+
+    Args:
+        dossier (pathlib.Path): Dossier des séries
+        station (str): Nom de la station
+        annees (Iterable[int]): Années
+
+    Returns:
+        np.ndarray: Points DTYPE_POINT (memmap pour une seule année)
+    """
+    series = [read_points(store_path(dossier, station, annee))
+              for annee in annees]
+    series = [serie for serie in series if len(serie)]
+    if len(series) == 1:
+        return series[0]
+    if not series:
+        return np.zeros(0, dtype=DTYPE_POINT)
+    return np.concatenate(series)
+
+
+def provisional(typeMesure: str, angles, mesures, intensite: float,
+                inclinaison: float = 0.0, visees=None,
+                azimuth: float = 0.0, hemisphereSud: bool = True) -> float:
+    """ D ou I d'une seule série, pendant la saisie
+
+    Args:
+        typeMesure (str): declinaison ou inclinaison
+        angles (list): 4 angles de la série (grades)
+        mesures (list): 4 résidus (nT)
+        intensite (float): Intensité totale F (nT)
+        inclinaison (float, optional): I pour la composante horizontale
+                                       (déclinaison). Defaults to 0.0.
+        visees (list, optional): Visées [[haut, bas], [haut, bas]]
+                                 (déclinaison). Defaults to None.
+        azimuth (float, optional): Azimuth repère (déclinaison).
+                                   Defaults to 0.0.
+        hemisphereSud (bool, optional): Inclinaison négative.
+                                        Defaults to True.
+
+    Returns:
+        float: D ou I en grades
+    """
+    if typeMesure == "inclinaison":
+        return float(reduce_inclinaison(angles, mesures, intensite,
+                                        hemisphereSud))
+    horizontale = intensite * np.cos(inclinaison / GRADES_PAR_RADIAN)
+    return float(reduce_declinaison(angles, mesures, horizontale,
+                                    lecture_mire(visees), azimuth))
+
+
+class Reference:
+    """ Dernières valeurs de D et I d'une station (médiane et écart-type
+        robuste), pour le contrôle pendant la saisie
+
+    Avec un variomètre, la référence porte sur les lignes de base (baseD,
+    baseI): la variation du champ entre deux mesures n'est pas un écart.
+    Sans variomètre, elle porte sur les valeurs absolues.
+    """
+    __slots__ = ("points", "mediane", "ecartType", "inclinaison",
+                 "variometre")
+
+    def __init__(self, points: np.ndarray, variometre=None) -> None:
+        """ Référence calculée sur des points de série
+
+        Args:
+            points (np.ndarray): Points DTYPE_POINT
+            variometre (Variometre, optional): Variomètre de la station,
+                                               None pour comparer les
+                                               valeurs absolues.
+                                               Defaults to None.
+        """
+        self.points = len(points)
+        self.variometre = variometre
+        self.mediane = {}
+        self.ecartType = {}
+        colonnes = ({"declinaison": "baseD", "inclinaison": "baseI"}
+                    if variometre is not None else {})
+        for nom in ("declinaison", "inclinaison"):
+            valeurs = np.asarray(points[colonnes.get(nom, nom)], dtype=float)
+            valeurs = valeurs[~np.isnan(valeurs)]
+            if not len(valeurs):
+                continue
+            mediane = float(np.median(valeurs))
+            ecarts = np.abs(wrap(valeurs - mediane))
+            self.mediane[nom] = mediane
+            self.ecartType[nom] = max(1.4826 * float(np.median(ecarts)),
+                                      ECART_MINIMUM)
+        # I absolue, nécessaire au calcul de la D provisoire
+        inclinaisons = np.asarray(points["inclinaison"], dtype=float)
+        inclinaisons = inclinaisons[~np.isnan(inclinaisons)]
+        self.inclinaison = (float(np.median(inclinaisons))
+                            if len(inclinaisons) else 0.0)
+
+    @classmethod
+    def load(cls, dossier: pathlib.Path, station: str, annee: int,
+             derniers: int = DERNIERS,
+             variometre=None) -> Optional["Reference"]:
+        """ Référence sur les derniers points de l'année et de la
+            précédente (lecture memmap, aucune réduction)
+
+        Args:
+            dossier (pathlib.Path): Dossier des séries
+            station (str): Nom de la station
+            annee (int): Année de la mesure
+            derniers (int, optional): Nombre de points. Defaults to DERNIERS.
+            variometre (Variometre, optional): Variomètre de la station.
+                                               Defaults to None.
+
+        Returns:
+            Reference: Référence, None sans historique
+        """
+        try:
+            points = read_series(dossier, station, (annee - 1, annee))
+        except (OSError, ValueError) as exc:
+            log.warning("Lignes de base de %s illisibles: %s", station, exc)
+            return None
+        if not len(points):
+            return None
+        return cls(points[-derniers:], variometre)
+
+    def compared(self, nom: str, valeur: float, station: str, jour: date,
+                 heures) -> Optional[float]:
+        """ Valeur provisoire d'une série ramenée à la grandeur de la
+            référence: ligne de base avec un variomètre, valeur absolue
+            sinon
+
+        Args:
+            nom (str): declinaison ou inclinaison
+            valeur (float): Valeur absolue provisoire (grades)
+            station (str): Nom de la station
+            jour (date): Date de la session
+            heures (Sequence[int]): Secondes depuis minuit des 4 lignes
+
+        Returns:
+            float: Valeur comparable (grades), None sans données du
+                   variomètre à ces instants
+        """
+        if self.variometre is None:
+            return valeur
+        valeurs, composantes = self.variometre.values(
+            station, jour, continuous_times([heures])[0])
+        if not all(nom in composantes for nom in "XYZ"):
+            return None
+        x, y, z = (valeurs[:, composantes.index(nom)] for nom in "XYZ")
+        if nom == "declinaison":
+            vario = np.arctan2(y, x).mean()
+        else:
+            vario = np.arctan2(z, np.hypot(x, y)).mean()
+        if np.isnan(vario):
+            return None
+        return float(wrap(valeur - vario * GRADES_PAR_RADIAN))
+
+    def deviation(self, nom: str, valeur: float) -> Optional[tuple]:
+        """ Écart d'une valeur provisoire à la référence
+
+        Args:
+            nom (str): declinaison ou inclinaison
+            valeur (float): Valeur provisoire (grades), voir compared
+
+        Returns:
+            tuple (float, float): écart (grades) et écart en nombre
+                                  d'écarts-types, None sans référence
+        """
+        if nom not in self.mediane:
+            return None
+        ecart = float(wrap(valeur - self.mediane[nom]))
+        return ecart, abs(ecart) / self.ecartType[nom]
+
+
+def main_baseline(argv: list = None) -> None:
+    """ Point d'entrée de la commande 'baseline': reconstruit les séries
+        depuis l'archive
+
+    Args:
+        argv (list, optional): Arguments. Defaults to sys.argv[2:].
+    """
+    # pylint: disable= import-outside-toplevel
+    from .anomalies import iter_station_sessions
+    from .variometre import Variometre
+
+    parser = argparse.ArgumentParser(
+        prog="saisiemesabs baseline", parents=[command_parser()],
+        description="Reconstruit les séries de lignes de base d'une station")
+    args, conf, dataDir = setup_command(parser, argv)
+    variometre = None
+    if conf["Chemin_Vario"]:
+        variometre = Variometre(conf["Chemin_Vario"],
+                                dataDir / "cache" / "variometre")
+
+    for station in args.station or [conf["Station"]]:
+        ecrits = rebuild(dataDir / "lignes_de_base",
+                         iter_station_sessions(conf["Chemin_Sauvegarde"],
+                                               station, args.years),
+                         conf["Intensite"], not args.nord, variometre)
+        for chemin, nombre in ecrits.items():
+            log.info("%s: %d points", chemin, nombre)
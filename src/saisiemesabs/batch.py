@@ -0,0 +1,146 @@
+""" Réduction en lot des archives de fichiers re, sans interface graphique
+
+Usage:
+    python -m saisiemesabs reduce --station paf --years 2015-2025
+"""
+# pylint: disable= invalid-name
+
+import os
+import sys
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .cli import command_parser, setup_command
+from .refile import (
+    FormatReError,
+    expand_path_re,
+    file_year,
+    iter_archive,
+    read_session
+)
+from .reduction import reduce_sessions
+
+log = logging.getLogger(__name__)
+
+# Nombre de fichiers traités par tâche, pour amortir le coût de transfert
+TAILLE_LOT = 256
+
+COLONNES = ("chemin", "station", "date", "heure",
+            "D1", "I1", "D2", "I2", "mire")
+
+
+def reduce_files(chemins: list, intensite: float,
+                 hemisphereSud: bool = True) -> tuple:
+    """ Lit et réduit un lot de fichiers (exécuté dans un processus fils)
+
+    Args:
+        chemins (list): Chemins des fichiers re
+        intensite (float): Intensité totale F (nT)
+        hemisphereSud (bool, optional): Inclinaison négative.
+                                        Defaults to True.
+
+    Returns:
+        tuple (list, list): lignes de résultat, messages d'erreur
+    """
+    sessions = []
+    erreurs = []
+    for chemin in chemins:
+        try:
+            sessions.append(read_session(chemin))
+        except (FormatReError, UnicodeDecodeError, OSError) as exc:
+            erreurs.append(str(exc))
+    if not sessions:
+        return [], erreurs
+    reduction = reduce_sessions(sessions, intensite, hemisphereSud)
+    lignes = []
+    for i, session in enumerate(sessions):
+        heure = session.lignes[0].heure
+        lignes.append((
+            str(session.chemin),
+            session.station,
+            session.date.isoformat(),
+            f"{heure // 3600:02d}:{heure // 60 % 60:02d}:{heure % 60:02d}",
+            *("%.4f" % angle for angle in (
+                reduction.declinaison[i, 0], reduction.inclinaison[i, 0],
+                reduction.declinaison[i, 1], reduction.inclinaison[i, 1],
+                reduction.mire[i])),
+        ))
+    return lignes, erreurs
+
+
+def iter_batches(modele: str, stations: list, annees: range):
+    """ Découpe les fichiers de l'archive en lots de TAILLE_LOT chemins
+
+    Args:
+        modele (str): Chemin PATH_RE de la configuration
+        stations (list): Stations à traiter
+        annees (range): Années à traiter
+
+    Yields:
+        list: Lot de chemins
+    """
+    lot = []
+    for station in stations:
+        for annee in annees:
+            for chemin in iter_archive(expand_path_re(modele, station, annee)):
+                # Sans $YY dans PATH_RE, le dossier contient toutes les
+                # années: chaque fichier n'est pris qu'avec la sienne
+                if file_year(chemin) != annee:
+                    continue
+                lot.append(chemin)
+                if len(lot) >= TAILLE_LOT:
+                    yield lot
+                    lot = []
+    if lot:
+        yield lot
+
+
+def main_reduce(argv: list = None) -> None:
+    """ Point d'entrée de la commande 'reduce'
+
+    Args:
+        argv (list, optional): Arguments. Defaults to sys.argv[2:].
+    """
+    parser = argparse.ArgumentParser(
+        prog="saisiemesabs reduce", parents=[command_parser()],
+        description="Réduit toutes les mesures d'une archive PATH_RE")
+    parser.add_argument("--intensite", type=float,
+                        help="Intensité totale F en nT (par défaut: celle de "
+                        "la configuration)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="Fichier de sortie (par défaut: sortie standard)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="Nombre de processus (par défaut: nombre de "
+                        "coeurs)")
+    args, conf, _ = setup_command(parser, argv)
+    stations = args.station or [conf["Station"]]
+    intensite = args.intensite or conf["Intensite"]
+
+    output = (sys.stdout if args.output == "-"
+              else open(args.output, "w", encoding="utf-8"))
+    nbSessions = 0
+    nbErreurs = 0
+    try:
+        output.write("\t".join(COLONNES) + "\n")
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            taches = [
+                pool.submit(reduce_files, lot, intensite, not args.nord)
+                for lot in iter_batches(conf["Chemin_Sauvegarde"],
+                                        stations, args.years)
+            ]
+            # Écriture au fil de l'eau, dans l'ordre de fin des workers
+            for tache in as_completed(taches):
+                lignes, erreurs = tache.result()
+                for erreur in erreurs:
+                    log.warning("Fichier ignoré: %s", erreur)
+                output.writelines("\t".join(ligne) + "\n"
+                                  for ligne in lignes)
+                output.flush()
+                nbSessions += len(lignes)
+                nbErreurs += len(erreurs)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    log.info("%d sessions réduites, %d fichiers ignorés",
+             nbSessions, nbErreurs)
@@ -0,0 +1,281 @@
+""" Bancs de mesure de performance de l'interface de saisie
+
+Lance SaisieMesAbs sur la plateforme Qt 'offscreen' et écrit les résultats
+au format JSON:
+
+    python -m saisiemesabs.benchmark -o resultats.json
+
+Comparer deux fichiers de résultats permet de détecter une régression après
+une modification des widgets (customwidgets.py).
+"""
+# pylint: disable= invalid-name
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import pathlib
+import tempfile
+
+# Avant tout import de Qt
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# pylint: disable= wrong-import-position
+from PySide6 import QtWidgets
+from PySide6.QtCore import Qt
+from PySide6.QtTest import QTest
+
+from .app import SaisieMesAbs
+from .config import analyse_conf, create_default_conf
+from .customwidgets import MyLineEdit, SaisieAngle, SaisieHeure, SaisieMesure
+
+METADATA = {"version": "benchmark", "Home-page": "", "Author-email": ""}
+
+# Session valide (Exemples/re07181322.paf) pour remplir le formulaire
+SESSION = {
+    "azimuth": "52.3584",
+    "vise1.haut": "247.7550", "vise1.bas": "47.7550",
+    "vise2.haut": "247.7550", "vise2.bas": "47.7550",
+    "mesure1.est": "233.1880", "mesure3.est": "233.1840",
+}
+for _i, _serie in enumerate((
+        (("130640", "233.1880", "0.0"), ("130710", "233.1880", "3.7"),
+         ("130740", "33.1880", "-3.4"), ("130805", "33.1880", "0.2")),
+        (("130845", "123.1470", "0.0"), ("130915", "323.1470", "1.1"),
+         ("130955", "276.8530", "0.5"), ("131015", "76.8530", "-0.5")),
+        (("131045", "233.1840", "-0.1"), ("131105", "233.1840", "2.0"),
+         ("131155", "33.1840", "-4.0"), ("131155", "33.1840", "0.1")),
+        (("131245", "123.1480", "0.5"), ("131315", "323.1480", "-1.2"),
+         ("131400", "276.8520", "0.2"), ("131420", "76.8520", "-2.0")))):
+    for _j, (_heure, _angle, _mesure) in enumerate(_serie):
+        SESSION[f"mesure{_i}.{_j}.heure"] = _heure
+        SESSION[f"mesure{_i}.{_j}.angle"] = _angle
+        SESSION[f"mesure{_i}.{_j}.mesure"] = _mesure
+
+
+def create_window() -> SaisieMesAbs:
+    """ Crée une fenêtre de saisie avec la configuration par défaut
+
+    Returns:
+        SaisieMesAbs: Fenêtre affichée (offscreen)
+    """
+    dossier = tempfile.TemporaryDirectory()
+    chemin = pathlib.Path(dossier.name) / "configuration.txt"
+    create_default_conf(chemin)
+    configuration = analyse_conf(chemin)
+    window = SaisieMesAbs("19/07/22", METADATA, configuration)
+    # La configuration est relue à chaque nouvelle session (nouvelleSession)
+    window.dossierConf = dossier
+    QtWidgets.QApplication.processEvents()
+    return window
+
+
+def fill(window: SaisieMesAbs) -> None:
+    """ Remplit le formulaire avec une session valide
+
+    Args:
+        window (SaisieMesAbs): Fenêtre de saisie
+    """
+    champs = window.champsSaisie()
+    for cle, valeur in SESSION.items():
+        champs[cle].setText(valeur, True)
+    QtWidgets.QApplication.processEvents()
+
+
+def _stats(durees: list) -> dict:
+    """ Statistiques d'une liste de durées (s), en millisecondes
+    """
+    durees = sorted(durees)
+    return {
+        "repetitions": len(durees),
+        "median_ms": round(durees[len(durees) // 2] * 1000, 4),
+        "p95_ms": round(durees[int(len(durees) * 0.95)] * 1000, 4),
+        "min_ms": round(durees[0] * 1000, 4),
+        "max_ms": round(durees[-1] * 1000, 4),
+    }
+
+
+def _chrono(fonction, repetitions: int) -> dict:
+    """ Chronomètre une fonction, affichage compris
+    """
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        QtWidgets.QApplication.processEvents()
+        durees.append(time.perf_counter() - debut)
+    return _stats(durees)
+
+
+def bench_coloration(window: SaisieMesAbs, repetitions: int = 50) -> dict:
+    """ Compare la coloration par feuille de style (ancienne méthode) et par
+        palette partagée lors de validateAll
+
+    Args:
+        window (SaisieMesAbs): Fenêtre remplie
+        repetitions (int, optional): Nombre de validations. Defaults to 50.
+
+    Returns:
+        dict: Temps par validation complète, pour chaque méthode
+    """
+    champs = [champ for champ in window.champsSaisie().values()
+              if isinstance(champ, MyLineEdit)]
+    styles = {"valide": "color: green;", "etrange": "color: orange",
+              "invalide": "color: red;"}
+
+    def feuilleDeStyle():
+        # Ce que faisait isValid: un setStyleSheet à chaque validation
+        for champ in champs:
+            if (champ.hasAcceptableInput()
+                    and champ.regexValidator.match(champ.text())):
+                etat = "etrange" if champ.isStrange() else "valide"
+            else:
+                etat = "invalide"
+            champ.setStyleSheet(styles[etat])
+
+    ancien = _chrono(feuilleDeStyle, repetitions)
+    for champ in champs:
+        champ.setStyleSheet("")
+        champ.etat = None
+    nouveau = _chrono(window.validateAll, repetitions)
+    return {
+        "champs": len(champs),
+        "feuille_de_style": ancien,
+        "palette": nouveau,
+        "gain": round(ancien["median_ms"] / max(nouveau["median_ms"], 1e-9),
+                      2),
+    }
+
+
+def type_session(window: SaisieMesAbs) -> tuple:
+    """ Saisit la session au clavier (QTest.keyClicks), comme un opérateur:
+        seuls les champs que l'autocomplétion n'a pas déjà remplis
+        correctement sont tapés, chacun terminé par Tab
+
+    Args:
+        window (SaisieMesAbs): Fenêtre vierge
+
+    Returns:
+        tuple (list, list): Durées par touche [(type, s)] et par champ
+                            [(type, s)], affichage compris
+    """
+    types = {SaisieHeure: "heure", SaisieAngle: "angle",
+             SaisieMesure: "mesure"}
+    champs = window.champsSaisie()
+    touches = []
+    saisies = []
+    for cle, valeur in SESSION.items():
+        champ = champs[cle]
+        if champ.text() == valeur or not champ.isEnabled():
+            continue
+        nom = types.get(type(champ), "autre")
+        champ.setFocus()
+        # Les angles ne sélectionnent que les "-" du texte initial: seuls les
+        # chiffres manquants sont tapés
+        champ.selectAll()
+        debutSelection = champ.selectionStart()
+        if debutSelection > 0 and valeur.startswith(
+                champ.text()[:debutSelection]):
+            texte = valeur[debutSelection:]
+        else:
+            champ.clear()
+            texte = valeur
+        debutChamp = time.perf_counter()
+        for caractere in texte:
+            debut = time.perf_counter()
+            QTest.keyClicks(champ, caractere)
+            QtWidgets.QApplication.processEvents()
+            touches.append((nom, time.perf_counter() - debut))
+        # Fin d'édition: réécriture, validation et coloration
+        debut = time.perf_counter()
+        QTest.keyClick(champ, Qt.Key_Tab)
+        QtWidgets.QApplication.processEvents()
+        touches.append((nom, time.perf_counter() - debut))
+        saisies.append((nom, time.perf_counter() - debutChamp))
+    return touches, saisies
+
+
+def bench_frappe(window: SaisieMesAbs, repetitions: int = 5) -> dict:
+    """ Latence de frappe: saisie complète d'une session au clavier,
+        autocomplétion et coloration comprises
+
+    Le formulaire est remis à zéro (nouvelleSession) entre deux saisies.
+
+    Args:
+        window (SaisieMesAbs): Fenêtre de saisie
+        repetitions (int, optional): Nombre de sessions tapées.
+                                     Defaults to 5.
+
+    Returns:
+        dict: Latences par touche et par champ, pour chaque type de champ
+    """
+    touches = []
+    saisies = []
+    evaluations = window.autoComplete.evaluations
+    validations = MyLineEdit.validations
+    valide = True
+    for _ in range(repetitions):
+        window.nouvelleSession()
+        QtWidgets.QApplication.processEvents()
+        touchesSession, saisiesSession = type_session(window)
+        touches += touchesSession
+        saisies += saisiesSession
+        valide = valide and window.validateAll()
+    resultat = {
+        "sessions": repetitions,
+        "session_valide": valide,
+        "touches": _stats([duree for _, duree in touches]),
+        "champs": _stats([duree for _, duree in saisies]),
+        "regles_evaluees_par_session": (window.autoComplete.evaluations
+                                        - evaluations) / repetitions,
+        "validations_par_session": (MyLineEdit.validations
+                                    - validations) / repetitions,
+    }
+    for nom in sorted({nom for nom, _ in saisies}):
+        resultat[nom] = {
+            "touches": _stats([duree for n, duree in touches if n == nom]),
+            "champs": _stats([duree for n, duree in saisies if n == nom]),
+        }
+    return resultat
+
+
+def main(argv: list = None) -> None:
+    """ Lance les bancs de mesure et écrit les résultats en JSON
+
+    Args:
+        argv (list, optional): Arguments. Defaults to sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(prog="python -m saisiemesabs.benchmark")
+    parser.add_argument("-n", "--repetitions", type=int, default=50,
+                        help="Nombre de répétitions (par défaut: 50)")
+    parser.add_argument("-s", "--sessions", type=int, default=5,
+                        help="Nombre de sessions tapées au clavier "
+                        "(par défaut: 5)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="Fichier JSON de sortie (par défaut: stdout)")
+    args = parser.parse_args(argv)
+    # Les logs de l'application iraient sur stdout avec le JSON
+    for nom in ("saisiemesabs.app", "saisiemesabs.config"):
+        logging.getLogger(nom).setLevel(logging.WARNING)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    window = create_window()
+    fill(window)
+    resultats = {
+        "plateforme": app.platformName(),
+        "python": sys.version.split()[0],
+        "coloration": bench_coloration(window, args.repetitions),
+        "frappe": bench_frappe(window, args.sessions),
+    }
+    texte = json.dumps(resultats, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(texte)
+    else:
+        with open(args.output, "w", encoding='utf-8') as file:
+            file.write(texte + "\n")
+
+
+if __name__ == "__main__":
+    main()
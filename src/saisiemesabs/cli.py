@@ -0,0 +1,83 @@
+""" Arguments et mise en place communs aux commandes en ligne (reduce,
+anomalies, baseline, reprocess, summary)
+
+Aucune de ces commandes ne charge l'interface graphique: la configuration
+est lue par le module config.
+"""
+# pylint: disable= invalid-name
+
+import sys
+import logging
+import argparse
+import pathlib
+import importlib.metadata
+
+from .config import get_conf, get_dataDir
+
+# Logger du paquet: reçoit les messages de tous les modules
+log = logging.getLogger(__package__)
+# Sortie des logs sur stderr, stdout peut recevoir les résultats
+log_stream_handler = logging.StreamHandler(sys.stderr)
+log_stream_handler.setFormatter(
+    logging.Formatter("%(asctime)s [%(levelname)8s] %(lineno)4d : %(message)s")
+)
+
+
+def parse_years(text: str) -> range:
+    """ Analyse un intervalle d'années 'AAAA' ou 'AAAA-AAAA'
+
+    Args:
+        text (str): Intervalle d'années
+
+    Returns:
+        range: Années incluses
+    """
+    debut, _, fin = text.partition("-")
+    return range(int(debut), int(fin or debut) + 1)
+
+
+def command_parser() -> argparse.ArgumentParser:
+    """ Parser parent des commandes: stations, années, configuration et
+        hémisphère
+
+    Returns:
+        argparse.ArgumentParser: Parser à passer dans 'parents'
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--station", action="append",
+                        help="Station à traiter (répétable, par défaut celle "
+                        "de la configuration)")
+    parser.add_argument("--years", type=parse_years, required=True,
+                        help="Années à traiter (AAAA ou AAAA-AAAA)")
+    parser.add_argument("--conf", type=str,
+                        help="Utilise un fichier de configuration défini")
+    parser.add_argument("--nord", action="store_true",
+                        help="Station de l'hémisphère nord")
+    return parser
+
+
+def setup_command(parser: argparse.ArgumentParser,
+                  argv: list = None) -> tuple:
+    """ Analyse les arguments d'une commande, affiche ses logs et charge la
+        configuration
+
+    Args:
+        parser (argparse.ArgumentParser): Parser de la commande (parent
+                                          command_parser)
+        argv (list, optional): Arguments. Defaults to sys.argv[2:].
+
+    Returns:
+        tuple (argparse.Namespace, dict, pathlib.Path): arguments,
+                                                        configuration et
+                                                        dossier de données
+    """
+    args = parser.parse_args(sys.argv[2:] if argv is None else argv)
+    log.addHandler(log_stream_handler)
+    log.setLevel(logging.INFO)
+
+    app_module = sys.modules["__main__"].__package__ or __package__
+    metadata = importlib.metadata.metadata(app_module)
+    conf = get_conf(metadata["Formal-Name"],
+                    pathlib.Path(args.conf) if args.conf else None)
+    dataDir = get_dataDir(metadata["Formal-Name"])
+    return args, conf, dataDir
@@ -0,0 +1,187 @@
+""" Configuration de l'application (fichier de configuration et dossier de
+données), sans interface graphique: partagée par la saisie et les
+commandes en ligne (voir cli)
+"""
+# pylint: disable= invalid-name
+
+import sys
+import logging
+import pathlib
+import configparser
+
+log = logging.getLogger(__name__)
+
+
+def analyse_conf(chemin_fichier: pathlib.Path) -> dict:
+    """ Analyse de la configuration
+
+    Args:
+        chemin_fichier (pathlib.Path): Chemin du fichier de configuration
+
+    Raises:
+        ValueError: La configuration est mauvaise
+
+    Returns:
+        dict: Renvoi les valeurs de configuration
+    """
+    try:
+        log.info("🔍 - Analyse du fichier %s", chemin_fichier)
+
+        # Initialisation du parser de configuration
+        contentConfig = configparser.ConfigParser()
+        contentConfig.read(chemin_fichier)
+
+        # Vérification si la section "STATION" et "AUTOCOMPLETE" sont présentes
+        if not contentConfig.has_section("STATION"):
+            raise ValueError("La section 'STATION' est manquante dans le fichier de configuration")
+        if not contentConfig.has_section("AUTOCOMPLETE"):
+            raise ValueError("La section 'AUTOCOMPLETE' est manquante dans le fichier de configuration")
+
+        # Extraction des valeurs de configuration
+        configuration = {
+            "Chemin_conf": chemin_fichier,
+            "Station": contentConfig.get("STATION", "NOM_STATION", fallback="NA"),  # Valeur par défaut si manquante
+            "Azimuth_Rep": contentConfig.get("STATION", "AZIMUTH_REPERE", fallback="---.----"),
+            "Chemin_Sauvegarde": contentConfig.get("STATION", "PATH_RE", fallback="./"),
+            "Fsync": contentConfig.getboolean("STATION", "FSYNC", fallback=True),
+            "Intensite": contentConfig.getfloat("STATION", "INTENSITE",
+                                                fallback=50000.0),
+            "Chemin_Vario": contentConfig.get("STATION", "PATH_VARIO",
+                                              fallback=""),
+            'Angle': {
+                "inc": contentConfig.get("AUTOCOMPLETE", "AUTO_INC_ANGLE", fallback="---.----"),
+                "dec": contentConfig.get("AUTOCOMPLETE", "AUTO_DEC_ANGLE", fallback="---.----")
+            },
+            'Calibration': {
+                "haut": contentConfig.get("AUTOCOMPLETE", "AUTO_CAL_ANGLE_HAUT", fallback="---.----"),
+                "bas": contentConfig.get("AUTOCOMPLETE", "AUTO_CAL_ANGLE_BAS", fallback="---.----")
+            },
+            'Delai': {
+                "Etape": contentConfig.getint("AUTOCOMPLETE", "SEC_ENTRE_MESURES", fallback=45),
+                "Mesure": contentConfig.getint("AUTOCOMPLETE", "SEC_ENTRE_ETAPES", fallback=70)
+            }
+        }
+
+        # Retourner la configuration sous forme de dictionnaire
+        return configuration
+
+    except (ValueError, configparser.MissingSectionHeaderError, configparser.NoOptionError) as exc:
+        log.error("Le fichier de configuration %s n'est pas valide. "
+                  "Erreur: %s", chemin_fichier, exc)
+        raise ValueError(f"Le fichier de configuration '{chemin_fichier}' "
+                         "n'est pas valide") from exc
+
+
+def get_dataDir(app_name: str) -> pathlib.Path:
+    """ Renvoi le dossier où stocker la configuration
+        Le créé s'il n'existe pas
+
+    Args:
+        app_name (str): Nom de l'application
+
+    Raises:
+        SystemError: L'OS n'est pas compatible
+
+    Returns:
+        pathlib.Path: Dossier où stocker la configuration
+    """
+
+    home = pathlib.Path.home()
+
+    if sys.platform == "linux":
+        dataDir = home / ".local/share"
+    else:
+        log.critical("Plateforme inconnue ! %s", sys.platform)
+        raise SystemError
+
+    myDataDir = dataDir / app_name
+
+    try:
+        myDataDir.mkdir(parents=True, exist_ok=True)
+        log.debug("Le dossier data local n'existait pas et a été créé")
+    except Exception as exc:
+        log.debug("Erreur lors de la création du dossier: %s", exc)
+        raise
+    return myDataDir
+
+
+def create_default_conf(path: pathlib.Path):
+    """ Créé un fichier de configuration au chemin donnée
+
+    Args:
+        path (pathlib.Path): Chemin du fichier de configuration
+    """
+    # Contenu par défaut pour la configuration de la station
+    default_conf = (
+        "[STATION]\n\n"
+        "# Nom de la station en minuscules\n"
+        "NOM_STATION     = NA\n\n"
+        "# Chemin où enregistrer les mesures\n"
+        "# - $YY sera remplacé par les deux derniers chiffres de l'année de la mesure\n"
+        "# - $STATION par le nom de la station en minuscules\n"
+        "PATH_RE         = /home/$STATION/$STATION$YY/mes-abs/mes-jour\n\n"
+        "# Azimuth de la cible\n"
+        "AZIMUTH_REPERE  = 52.35840\n\n"
+        "# Forcer l'écriture sur le disque à l'enregistrement (yes/no)\n"
+        "FSYNC           = yes\n\n"
+        "# Intensité totale F approchée (nT), pour la réduction des mesures\n"
+        "INTENSITE       = 50000\n\n"
+        "# Dossier des fichiers du variomètre au format IAGA-2002\n"
+        "# (optionnel) pour le calcul des lignes de base\n"
+        "PATH_VARIO      =\n\n"
+        "[AUTOCOMPLETE]\n"
+        "AUTO_INC_ANGLE      = 123.----\n"
+        "AUTO_DEC_ANGLE      = 233.----\n"
+        "AUTO_CAL_ANGLE_HAUT = 247.75--\n"
+        "AUTO_CAL_ANGLE_BAS  = 47.75--\n"
+        "SEC_ENTRE_MESURES   = 45\n"
+        "SEC_ENTRE_ETAPES    = 70\n\n\n"
+        "# N'oubliez pas de relancer l'application !\n"
+    )
+    with open(path, "w", encoding='utf-8') as file:
+        file.write(default_conf)
+
+
+def get_conf(app_name: str, conf_path: pathlib.Path = None) -> pathlib.Path:
+    """ Obtenir le chemin du fichier de configuration
+        Si l'application n'a pas de fichier de conf par défaut, en créer un
+        Si un chemin est donné, verifier sa validité
+        Sinon utiliser le chemin par défaut de l'application
+
+    Args:
+        app_name (str): Nom de l'application
+        conf_path (pathlib.Path, optional): Chemin vers le fichier conf.
+                                            Defaults to None.
+
+    Returns:
+        pathlib.Path: Le chemin du fichier de configuration
+    """
+    if not conf_path:
+        log.debug("Pas de conf donné")
+        conf_path = get_dataDir(app_name) / "configuration.txt"
+        if not conf_path.is_file():
+            log.warning(
+                "Le fichier de configuration %s n'existe pas -> création",
+                conf_path)
+            # Création du fichier conf
+            create_default_conf(conf_path)
+        try:
+            return analyse_conf(conf_path)
+        except (KeyError, ValueError):
+            log.critical("Il semble que votre configuration par "
+                         "défaut soit incompatible ou corrompue.")
+            log.warning("Création d'une nouvelle config")
+            create_default_conf(conf_path)
+            return analyse_conf(conf_path)
+
+    # Verifier que le fichier fonctionne
+    config_tocheck = configparser.ConfigParser()
+    log.info("Verification du fichier de configuration")
+    try:
+        log.debug(conf_path.absolute())
+        config_tocheck.read(conf_path.absolute())
+        return analyse_conf(conf_path)
+
+    except (ValueError, KeyError):
+        log.warning("Utilisation du fichier conf par défaut")
+        return get_conf(app_name, None)
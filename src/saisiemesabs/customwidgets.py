@@ -2,67 +2,209 @@
 """
 
 import re
+import pathlib
+from functools import partial
 from PySide6 import QtWidgets
-from PySide6.QtGui import QPixmap, Qt
+from PySide6.QtCore import QResource
+from PySide6.QtGui import QBitmap, QColor, QPalette, QPixmap, Qt
+
+from .autocomplete import Regle
+from .pointfixe import (
+    ANGLE_ECHELLE,
+    MESURE_ECHELLE,
+    angle_mirror,
+    angle_shift,
+    format_angle,
+    format_mesure,
+    parse_angle,
+    parse_mesure
+)
+from .temps import format_hhmmss, parse_hhmmss
+from .model import heure_re, angle_re, mesure_re, date_re  # noqa: F401
 
 # pylint: disable= invalid-name
 
-heure_re = re.compile(r"^(([01]\d|2[0-3])([0-5]\d)|24:00)([0-5]\d)$")
-angle_re = re.compile(r"^(?:[0-3]*[0-9]{1,2}|400)(?:\.[0-9]{4,})$")
-mesure_re = re.compile(r"^(?:-*[0-9]+)(?:\.[0-9]{1})$")
-date_re = re.compile(r"^\d{2}\/\d{2}\/\d{2}$")
+# Ressources Qt compilées (pyside6-rcc --binary), projetées en mémoire par Qt
+RESSOURCES_RCC = pathlib.Path(__file__).parent / "resources" / "ressources.rcc"
+_ressourcesChargees = False
+
+
+def load_resources() -> None:
+    """ Enregistre les ressources Qt (logos, icône) au premier besoin
+
+    Le fichier .rcc est projeté en mémoire (mmap) par Qt: les images ne sont
+    lues que lorsqu'elles sont affichées. Le module ressources_rc, qui garde
+    toutes les données en mémoire, n'est importé qu'en dernier recours.
+    """
+    global _ressourcesChargees
+    if _ressourcesChargees:
+        return
+    _ressourcesChargees = True
+    if QResource.registerResource(str(RESSOURCES_RCC)):
+        return
+    # pylint: disable= import-outside-toplevel, unused-import
+    from .resources import ressources_rc  # noqa: F401
 
 
 def date_add_seconds(date: str, sec: int) -> str:
     """Additionne une horaire au format hhmmss à un nombre de seconde
 
+    Le résultat est l'heure du jour: après minuit, la date de la ligne est
+    celle du lendemain (voir temps.continuous_times).
+
     Args:
         date (str): Horaire format hhmmss
-        sec (int): Nombre de secondes à ajouter à l'horaire
+        sec (int): Nombre de secondes à ajouter à l'horaire (éventuellement
+                   négatif)
+
+    Raises:
+        ValueError: L'horaire n'est pas valide
 
     Returns:
         str: horaire au format hhmmss
     """
-    # Découpe du string d'entrée
-    hour = int(date[0:2])
-    minute = int(date[2:4])
-    second = int(date[4:6])
-    # Ajout des secondes
-    newSecond = second + sec
-    # Récupération des minutes supplémentaires
-    newMinute = minute + int(newSecond / 60)
-    # Récupération des heures supplémentaires
-    newHour = hour + int(newMinute / 60)
-    # Recalcule des secondes/minutes/heures
-    newSecond %= 60
-    newMinute %= 60
-    newHour %= 24
-    # Renvoie de l'horaire hhmmss
-    return (str(newHour).zfill(2) +
-            str(newMinute).zfill(2) +
-            str(newSecond).zfill(2))
+    return format_hhmmss(parse_hhmmss(date) + sec)
+
+
+def angle_auto(angle: str, decalage: float = 0, miroir: bool = False):
+    """ Calcule un angle autocomplété au format %.4f
+        Le calcul est exact, en dix-millièmes de grade (voir pointfixe)
+
+    Args:
+        angle (str): angle saisi
+        decalage (float, optional): Décalage en grades. Defaults to 0.
+        miroir (bool, optional): Utilise 400 - angle. Defaults to False.
+
+    Returns:
+        str: angle calculé, None si l'angle saisi n'est pas un nombre
+    """
+    try:
+        valeur = parse_angle(angle)
+    except ValueError:
+        return None
+    if miroir:
+        valeur = angle_mirror(valeur)
+    if decalage or miroir:
+        valeur = angle_shift(valeur, round(decalage * ANGLE_ECHELLE))
+    return format_angle(valeur)
+
+
+# Logos déjà chargés: (chemin, largeur, hauteur, ratio) -> (logo, masque),
+# y compris un logo nul pour une ressource absente
+_logos = {}
+
+
+def scaled_logo(path: str, taille, ratio: float) -> tuple:
+    """ Redimensionne un logo à la résolution de l'écran
+
+    Args:
+        path (str): Chemin de la ressource (ex: :/Logo_EOST.png)
+        taille (QSize): Taille maximale du logo (pixels logiques)
+        ratio (float): Ratio de pixels de l'écran
+
+    Returns:
+        tuple (QPixmap, QBitmap): logo (nul si la ressource est absente) et
+                                  son masque en pixels logiques
+    """
+    logo = QPixmap(path)
+    if logo.isNull():
+        return logo, QBitmap()
+    logo = logo.scaled(taille * ratio, Qt.KeepAspectRatio,
+                       Qt.SmoothTransformation)
+    logo.setDevicePixelRatio(ratio)
+    # Le masque d'un widget est en pixels logiques
+    masque = QBitmap.fromPixmap(
+        logo.mask().scaled(logo.deviceIndependentSize().toSize()))
+    return logo, masque
+
+
+def cached_logo(path: str, taille, ratio: float,
+                cacheDir: pathlib.Path = None) -> tuple:
+    """ Renvoie un logo redimensionné et son masque, depuis le cache disque
+        s'il existe
+
+    La clé du cache contient le nom de la ressource, la taille cible, le
+    ratio de pixels de l'écran ainsi que la taille et la date de la
+    ressource: une ressource modifiée n'utilise donc jamais un ancien cache.
+    Une ressource absente n'est cherchée qu'une fois.
+
+    Args:
+        path (str): Chemin de la ressource (ex: :/Logo_EOST.png)
+        taille (QSize): Taille maximale du logo
+        ratio (float): Ratio de pixels de l'écran
+        cacheDir (pathlib.Path, optional): Dossier du cache, None pour ne
+                                           pas utiliser de cache.
+                                           Defaults to None.
+
+    Returns:
+        tuple (QPixmap, QBitmap): logo redimensionné et son masque
+    """
+    cle = (path, taille.width(), taille.height(), ratio)
+    if cle not in _logos:
+        _logos[cle] = _load_logo(path, taille, ratio, cacheDir)
+    return _logos[cle]
+
+
+def _load_logo(path: str, taille, ratio: float,
+               cacheDir: pathlib.Path = None) -> tuple:
+    """ Lit un logo dans le cache disque, ou le redimensionne et l'y écrit
+        (voir cached_logo)
+    """
+    if cacheDir is None:
+        return scaled_logo(path, taille, ratio)
+    ressource = QResource(path)
+    nom = pathlib.Path(path).stem
+    prefixe = f"{nom}-{taille.width()}x{taille.height()}@{ratio:g}"
+    version = (f"{ressource.size()}-"
+               f"{ressource.lastModified().toSecsSinceEpoch()}")
+    cheminLogo = cacheDir / f"{prefixe}-{version}.png"
+    cheminMasque = cacheDir / f"{prefixe}-{version}-masque.png"
+    if cheminLogo.is_file() and cheminMasque.is_file():
+        logo = QPixmap(str(cheminLogo))
+        masque = QBitmap(str(cheminMasque))
+        if not logo.isNull() and not masque.isNull():
+            # Le PNG ne garde pas le ratio de pixels
+            logo.setDevicePixelRatio(ratio)
+            return logo, masque
+    logo, masque = scaled_logo(path, taille, ratio)
+    if logo.isNull():
+        return logo, masque
+    try:
+        cacheDir.mkdir(parents=True, exist_ok=True)
+        # Suppression des anciennes versions de ce logo
+        for ancien in cacheDir.glob(f"{nom}-*.png"):
+            ancien.unlink()
+        logo.save(str(cheminLogo), "PNG")
+        masque.save(str(cheminMasque), "PNG")
+    except OSError:
+        pass
+    return logo, masque
 
 
 class Logo(QtWidgets.QLabel):
     """ Logo a taille fixe
     """
-    def __init__(self, path: str, maxHeight: int) -> None:
+    def __init__(self, path: str, maxHeight: int,
+                 cacheDir: pathlib.Path = None) -> None:
         """Génération d'un label pour afficher un logo
 
         Args:
             path (str): Chemin du logo
             maxHeight (int): Hauteur maximale
+            cacheDir (pathlib.Path, optional): Dossier du cache des logos
+                                               redimensionnés.
+                                               Defaults to None.
         """
         super().__init__()
+        load_resources()
         # pourquoi ? Parce que ça marche mieux avec -20...
         self.setFixedHeight(
             maxHeight - 20
         )
-        logo = QPixmap(path).scaled(
-            self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation
-        )
+        logo, masque = cached_logo(path, self.size(),
+                                   self.devicePixelRatioF(), cacheDir)
         self.setPixmap(logo)
-        self.setMask(logo.mask())
+        self.setMask(masque)
 
 
 class SaisieDate(QtWidgets.QLineEdit):
@@ -79,6 +221,14 @@ class SaisieDate(QtWidgets.QLineEdit):
 class MyLineEdit(QtWidgets.QLineEdit):
     """ Champs d'édition abstraite
     """
+    # Couleur du texte selon l'état de validation (None: couleur par défaut)
+    COULEURS = {"valide": "green", "etrange": "orange", "invalide": "red"}
+    # Palettes précalculées, partagées par tous les champs:
+    # (cacheKey de la palette de l'application, état) -> palette
+    _palettes = {}
+    # Nombre de validations réellement calculées (regex), tous champs confondus
+    validations = 0
+
     def __init__(self, text: str) -> None:
         """ QtWidgets.QLineEdit à ma sauce pour l'inscription de
             l'heure/angle/mesure
@@ -88,7 +238,10 @@ class MyLineEdit(QtWidgets.QLineEdit):
         """
         # Variable indiquant si la valeur a été modifiée par l'utilisateur
         self.editedByHand = False
+        # Résultat de validation en cache, invalidé à chaque changement
+        self.validite = None
         super().__init__()
+        self.textChanged.connect(self.invalidate)
         # Text initial
         self.initext = text
         self.setText(text)
@@ -103,6 +256,45 @@ class MyLineEdit(QtWidgets.QLineEdit):
         # Action en cas de fin d'édition
         self.editingFinished.connect(self.changed)
         self.regexValidator = re.compile(r"")
+        # État de validation affiché
+        self.etat = None
+
+    @classmethod
+    def palette_etat(cls, etat) -> QPalette:
+        """ Palette partagée correspondant à un état de validation
+            Elle est recalculée si la palette de l'application change
+            (thème)
+
+        Args:
+            etat (str): Clé de COULEURS, ou None
+
+        Returns:
+            QPalette: Palette à appliquer
+        """
+        base = QtWidgets.QApplication.palette()
+        cle = (base.cacheKey(), etat)
+        palette = cls._palettes.get(cle)
+        if palette is None:
+            palette = QPalette(base)
+            if etat is not None:
+                palette.setColor(QPalette.Text, QColor(cls.COULEURS[etat]))
+                # Pour les QLabel (voir Mesure.setControle)
+                palette.setColor(QPalette.WindowText,
+                                 QColor(cls.COULEURS[etat]))
+            cls._palettes[cle] = palette
+        return palette
+
+    def setEtat(self, etat) -> None:
+        """ Colore le texte selon l'état de validation
+            Le widget n'est redessiné que si l'état change
+
+        Args:
+            etat (str): "valide", "etrange", "invalide" ou None
+        """
+        if etat == self.etat:
+            return
+        self.etat = etat
+        self.setPalette(self.palette_etat(etat))
 
     def validatepls(self) -> None:
         """ Emet un son lorsqu'il y a une erreur d'input
@@ -137,6 +329,19 @@ class MyLineEdit(QtWidgets.QLineEdit):
         if not self.editedByHand or force:
             super().setText(text)
 
+    def reset(self, text: str = None) -> None:
+        """ Remet le champ dans son état initial (nouvelle session)
+
+        Args:
+            text (str, optional): Nouveau texte initial. Defaults to None
+                                  (texte initial inchangé).
+        """
+        if text is not None:
+            self.initext = text
+        self.editedByHand = False
+        self.setText(self.initext, True)
+        self.setEtat(None)
+
     def changed(self) -> None:
         """ Si la saisie est modifié, verifie si la saisie est valide
             Sinon emet un beep"""
@@ -158,28 +363,36 @@ class MyLineEdit(QtWidgets.QLineEdit):
         """
         return False
 
+    def invalidate(self) -> None:
+        """ Le texte a changé: la validation devra être refaite
+        """
+        self.validite = None
+
     def isValid(self, color_notvalid: bool = True) -> bool:
         """ Verifie si la saisie est valide à partir d'un regex
+            Le résultat est gardé en cache jusqu'au prochain changement de
+            texte
 
         Returns:
             bool: Saisie valide ou non
         """
-        # La valeur est elle acceptable ?
-        if (self.hasAcceptableInput() and
-                self.regexValidator.match(self.text())):
-            # Oui
-            # Est-elle hors tolérance ?
-            if self.isStrange():
-                # Oui -> Orange
-                self.setStyleSheet("color: orange")
+        if self.validite is None:
+            MyLineEdit.validations += 1
+            # La valeur est elle acceptable ?
+            if (self.hasAcceptableInput() and
+                    self.regexValidator.match(self.text())):
+                # Oui
+                # Est-elle hors tolérance ? Oui -> Orange, Non -> Vert
+                self.validite = "etrange" if self.isStrange() else "valide"
             else:
-                # Non -> Vert
-                self.setStyleSheet("color: green;")
+                self.validite = "invalide"
+        if self.validite != "invalide":
+            self.setEtat(self.validite)
             return True
         # La valeur n'est pas valide
         # Rouge
         if color_notvalid:
-            self.setStyleSheet("color: red;")
+            self.setEtat("invalide")
         return False
 
 
@@ -230,7 +443,7 @@ class SaisieAngle(MyLineEdit):
             (ex: ajout des 0 manquants pour avoir 4 decimals)
         """
         try:
-            self.setText("%.4f" % ((float(self.text()))), True)
+            self.setText(format_angle(parse_angle(self.text())), True)
             self.update()
         except ValueError:
             pass
@@ -245,13 +458,16 @@ class SaisieMesure(MyLineEdit):
         super().__init__(textInit)
         # Regex de validation des mesure
         self.regexValidator = mesure_re
+        # Détecteur appris sur l'historique de la station (voir anomalies):
+        # résidu en dixièmes de nT -> anormal ou non, None si inconnu
+        self.detecteur = None
 
     def rewrite(self) -> None:
         """ rewrite() permet de reecrire la celule dans le bon format
             (ex: ajout des 0 manquants pour avoir 1 decimal)
         """
         try:
-            self.setText("%.1f" % (float(self.text())), True)
+            self.setText(format_mesure(parse_mesure(self.text())), True)
             self.update()
         except ValueError:
             return
@@ -261,10 +477,18 @@ class SaisieMesure(MyLineEdit):
         """ Override de isStrange() du parent, fournit un detecteur de saisie
             anormale
 
+        Sans historique de la station, un résidu de 10 nT ou plus est
+        anormal.
+
         Returns:
             bool: True si valeur anormale
         """
-        return abs(float(self.text())) >= 10
+        mesure = parse_mesure(self.text())
+        if self.detecteur is not None:
+            etrange = self.detecteur(mesure)
+            if etrange is not None:
+                return etrange
+        return abs(mesure) >= 10 * MESURE_ECHELLE
 
 
 class CalibrationAzimuth(QtWidgets.QGroupBox):
@@ -295,28 +519,49 @@ class CalibrationAzimuth(QtWidgets.QGroupBox):
         self.setFixedWidth(500)
 
         # Mise en place des triggers
-        self.angleVH.textChanged.connect(
-            lambda: self.updateAngle(self.angleVH.text()))
         self.angleVH.textEdited.connect(self.stopUpdate)
 
         self.updatable = True  # Autcompletion activé
 
-    def updateAngle(self, angle: str) -> None:
-        """autocomplet le deuxieme angle de visée (sonde en bas)
+    def champs(self, prefixe: str) -> dict:
+        """ Champs de saisie de la visée
 
         Args:
-            angle (str): angle de visée sonde en haut
+            prefixe (str): Préfixe des clés (ex: vise1)
+
+        Returns:
+            dict: {clé: champ}
         """
-        try:
-            if angle != "" and not self.angleVB.editedByHand:
-                self.angleVB.setText("%.4f" % ((float(angle) + 200) % 400))
-        except ValueError:
-            pass
+        return {f"{prefixe}.haut": self.angleVH,
+                f"{prefixe}.bas": self.angleVB}
+
+    def regles(self, prefixe: str) -> list:
+        """ Règles d'autocomplétion internes à la visée:
+            angle sonde en bas = angle sonde en haut + 200
+
+        Args:
+            prefixe (str): Préfixe des clés (ex: vise1)
+
+        Returns:
+            list: Liste de Regle
+        """
+        return [Regle(f"{prefixe}.bas", (f"{prefixe}.haut",),
+                      partial(angle_auto, decalage=200))]
 
     def stopUpdate(self) -> None:
         """Désactive l'autocomplétion"""
         self.updatable = False
 
+    def reset(self, autoValue: dict) -> None:
+        """ Remet la visée dans son état initial
+
+        Args:
+            autoValue (dict): Valeur d'angle pour l'autocompletion
+        """
+        self.angleVH.reset(autoValue["haut"])
+        self.angleVB.reset(autoValue["bas"])
+        self.updatable = True
+
     def getAzi(self) -> None:
         """Retourne les données saisis
 
@@ -411,18 +656,10 @@ class Mesure(QtWidgets.QGroupBox):
             self.layoutMesurePr.addWidget(self.ligne[i]["heure"], 3 + i, 1)
             self.layoutMesurePr.addWidget(self.ligne[i]["angle"], 3 + i, 2)
             self.layoutMesurePr.addWidget(self.ligne[i]["mesure"], 3 + i, 3)
-        # Fonctions pour autocomplete
-        self.ligne[0]["heure"].editingFinished.connect(
-            lambda: self.updateHeure(0))
-        self.ligne[1]["heure"].editingFinished.connect(
-            lambda: self.updateHeure(1))
-        self.ligne[2]["heure"].editingFinished.connect(
-            lambda: self.updateHeure(2))
-        # lors de la modification de la valeur de l'angle de la premiere ligne
-        self.ligne[0]["angle"].textEdited.connect(
-            lambda: self.updateAngle(
-                float(self.ligne[0]["angle"].text()), False)
-        )
+        # Contrôle de la série par rapport aux lignes de base de la station
+        self.controle = QtWidgets.QLabel("")
+        self.controle.setAlignment(Qt.AlignCenter)
+        self.layoutMesurePr.addWidget(self.controle, 0, 2, 2, 2)
         # autocompletion permise
         self.stopUpdate(True)
         # Mise en place du layout
@@ -442,82 +679,99 @@ class Mesure(QtWidgets.QGroupBox):
         if self.typeMesure == "inclinaison":
             self.angleEst.setDisabled(disable)
 
-    def updateHeure(self, indexLigne: int) -> None:
-        """ Autocomplete pour la datation de la prochaine ligne de mesure
+    def setControle(self, texte: str, etat=None) -> None:
+        """ Affiche le contrôle de la série (valeur provisoire et écart aux
+            lignes de base)
 
         Args:
-            indexLigne (int): index de la ligne où l'heure a été saisie
-        """
-        # Si l'heure entré est valide
-        if self.ligne[indexLigne]["heure"].isValid(False):
-            # Récupération de l'heure entrée
-            initHour = self.ligne[indexLigne]["heure"].text()
-            # Calcul de l'heure de la prochaine mesure
-            calculedHour = date_add_seconds(initHour, self.autoValueSec)
-            # Affichage de l'heure de la prochaine mesure
-            self.ligne[indexLigne + 1]["heure"].setText(calculedHour)
-            # Raz des couleurs
-            self.ligne[indexLigne+1]["heure"].setStyleSheet("")
-
-    def updateAngle(self, angle: str, includeFirst: bool) -> None:
-        """ Autocomplete des angles
+            texte (str): Texte à afficher, vide pour effacer
+            etat (str, optional): "valide", "etrange" ou None (voir
+                                  MyLineEdit.COULEURS). Defaults to None.
+        """
+        self.controle.setText(texte)
+        self.controle.setPalette(MyLineEdit.palette_etat(etat))
+
+    def champs(self, prefixe: str) -> dict:
+        """ Champs de saisie de la mesure
 
         Args:
-            angle (str): angle fourni
-            includeFirst (bool): mise à jour de tous les angles ou juste des
-                                 3 derniers
+            prefixe (str): Préfixe des clés (ex: mesure0)
+
+        Returns:
+            dict: {clé: champ}, clés prefixe.est et prefixe.ligne.colonne
         """
-        if includeFirst:
-            self.ligne[0]["angle"].setText("%.4f" % angle)
-        if self.typeMesure == "declinaison":
-            self.ligne[1]["angle"].setText("%.4f" % angle)
-            self.ligne[2]["angle"].setText("%.4f" % ((angle + 200) % 400))
-            self.ligne[3]["angle"].setText("%.4f" % ((angle + 200) % 400))
-        else:
-            self.ligne[1]["angle"].setText("%.4f" % ((angle + 200) % 400))
-            self.ligne[2]["angle"].setText("%.4f" % ((400 - angle) % 400))
-            self.ligne[3]["angle"].setText("%.4f" % ((400 - angle - 200) % 400))
-        # Raz des couleurs
-        for ligne in self.ligne:
-            ligne["angle"].setStyleSheet("")
+        champs = {}
+        if self.typeMesure == "inclinaison":
+            champs[f"{prefixe}.est"] = self.angleEst
+        for j, eLigne in enumerate(self.ligne):
+            for colonne in ("heure", "angle", "mesure"):
+                champs[f"{prefixe}.{j}.{colonne}"] = eLigne[colonne]
+        return champs
 
-    def updateEst(self, angle: str) -> None:
-        """ Autocomplet la saisie de l'est magnetique
+    def regles(self, prefixe: str) -> list:
+        """ Règles d'autocomplétion internes à la mesure:
+            - heure d'une ligne = heure de la ligne précédente + délai
+            - angles des lignes 2 à 4 calculés à partir de la ligne 1
 
         Args:
-            angle (str): angle fournit
+            prefixe (str): Préfixe des clés (ex: mesure0)
+
+        Returns:
+            list: Liste de Regle
         """
-        self.angleEst.setText("%.4f" % angle)
+        regles = []
+        for j in range(3):
+            # Condition sans effet de bord: la couleur du champ n'est
+            # changée qu'à la fin de sa saisie (editingFinished, validateAll)
+            regles.append(Regle(
+                f"{prefixe}.{j + 1}.heure", (f"{prefixe}.{j}.heure",),
+                self.heureSuivante,
+                lambda champ=self.ligne[j]["heure"]:
+                    heure_re.match(champ.text()) is not None
+            ))
+        if self.typeMesure == "declinaison":
+            calculs = (angle_auto,
+                       partial(angle_auto, decalage=200),
+                       partial(angle_auto, decalage=200))
+        else:
+            calculs = (partial(angle_auto, decalage=200),
+                       partial(angle_auto, miroir=True),
+                       partial(angle_auto, decalage=200, miroir=True))
+        for j, calcul in enumerate(calculs, 1):
+            regles.append(Regle(
+                f"{prefixe}.{j}.angle", (f"{prefixe}.0.angle",), calcul))
+        return regles
+
+    def heureSuivante(self, heure: str) -> str:
+        """ Heure de la ligne suivante (autocomplétion), selon le délai
+            courant entre deux mesures
 
-    def getData(self) -> dict:
-        """ Renvoi les mesures sous forme d'un dictionnaire
+        Args:
+            heure (str): Heure de la ligne, format hhmmss
 
         Returns:
-            dict: mesure au format:
-            {
-                "nom": nom de la mesure
-                "est": angle (ou None),
-                "mesure": {
-                    [{
-                        "heure": hh mm ss,
-                        "angle": angle,
-                        "mesure": mesure
-                    },...]
-                }
-            }
-        """
-        collectionData = {"est": None, "mesures": []}
-        for eLigne in self.ligne:
-            newCollec = {}
-            heure = eLigne["heure"].text()
-            newCollec["heure"] = f"{heure[0:2]} {heure[2:4]} {heure[4:6]}"
-            newCollec["angle"] = eLigne["angle"].text()
-            newCollec["mesure"] = eLigne["mesure"].text()
-            collectionData["mesures"].append(newCollec)
+            str: Heure de la ligne suivante, format hhmmss
+        """
+        return date_add_seconds(heure, self.autoValueSec)
+
+    def reset(self, autoValueAngle: dict, autoValueSec: int) -> None:
+        """ Remet la mesure dans son état initial
+
+        Args:
+            autoValueAngle (dict): Valeur d'angle pour l'autocompletion
+            autoValueSec (int): Temps estimé entre deux mesures pour
+                                l'autocompletion
+        """
+        self.autoValueSec = autoValueSec
         if self.typeMesure == "inclinaison":
-            collectionData["est"] = self.angleEst.text()
-        collectionData["nom"] = self.nomMesure
-        return collectionData
+            self.angleEst.reset(autoValueAngle["dec"])
+            premierAngle = autoValueAngle["inc"]
+        else:
+            premierAngle = autoValueAngle["dec"]
+        for i, eLigne in enumerate(self.ligne):
+            eLigne["heure"].reset()
+            eLigne["angle"].reset(premierAngle if i == 0 else None)
+            eLigne["mesure"].reset()
 
     def validate(self) -> bool:
         """ Valide l'ensemble des cases des lignes de la mesure
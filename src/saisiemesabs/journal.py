@@ -0,0 +1,138 @@
+""" Journal de sauvegarde automatique de la saisie en cours
+
+Chaque modification d'un champ est ajoutée en fin de fichier sous la forme
+d'une ligne JSON [clé, valeur]. Les écritures sont regroupées par un QTimer
+pour ne rien coûter à la frappe, puis écrites et synchronisées sur le
+disque (fsync) par un thread dédié. Au démarrage, le journal est relu en une
+passe: la dernière valeur de chaque clé est la bonne.
+"""
+# pylint: disable= invalid-name
+
+import os
+import json
+import logging
+import pathlib
+from functools import partial
+
+from PySide6 import QtCore
+
+log = logging.getLogger(__name__)
+
+
+class Journal(QtCore.QObject):
+    """ Journal en ajout seul des champs saisis
+    """
+
+    def __init__(self, chemin: pathlib.Path, delai: int = 500) -> None:
+        """ Journal de saisie
+
+        Args:
+            chemin (pathlib.Path): Chemin du fichier journal
+            delai (int, optional): Délai de regroupement des écritures (ms).
+                                   Defaults to 500.
+        """
+        super().__init__()
+        self.chemin = pathlib.Path(chemin)
+        self.attente = []
+        # Des lignes ont été confiées au pool depuis le dernier clear
+        self.ecrit = False
+        # Un seul thread: les lignes sont écrites dans l'ordre de saisie
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delai)
+        self.timer.timeout.connect(self.flush)
+
+    def record(self, cle: str, valeur: str) -> None:
+        """ Ajoute une modification, écrite au prochain flush
+
+        Args:
+            cle (str): Identifiant du champ
+            valeur (str): Nouvelle valeur
+        """
+        self.attente.append((cle, valeur))
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self) -> None:
+        """ Confie les modifications en attente au thread d'écriture (voir
+            append_lines)
+        """
+        self.timer.stop()
+        if not self.attente:
+            return
+        lignes = "".join(json.dumps(entree, ensure_ascii=False) + "\n"
+                         for entree in self.attente)
+        self.attente.clear()
+        self.ecrit = True
+        self.pool.start(partial(append_lines, self.chemin, lignes))
+
+    def sync(self) -> None:
+        """ Écrit les modifications en attente et attend qu'elles soient sur
+            le disque (fermeture de l'application)
+        """
+        self.flush()
+        self.pool.waitForDone()
+
+    def empty(self) -> bool:
+        """ Indique si rien n'a été saisi depuis le dernier clear
+
+        Returns:
+            bool: True sans modification ni journal sur le disque
+        """
+        return not (self.attente or self.ecrit or self.chemin.exists())
+
+    def load(self) -> dict:
+        """ Relit le journal
+
+        Une dernière ligne tronquée (arrêt brutal) est ignorée.
+
+        Returns:
+            dict: Dernière valeur de chaque champ, dans l'ordre de saisie
+        """
+        valeurs = {}
+        self.pool.waitForDone()
+        try:
+            with open(self.chemin, "r", encoding='utf-8') as file:
+                for ligne in file:
+                    try:
+                        cle, valeur = json.loads(ligne)
+                    except ValueError:
+                        continue
+                    # La clé est replacée en fin pour garder l'ordre de saisie
+                    valeurs.pop(cle, None)
+                    valeurs[cle] = valeur
+        except FileNotFoundError:
+            pass
+        return valeurs
+
+    def clear(self) -> None:
+        """ Efface le journal (après enregistrement de la mesure)
+        """
+        self.timer.stop()
+        self.attente.clear()
+        # Une écriture en cours recréerait le fichier après sa suppression
+        self.pool.waitForDone()
+        self.ecrit = False
+        try:
+            self.chemin.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def append_lines(chemin: pathlib.Path, lignes: str) -> None:
+    """ Ajoute des lignes au journal et les synchronise sur le disque
+        (exécuté dans le pool du journal)
+
+    Args:
+        chemin (pathlib.Path): Chemin du fichier journal
+        lignes (str): Lignes JSON à ajouter
+    """
+    try:
+        with open(chemin, "a", encoding='utf-8') as file:
+            file.write(lignes)
+            file.flush()
+            os.fsync(file.fileno())
+    except OSError as exc:
+        log.warning("Écriture du journal %s impossible: %s", chemin, exc)
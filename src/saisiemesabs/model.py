@@ -0,0 +1,192 @@
+""" Modèle de données d'une session de mesure, indépendant de Qt
+
+Les champs de saisie écrivent leur texte dans le modèle à chaque
+modification. Validation, sérialisation au format re et réduction se font
+ensuite sur le modèle, sans aucun objet Qt.
+"""
+# pylint: disable= invalid-name
+
+import re
+
+from .refile import NOMS_SERIES, iter_lines, session_from_records
+
+heure_re = re.compile(r"^(([01]\d|2[0-3])([0-5]\d)|24:00)([0-5]\d)$")
+angle_re = re.compile(r"^(?:[0-3]*[0-9]{1,2}|400)(?:\.[0-9]{4,})$")
+mesure_re = re.compile(r"^(?:-?[0-9]+)(?:\.[0-9]{1})$")
+date_re = re.compile(r"^\d{2}\/\d{2}\/\d{2}$")
+
+
+class LigneMesure:
+    """ Ligne d'une série: heure hhmmss, angle et résidu, tels que saisis
+    """
+    __slots__ = ("heure", "angle", "mesure")
+
+    def __init__(self) -> None:
+        self.heure = ""
+        self.angle = ""
+        self.mesure = ""
+
+    def valide(self) -> bool:
+        """ Vérifie le format des trois valeurs
+
+        Returns:
+            bool: Ligne valide ou non
+        """
+        return bool(heure_re.match(self.heure)
+                    and angle_re.match(self.angle)
+                    and mesure_re.match(self.mesure))
+
+    def to_re(self) -> str:
+        """ Ligne au format re
+
+        Returns:
+            str: hh mm ss<TAB>angle<TAB>mesure
+        """
+        heure = self.heure
+        return (f"{heure[0:2]} {heure[2:4]} {heure[4:6]}\t"
+                f"{self.angle.rjust(8)}\t"
+                f"{self.mesure}\n")
+
+
+class SerieMesure:
+    """ Série de 4 lignes (déclinaison ou inclinaison)
+    """
+    __slots__ = ("nom", "typeMesure", "est", "lignes")
+
+    def __init__(self, nom: str) -> None:
+        """ Série vide
+
+        Args:
+            nom (str): Nom de la série (ex: declinaison premiere serie)
+        """
+        self.nom = nom
+        self.typeMesure = nom.split(" ", 1)[0]
+        # Est magnétique, seulement pour l'inclinaison
+        self.est = "" if self.typeMesure == "inclinaison" else None
+        self.lignes = (LigneMesure(), LigneMesure(),
+                       LigneMesure(), LigneMesure())
+
+    def valide(self) -> bool:
+        """ Vérifie les 4 lignes et l'est magnétique
+
+        Returns:
+            bool: Série valide ou non
+        """
+        if self.est is not None and not angle_re.match(self.est):
+            return False
+        return all(ligne.valide() for ligne in self.lignes)
+
+    def to_re(self) -> str:
+        """ Série au format re
+
+        Returns:
+            str: Série formatée
+        """
+        text = ""
+        if self.est:
+            text += f"est magnetique : {self.est}\n"
+        text += f"{self.nom}\n"
+        return text + "".join(ligne.to_re() for ligne in self.lignes)
+
+
+class ViseeMesure:
+    """ Visée de la cible, sonde en haut et sonde en bas
+    """
+    __slots__ = ("haut", "bas")
+
+    def __init__(self) -> None:
+        self.haut = ""
+        self.bas = ""
+
+
+class SessionMesure:
+    """ Session complète: contexte, 2 visées et 4 séries
+    """
+    __slots__ = ("station", "date", "azimuth", "visees", "series")
+
+    def __init__(self) -> None:
+        self.station = ""
+        self.date = ""  # jj/mm/aa
+        self.azimuth = ""
+        self.visees = (ViseeMesure(), ViseeMesure())
+        self.series = tuple(SerieMesure(nom) for nom in NOMS_SERIES)
+
+    def setter(self, cle: str):
+        """ Fonction d'écriture d'un champ, pour la liaison avec un widget
+
+        Args:
+            cle (str): Clé du champ, comme SaisieMesAbs.champsSaisie
+                       (station, date, azimuth, vise1.haut, mesure1.est,
+                       mesure0.2.angle, ...)
+
+        Raises:
+            KeyError: Clé inconnue
+
+        Returns:
+            Callable[[str], None]: Écrit la valeur dans le modèle
+        """
+        parties = cle.split(".")
+        try:
+            if len(parties) == 1 and parties[0] in ("station", "date",
+                                                    "azimuth"):
+                objet, attribut = self, parties[0]
+            elif parties[0].startswith("vise"):
+                objet = self.visees[int(parties[0][4:]) - 1]
+                attribut = parties[1]
+            elif len(parties) == 2:
+                objet = self.series[int(parties[0][6:])]
+                attribut = parties[1]
+            else:
+                objet = self.series[int(parties[0][6:])] \
+                    .lignes[int(parties[1])]
+                attribut = parties[2]
+        except (IndexError, ValueError):
+            raise KeyError(cle) from None
+        if attribut not in type(objet).__slots__:
+            raise KeyError(cle)
+        return lambda valeur: setattr(objet, attribut, valeur)
+
+    def valide(self) -> bool:
+        """ Vérifie l'ensemble de la session
+
+        Returns:
+            bool: Session valide ou non
+        """
+        return bool(
+            date_re.match(self.date)
+            and angle_re.match(self.azimuth)
+            and all(angle_re.match(visee.haut) and angle_re.match(visee.bas)
+                    for visee in self.visees)
+            and all(serie.valide() for serie in self.series)
+        )
+
+    def to_re(self) -> str:
+        """ Sauvegarde au format re
+
+        Returns:
+            str: Sauvegarde formatée
+        """
+        visee1, visee2 = self.visees
+        text = (
+            f'{self.station.lower()} '
+            f'{self.date.replace("/", " ")}'
+            ' Methode des residus\n'
+            'visees balise\n'
+            f' {self.azimuth}\n'
+            f'{visee1.haut} {visee1.bas}\n'
+            f'{visee2.haut} {visee2.bas}\n'
+        )
+        for serie in self.series:
+            text += f"{serie.to_re()}\n"
+        return text
+
+    def to_session(self):
+        """ Session typée (refile.Session), pour la réduction
+
+        Raises:
+            FormatReError: La session n'est pas complète
+
+        Returns:
+            Session: Session de mesure
+        """
+        return session_from_records(iter_lines(self.to_re().splitlines()))
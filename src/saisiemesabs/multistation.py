@@ -0,0 +1,305 @@
+""" Retraitement de plusieurs stations en mémoire partagée
+
+Usage:
+    python -m saisiemesabs reprocess --station paf --station ams \\
+        --years 2015-2025 -j 32
+
+Les fichiers re de toutes les stations sont lus une seule fois (en
+parallèle) puis copiés dans un bloc multiprocessing.shared_memory, un
+tableau DTYPE_SESSION trié par station puis par date. Chaque worker
+s'attache au bloc à son démarrage: une tâche ne transmet que la tranche à
+traiter (station, année, début, fin), jamais les données.
+
+Pour chaque tranche, le worker réduit les sessions (D, I et lecture de la
+cible écrites en place dans un second bloc partagé, DTYPE_RESULTAT), puis
+réécrit la série de lignes de base de la station et son année avec ses
+statistiques (voir baseline). Les tâches étant par station et par année,
+elles sont assez nombreuses pour occuper tous les coeurs.
+"""
+# pylint: disable= invalid-name
+
+import os
+import sys
+import logging
+import pathlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .batch import COLONNES, iter_batches
+from .cli import command_parser, setup_command
+from .baseline import points_from_arrays, store_path, write_series
+from .reduction import reduce, sessions_to_arrays
+from .refile import FormatReError, read_session
+
+log = logging.getLogger(__name__)
+
+DTYPE_SESSION = np.dtype([
+    ("jour", "<M8[D]"),
+    ("azimuth", "<f8"),
+    ("visees", "<f8", (2, 2)),
+    ("heures", "<i8", (4, 4)),    # secondes depuis minuit
+    ("angles", "<f8", (4, 4)),
+    ("mesures", "<f8", (4, 4)),
+])
+DTYPE_RESULTAT = np.dtype([
+    ("declinaison", "<f8", (2,)),
+    ("inclinaison", "<f8", (2,)),
+    ("mire", "<f8"),
+])
+
+# Blocs partagés vus par le worker (voir _attacher)
+_blocs = []
+_sessions = None
+_resultats = None
+
+
+def load_files(chemins: list) -> tuple:
+    """ Lit un lot de fichiers re (exécuté dans un processus fils)
+
+    Args:
+        chemins (list): Chemins des fichiers re
+
+    Returns:
+        tuple (list, list, np.ndarray, list): chemins lus, station de chaque
+                                              session, sessions
+                                              DTYPE_SESSION, messages
+                                              d'erreur
+    """
+    sessions = []
+    erreurs = []
+    for chemin in chemins:
+        try:
+            sessions.append(read_session(chemin))
+        except (FormatReError, UnicodeDecodeError, OSError) as exc:
+            erreurs.append(str(exc))
+    tableau = np.zeros(len(sessions), dtype=DTYPE_SESSION)
+    if sessions:
+        tableau["jour"] = [session.date for session in sessions]
+        (tableau["azimuth"], tableau["visees"], tableau["heures"],
+         tableau["angles"], tableau["mesures"]) = sessions_to_arrays(sessions)
+    return ([str(session.chemin) for session in sessions],
+            [session.station.lower() for session in sessions],
+            tableau, erreurs)
+
+
+def _creer(dtype: np.dtype, nombre: int) -> tuple:
+    """ Crée un bloc partagé et le tableau qui le recouvre
+    """
+    bloc = shared_memory.SharedMemory(create=True,
+                                      size=max(dtype.itemsize * nombre, 1))
+    return bloc, np.ndarray((nombre,), dtype=dtype, buffer=bloc.buf)
+
+
+def _ouvrir(nom: str, dtype: np.dtype, nombre: int) -> tuple:
+    """ S'attache à un bloc partagé créé par le processus principal
+    """
+    # Les workers partagent le resource_tracker du processus principal,
+    # seul ce dernier détruit le bloc (unlink)
+    bloc = shared_memory.SharedMemory(name=nom)
+    return bloc, np.ndarray((nombre,), dtype=dtype, buffer=bloc.buf)
+
+
+def _attacher(nomSessions: str, nomResultats: str, nombre: int) -> None:
+    """ Initialisation d'un worker: attache les deux blocs partagés
+    """
+    global _sessions, _resultats  # pylint: disable= global-statement
+    blocSessions, _sessions = _ouvrir(nomSessions, DTYPE_SESSION, nombre)
+    blocResultats, _resultats = _ouvrir(nomResultats, DTYPE_RESULTAT, nombre)
+    _blocs.extend((blocSessions, blocResultats))
+
+
+def reduce_slice(station: str, debut: int, fin: int, intensite: float,
+                 hemisphereSud: bool = True, dossier: pathlib.Path = None,
+                 variometre=None) -> tuple:
+    """ Réduit une tranche des sessions partagées et réécrit sa série de
+        lignes de base (exécuté dans un worker)
+
+    Args:
+        station (str): Station de la tranche
+        debut (int): Première session de la tranche
+        fin (int): Fin de la tranche (exclue), sessions d'une même année
+        intensite (float): Intensité totale F (nT)
+        hemisphereSud (bool, optional): Inclinaison négative.
+                                        Defaults to True.
+        dossier (pathlib.Path, optional): Dossier des séries de lignes de
+                                          base, None pour ne pas les
+                                          écrire. Defaults to None.
+        variometre (Variometre, optional): Variomètre des stations.
+                                           Defaults to None.
+
+    Returns:
+        tuple (pathlib.Path, dict): série écrite et ses statistiques
+                                    (None sans dossier)
+    """
+    sessions = _sessions[debut:fin]
+    tableaux = (sessions["azimuth"], sessions["visees"], sessions["heures"],
+                sessions["angles"], sessions["mesures"])
+    reduction = reduce(tableaux[0], tableaux[1], tableaux[3], tableaux[4],
+                       intensite, hemisphereSud)
+    resultats = _resultats[debut:fin]
+    resultats["declinaison"] = reduction.declinaison
+    resultats["inclinaison"] = reduction.inclinaison
+    resultats["mire"] = reduction.mire
+    if dossier is None:
+        return None, None
+    points = points_from_arrays([station] * (fin - debut), sessions["jour"],
+                                tableaux, intensite, hemisphereSud,
+                                variometre, reduction)
+    annee = sessions["jour"][:1].astype("datetime64[Y]").astype(int)[0]
+    chemin = store_path(dossier, station, 1970 + int(annee))
+    return chemin, write_series(chemin, points)
+
+
+def share_sessions(lots) -> tuple:
+    """ Rassemble les lots lus par load_files dans un bloc partagé, trié par
+        station puis par date et heure
+
+    Args:
+        lots (Iterable[tuple]): Résultats de load_files
+
+    Returns:
+        tuple (SharedMemory, np.ndarray, list, list): bloc, sessions
+                                                      DTYPE_SESSION, chemins
+                                                      et stations dans le
+                                                      même ordre
+    """
+    chemins = []
+    stations = []
+    tableaux = []
+    for cheminsLot, stationsLot, tableau, _ in lots:
+        chemins.extend(cheminsLot)
+        stations.extend(stationsLot)
+        tableaux.append(tableau)
+    tableau = (np.concatenate(tableaux) if tableaux
+               else np.zeros(0, dtype=DTYPE_SESSION))
+    ordre = np.lexsort((tableau["heures"][:, 0, 0], tableau["jour"],
+                        np.asarray(stations, dtype=str)))
+    bloc, sessions = _creer(DTYPE_SESSION, len(tableau))
+    sessions[:] = tableau[ordre]
+    return (bloc, sessions, [chemins[i] for i in ordre],
+            [stations[i] for i in ordre])
+
+
+def slices(stations: list, sessions: np.ndarray):
+    """ Découpe les sessions triées en tranches d'une station et d'une année
+
+    Args:
+        stations (list): Station de chaque session
+        sessions (np.ndarray): Sessions DTYPE_SESSION triées (share_sessions)
+
+    Yields:
+        tuple (str, int, int): station, début, fin
+    """
+    annees = sessions["jour"].astype("datetime64[Y]")
+    debut = 0
+    for i in range(1, len(stations) + 1):
+        if (i == len(stations) or stations[i] != stations[debut]
+                or annees[i] != annees[debut]):
+            yield stations[debut], debut, i
+            debut = i
+
+
+def write_results(output, chemins: list, stations: list,
+                  sessions: np.ndarray, resultats: np.ndarray) -> None:
+    """ Écrit les résultats au format de la commande 'reduce'
+
+    Args:
+        output (TextIO): Fichier de sortie
+        chemins (list): Fichier re de chaque session
+        stations (list): Station de chaque session
+        sessions (np.ndarray): Sessions DTYPE_SESSION
+        resultats (np.ndarray): Résultats DTYPE_RESULTAT
+    """
+    output.write("\t".join(COLONNES) + "\n")
+    heures = sessions["heures"][:, 0, 0].tolist()
+    jours = sessions["jour"].astype(str).tolist()
+    angles = np.column_stack((
+        resultats["declinaison"][:, 0], resultats["inclinaison"][:, 0],
+        resultats["declinaison"][:, 1], resultats["inclinaison"][:, 1],
+        resultats["mire"])).tolist()
+    for chemin, station, jour, heure, valeurs in zip(chemins, stations, jours,
+                                                     heures, angles):
+        output.write("\t".join((
+            chemin, station, jour,
+            f"{heure // 3600:02d}:{heure // 60 % 60:02d}:{heure % 60:02d}",
+            *("%.4f" % angle for angle in valeurs),
+        )) + "\n")
+
+
+def main_reprocess(argv: list = None) -> None:
+    """ Point d'entrée de la commande 'reprocess'
+
+    Args:
+        argv (list, optional): Arguments. Defaults to sys.argv[2:].
+    """
+    parser = argparse.ArgumentParser(
+        prog="saisiemesabs reprocess", parents=[command_parser()],
+        description="Réduit les archives de plusieurs stations et reconstruit "
+        "leurs lignes de base, données en mémoire partagée")
+    parser.add_argument("--intensite", type=float,
+                        help="Intensité totale F en nT (par défaut: celle de "
+                        "la configuration)")
+    parser.add_argument("--no-baseline", action="store_true",
+                        help="Ne réécrit pas les séries de lignes de base")
+    parser.add_argument("-o", "--output", default="-",
+                        help="Fichier de sortie (par défaut: sortie standard)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="Nombre de processus (par défaut: nombre de "
+                        "coeurs)")
+    args, conf, dataDir = setup_command(parser, argv)
+    # pylint: disable= import-outside-toplevel
+    from .variometre import Variometre
+    stations = args.station or [conf["Station"]]
+    intensite = args.intensite or conf["Intensite"]
+    dossier = None if args.no_baseline else dataDir / "lignes_de_base"
+    variometre = None
+    if conf["Chemin_Vario"] and dossier is not None:
+        variometre = Variometre(conf["Chemin_Vario"],
+                                dataDir / "cache" / "variometre")
+
+    # Lecture des archives, une seule fois
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        lots = list(pool.map(load_files,
+                             iter_batches(conf["Chemin_Sauvegarde"],
+                                          stations, args.years)))
+    nbErreurs = 0
+    for _, _, _, erreurs in lots:
+        for erreur in erreurs:
+            log.warning("Fichier ignoré: %s", erreur)
+        nbErreurs += len(erreurs)
+    blocSessions, sessions, chemins, stationsSessions = share_sessions(lots)
+    del lots
+    blocResultats, resultats = _creer(DTYPE_RESULTAT, len(sessions))
+    log.info("%d sessions en mémoire partagée (%d octets)", len(sessions),
+             sessions.nbytes)
+
+    output = (sys.stdout if args.output == "-"
+              else open(args.output, "w", encoding="utf-8"))
+    try:
+        with ProcessPoolExecutor(
+                max_workers=args.jobs, initializer=_attacher,
+                initargs=(blocSessions.name, blocResultats.name,
+                          len(sessions))) as pool:
+            taches = [
+                pool.submit(reduce_slice, station, debut, fin, intensite,
+                            not args.nord, dossier, variometre)
+                for station, debut, fin in slices(stationsSessions, sessions)
+            ]
+            for tache in as_completed(taches):
+                chemin, stats = tache.result()
+                if chemin is not None:
+                    log.info("%s: %d points", chemin, stats["points"])
+        write_results(output, chemins, stationsSessions, sessions,
+                      resultats)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        del sessions, resultats
+        for bloc in (blocSessions, blocResultats):
+            bloc.close()
+            bloc.unlink()
+    log.info("%d sessions réduites, %d fichiers ignorés",
+             len(chemins), nbErreurs)
@@ -0,0 +1,144 @@
+""" Angles et résidus en virgule fixe
+
+Les angles sont des entiers en dix-millièmes de grade (233.1880 -> 2331880)
+et les résidus des entiers en dixièmes de nT (-3.4 -> -34). Les textes
+saisis sont convertis sans passer par float, les calculs d'autocomplétion
+(+200 mod 400, 400 - a) sont exacts et le texte n'est reformaté qu'à
+l'affichage et à l'écriture du fichier re.
+
+Les fonctions arithmétiques n'utilisent que +, - et %: elles s'appliquent
+aussi bien à un entier qu'à un tableau NumPy d'entiers.
+"""
+# pylint: disable= invalid-name
+
+import re
+
+# Dix-millièmes de grade par grade
+ANGLE_ECHELLE = 10000
+ANGLE_DECIMALES = 4
+# Un tour complet (400 grades)
+TOUR = 400 * ANGLE_ECHELLE
+# Dixièmes de nT par nT
+MESURE_ECHELLE = 10
+MESURE_DECIMALES = 1
+
+nombre_re = re.compile(r"^\s*([+-]?)(\d*)(?:\.(\d*))?\s*$")
+
+
+def parse_fixed(text: str, decimales: int) -> int:
+    """ Convertit un nombre décimal en entier, sans passer par float
+        (arrondi au plus proche, moitié loin de zéro)
+
+    Args:
+        text (str): Nombre (ex: 233.1880, -3.4, 233.)
+        decimales (int): Nombre de décimales conservées
+
+    Raises:
+        ValueError: Ce n'est pas un nombre
+
+    Returns:
+        int: Nombre multiplié par 10**decimales
+    """
+    match = nombre_re.match(text)
+    if not match or not (match.group(2) or match.group(3)):
+        raise ValueError(f"nombre attendu: {text!r}")
+    signe, entier, fraction = match.group(1), match.group(2), match.group(3)
+    fraction = (fraction or "").ljust(decimales + 1, "0")
+    valeur = int((entier or "0") + fraction[:decimales])
+    if fraction[decimales] >= "5":
+        valeur += 1
+    return -valeur if signe == "-" else valeur
+
+
+def format_fixed(valeur: int, decimales: int) -> str:
+    """ Texte d'un entier en virgule fixe
+
+    Args:
+        valeur (int): Nombre multiplié par 10**decimales
+        decimales (int): Nombre de décimales
+
+    Returns:
+        str: Nombre avec exactement decimales décimales (ex: 233.1880)
+    """
+    signe = "-" if valeur < 0 else ""
+    entier, fraction = divmod(abs(int(valeur)), 10 ** decimales)
+    return f"{signe}{entier}.{fraction:0{decimales}d}"
+
+
+def parse_angle(text: str) -> int:
+    """ Angle saisi en dix-millièmes de grade
+
+    Args:
+        text (str): Angle en grades (ex: 233.1880)
+
+    Raises:
+        ValueError: Ce n'est pas un nombre
+
+    Returns:
+        int: Angle (ex: 2331880)
+    """
+    return parse_fixed(text, ANGLE_DECIMALES)
+
+
+def format_angle(angle: int) -> str:
+    """ Texte d'un angle, 4 décimales
+
+    Args:
+        angle (int): Angle en dix-millièmes de grade
+
+    Returns:
+        str: Angle en grades (ex: 233.1880)
+    """
+    return format_fixed(angle, ANGLE_DECIMALES)
+
+
+def parse_mesure(text: str) -> int:
+    """ Résidu saisi en dixièmes de nT
+
+    Args:
+        text (str): Résidu en nT (ex: -3.4)
+
+    Raises:
+        ValueError: Ce n'est pas un nombre
+
+    Returns:
+        int: Résidu (ex: -34)
+    """
+    return parse_fixed(text, MESURE_DECIMALES)
+
+
+def format_mesure(mesure: int) -> str:
+    """ Texte d'un résidu, 1 décimale
+
+    Args:
+        mesure (int): Résidu en dixièmes de nT
+
+    Returns:
+        str: Résidu en nT (ex: -3.4)
+    """
+    return format_fixed(mesure, MESURE_DECIMALES)
+
+
+def angle_shift(angle, decalage: int):
+    """ Décale un angle, modulo 400 grades
+
+    Args:
+        angle (int | np.ndarray): Angle en dix-millièmes de grade
+        decalage (int): Décalage en dix-millièmes de grade
+
+    Returns:
+        int | np.ndarray: Angle dans [0, TOUR[
+    """
+    return (angle + decalage) % TOUR
+
+
+def angle_mirror(angle):
+    """ Angle miroir (400 - angle), modulo 400 grades
+
+    Args:
+        angle (int | np.ndarray): Angle en dix-millièmes de grade
+
+    Returns:
+        int | np.ndarray: Angle dans [0, TOUR[
+    """
+    return (TOUR - angle) % TOUR
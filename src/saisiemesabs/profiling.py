@@ -0,0 +1,118 @@
+""" Mesure du temps de démarrage de l'application
+
+Les étapes du démarrage sont toujours chronométrées (deux appels à
+time.perf_counter par étape). Le rapport JSON n'est écrit que si
+l'application est lancée avec --profile-startup.
+"""
+# pylint: disable= invalid-name
+
+import os
+import json
+import time
+import pathlib
+from contextlib import contextmanager
+from typing import Optional
+
+# Correspondance entre l'horloge monotone et l'heure système
+_origineEpoch = time.time()
+_originePerf = time.perf_counter()
+
+# Étapes chronométrées: [nom, début, fin] en secondes (perf_counter)
+ETAPES = []
+
+
+def process_start_time() -> Optional[float]:
+    """ Heure de lancement de l'interpréteur (epoch), lue dans /proc
+
+    Returns:
+        float: Heure de lancement, None si inconnue
+    """
+    try:
+        with open("/proc/self/stat", "r", encoding='utf-8') as file:
+            # Le nom du processus peut contenir des espaces
+            champs = file.read().rsplit(")", 1)[1].split()
+        with open("/proc/stat", "r", encoding='utf-8') as file:
+            boot = next(int(ligne.split()[1]) for ligne in file
+                        if ligne.startswith("btime"))
+        return boot + int(champs[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError, StopIteration):
+        return None
+
+
+def to_epoch(instant: float) -> float:
+    """ Convertit un instant perf_counter en heure système
+
+    Args:
+        instant (float): Instant time.perf_counter()
+
+    Returns:
+        float: Heure système (epoch)
+    """
+    return _origineEpoch + instant - _originePerf
+
+
+@contextmanager
+def etape(nom: str):
+    """ Chronomètre un bloc de code
+
+    Args:
+        nom (str): Nom de l'étape
+    """
+    mesure = [nom, time.perf_counter(), None]
+    ETAPES.append(mesure)
+    try:
+        yield
+    finally:
+        mesure[2] = time.perf_counter()
+
+
+def mark(nom: str) -> None:
+    """ Note un instant (étape de durée nulle)
+
+    Args:
+        nom (str): Nom de l'instant
+    """
+    instant = time.perf_counter()
+    ETAPES.append([nom, instant, instant])
+
+
+def report() -> dict:
+    """ Rapport des étapes, en secondes depuis le lancement du processus
+
+    Returns:
+        dict: Rapport sérialisable en JSON
+    """
+    debut = process_start_time()
+    lancementConnu = debut is not None
+    if not lancementConnu:
+        # À défaut, origine au chargement de ce module
+        debut = _origineEpoch
+    return {
+        "lancement": debut,
+        "lancement_connu": lancementConnu,
+        "etapes": [
+            {
+                "nom": nom,
+                "debut": round(to_epoch(instantDebut) - debut, 6),
+                "fin": (round(to_epoch(instantFin) - debut, 6)
+                        if instantFin is not None else None),
+                "duree": (round(instantFin - instantDebut, 6)
+                          if instantFin is not None else None),
+            }
+            for nom, instantDebut, instantFin in ETAPES
+        ],
+    }
+
+
+def write_report(chemin: pathlib.Path) -> None:
+    """ Écrit le rapport au format JSON
+
+    Args:
+        chemin (pathlib.Path): Fichier de sortie ('-' pour stdout)
+    """
+    texte = json.dumps(report(), indent=2, ensure_ascii=False)
+    if str(chemin) == "-":
+        print(texte)
+        return
+    with open(chemin, "w", encoding='utf-8') as file:
+        file.write(texte + "\n")
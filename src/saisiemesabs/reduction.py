@@ -0,0 +1,219 @@
+""" Réduction des mesures absolues par la méthode des résidus
+
+Tous les angles sont en grades, les résidus et l'intensité en nT.
+Les calculs sont faits sur des tableaux NumPy de N sessions à la fois:
+
+    azimuth  (N,)         azimuth repère
+    visees   (N, 2, 2)    [visée][haut, bas]
+    angles   (N, 4, 4)    [série][ligne], séries dans l'ordre NOMS_SERIES
+    mesures  (N, 4, 4)    résidus correspondants
+
+Convention des positions (ordre de saisie des lignes d'une série):
+    - déclinaison: lignes 1-2 lunette vers l'est magnétique, sonde en haut
+      puis en bas, lignes 3-4 même chose lunette retournée (+200 gr)
+    - inclinaison: lignes 1-2 sonde vers le nord puis le sud, lignes 3-4
+      même chose cercle vertical retourné
+"""
+# pylint: disable= invalid-name
+
+from typing import NamedTuple
+
+import numpy as np
+
+# Signe de la correction de résidu pour chaque ligne d'une série
+SIGNES_DECLINAISON = np.array([1.0, 1.0, -1.0, -1.0])
+SIGNES_INCLINAISON = np.array([1.0, -1.0, 1.0, -1.0])
+# Signe de la sonde (haut/bas) pour l'estimation du défaut d'alignement
+SIGNES_SONDE = np.array([1.0, -1.0, -1.0, 1.0])
+
+GRADES_PAR_RADIAN = 200.0 / np.pi
+
+
+class Reduction(NamedTuple):
+    """ Résultat de la réduction de N sessions
+    """
+    declinaison: np.ndarray   # (N, 2) une valeur par paire de séries
+    inclinaison: np.ndarray   # (N, 2)
+    mire: np.ndarray          # (N,) lecture moyenne de la cible
+    offset: np.ndarray        # (N, 4) offset de la sonde par série (nT)
+    alignement: np.ndarray    # (N, 4) défaut d'alignement par série (nT)
+
+
+def wrap(angle):
+    """ Ramène un angle dans [-200, 200[
+
+    Args:
+        angle (np.ndarray): Angle en grades
+
+    Returns:
+        np.ndarray: Angle en grades
+    """
+    return (np.asarray(angle) + 200.0) % 400.0 - 200.0
+
+
+def mean_angle(angles, axis: int = -1):
+    """ Moyenne d'angles proches, sans saut à 0/400
+
+    Args:
+        angles (np.ndarray): Angles en grades
+        axis (int, optional): Axe de la moyenne. Defaults to -1.
+
+    Returns:
+        np.ndarray: Moyenne dans [0, 400[
+    """
+    angles = np.asarray(angles, dtype=float)
+    reference = np.take(angles, [0], axis=axis)
+    ecart = wrap(angles - reference).mean(axis=axis)
+    return (np.squeeze(reference, axis=axis) + ecart) % 400.0
+
+
+def lecture_mire(visees):
+    """ Lecture moyenne de la cible à partir des visées haut/bas
+
+    Args:
+        visees (np.ndarray): (N, 2, 2) angles [visée][haut, bas]
+
+    Returns:
+        np.ndarray: (N,) lecture de la cible
+    """
+    visees = np.asarray(visees, dtype=float)
+    # La visée sonde en bas est décalée de 200 grades
+    redressees = visees.copy()
+    redressees[..., 1] = (redressees[..., 1] + 200.0) % 400.0
+    return mean_angle(redressees.reshape(visees.shape[:-2] + (4,)))
+
+
+def _correction(residus, champ, signes):
+    """ Correction angulaire (grades) due aux résidus
+    """
+    rapport = np.clip(residus / champ, -1.0, 1.0)
+    return (signes * np.arcsin(rapport) * GRADES_PAR_RADIAN).mean(axis=-1)
+
+
+def reduce_inclinaison(angles, mesures, intensite,
+                       hemisphereSud: bool = True):
+    """ Inclinaison d'un lot de séries d'inclinaison
+
+    Args:
+        angles (np.ndarray): (..., 4) angles du cercle vertical
+        mesures (np.ndarray): (..., 4) résidus
+        intensite (float | np.ndarray): Intensité totale F (nT)
+        hemisphereSud (bool, optional): Inclinaison négative.
+                                        Defaults to True.
+
+    Returns:
+        np.ndarray: (...) inclinaison en grades
+    """
+    angles = np.asarray(angles, dtype=float)
+    # Angle entre la sonde et l'horizontale, ramené dans [0, 100]
+    replie = angles % 200.0
+    replie = np.where(replie > 100.0, 200.0 - replie, replie)
+    correction = _correction(np.asarray(mesures, dtype=float),
+                             np.asarray(intensite, dtype=float)[..., None],
+                             SIGNES_INCLINAISON)
+    inclinaison = replie.mean(axis=-1) + correction
+    return -inclinaison if hemisphereSud else inclinaison
+
+
+def reduce_declinaison(angles, mesures, horizontale, mire, azimuth):
+    """ Déclinaison d'un lot de séries de déclinaison
+
+    Args:
+        angles (np.ndarray): (..., 4) angles du cercle horizontal
+        mesures (np.ndarray): (..., 4) résidus
+        horizontale (float | np.ndarray): Composante horizontale H (nT)
+        mire (np.ndarray): (...) lecture de la cible
+        azimuth (np.ndarray): (...) azimuth repère
+
+    Returns:
+        np.ndarray: (...) déclinaison dans [-200, 200[
+    """
+    angles = np.asarray(angles, dtype=float)
+    # Les lignes 3-4 sont lunette retournée
+    redressees = angles.copy()
+    redressees[..., 2:] = (redressees[..., 2:] + 200.0) % 400.0
+    est = mean_angle(redressees)
+    correction = _correction(np.asarray(mesures, dtype=float),
+                             np.asarray(horizontale, dtype=float)[..., None],
+                             SIGNES_DECLINAISON)
+    nord = est - correction - 100.0
+    return wrap(nord - mire + azimuth)
+
+
+def reduce(azimuth, visees, angles, mesures, intensite,
+           hemisphereSud: bool = True) -> Reduction:
+    """ Réduit N sessions en un seul appel
+
+    Args:
+        azimuth (np.ndarray): (N,) azimuth repère
+        visees (np.ndarray): (N, 2, 2) visées de la cible
+        angles (np.ndarray): (N, 4, 4) angles des 4 séries
+        mesures (np.ndarray): (N, 4, 4) résidus des 4 séries
+        intensite (float | np.ndarray): Intensité totale F (nT), scalaire ou
+                                        (N,)
+        hemisphereSud (bool, optional): Inclinaison négative.
+                                        Defaults to True.
+
+    Returns:
+        Reduction: D et I de chaque paire de séries, offsets et alignements
+    """
+    angles = np.asarray(angles, dtype=float)
+    mesures = np.asarray(mesures, dtype=float)
+    azimuth = np.asarray(azimuth, dtype=float)
+    intensite = np.broadcast_to(np.asarray(intensite, dtype=float),
+                                azimuth.shape)
+    mire = lecture_mire(visees)
+    # Séries 1 et 3: déclinaison, séries 2 et 4: inclinaison
+    inclinaison = reduce_inclinaison(angles[:, 1::2], mesures[:, 1::2],
+                                     intensite[:, None], hemisphereSud)
+    horizontale = intensite[:, None] * np.cos(inclinaison / GRADES_PAR_RADIAN)
+    declinaison = reduce_declinaison(angles[:, 0::2], mesures[:, 0::2],
+                                     horizontale, mire[:, None],
+                                     azimuth[:, None])
+    return Reduction(
+        declinaison,
+        inclinaison,
+        mire,
+        mesures.mean(axis=-1),
+        (mesures * SIGNES_SONDE).mean(axis=-1),
+    )
+
+
+def sessions_to_arrays(sessions) -> tuple:
+    """ Empile des sessions (refile.Session) en tableaux pour reduce
+
+    Args:
+        sessions (Iterable[Session]): Sessions de mesure
+
+    Returns:
+        tuple (np.ndarray, ...): azimuth, visees, heures, angles, mesures
+    """
+    sessions = list(sessions)
+    n = len(sessions)
+    azimuth = np.empty(n)
+    visees = np.empty((n, 2, 2))
+    lignes = np.empty((n, 16, 3))
+    for i, session in enumerate(sessions):
+        azimuth[i] = session.azimuth
+        visees[i] = [(v.haut, v.bas) for v in session.visees]
+        lignes[i] = [(l.heure, l.angle, l.mesure) for l in session.lignes]
+    lignes = lignes.reshape(n, 4, 4, 3)
+    return (azimuth, visees, lignes[..., 0].astype(np.int64),
+            lignes[..., 1], lignes[..., 2])
+
+
+def reduce_sessions(sessions, intensite,
+                    hemisphereSud: bool = True) -> Reduction:
+    """ Réduit un lot de sessions lues par refile
+
+    Args:
+        sessions (Iterable[Session]): Sessions de mesure
+        intensite (float | np.ndarray): Intensité totale F (nT)
+        hemisphereSud (bool, optional): Inclinaison négative.
+                                        Defaults to True.
+
+    Returns:
+        Reduction: Résultat de la réduction
+    """
+    azimuth, visees, _, angles, mesures = sessions_to_arrays(sessions)
+    return reduce(azimuth, visees, angles, mesures, intensite, hemisphereSud)
@@ -0,0 +1,338 @@
+""" Lecture en flux des fichiers de mesure au format re
+
+Le format re est celui écrit par SaisieMesAbs.formatSaveData:
+
+    paf 19 07 22 Methode des residus
+    visees balise
+     52.35840
+    247.7550 47.7550
+    247.7550 47.7550
+
+    declinaison premiere serie
+    13 06 40	233.1880	0.0
+    ...
+    est magnetique : 233.1880
+    inclinaison premiere serie
+    ...
+
+Les fichiers sont lus ligne par ligne et transformés en enregistrements
+typés, sans jamais charger un fichier ou un dossier entier en mémoire.
+"""
+# pylint: disable= invalid-name
+
+import os
+import re
+import pathlib
+from datetime import date, datetime
+from typing import Iterator, NamedTuple, Optional, Union
+
+# Noms des 4 séries, dans l'ordre d'écriture
+NOMS_SERIES = (
+    "declinaison premiere serie",
+    "inclinaison premiere serie",
+    "declinaison deuxieme serie",
+    "inclinaison deuxieme serie",
+)
+
+# Nom des fichiers re: reMMDDhhYY.station
+nom_fichier_re = re.compile(r"^re\d{8}\.\w+$")
+entete_re = re.compile(r"^(\w+) (\d{2} \d{2} \d{2}) (.*)$")
+est_re = re.compile(r"^est magnetique : *(\S+)$")
+ligne_re = re.compile(r"^(\d{2}) (\d{2}) (\d{2})\s+(\S+)\s+(\S+)$")
+
+
+class FormatReError(ValueError):
+    """ Le fichier re est mal formé
+    """
+
+    def __init__(self, chemin, numLigne: int, message: str) -> None:
+        super().__init__(f"{chemin}:{numLigne}: {message}")
+        self.chemin = chemin
+        self.numLigne = numLigne
+        self.message = message
+
+    def __reduce__(self):
+        # Permet le transfert de l'erreur entre processus
+        return (type(self), (self.chemin, self.numLigne, self.message))
+
+
+class Entete(NamedTuple):
+    """ Première ligne du fichier
+    """
+    station: str
+    date: date
+    methode: str
+
+
+class AzimuthRepere(NamedTuple):
+    """ Azimuth de la cible (grades)
+    """
+    angle: float
+
+
+class Visee(NamedTuple):
+    """ Visée de la cible, sonde en haut et sonde en bas (grades)
+    """
+    numero: int
+    haut: float
+    bas: float
+
+
+class Serie(NamedTuple):
+    """ Début d'une série de 4 lignes de mesure
+    """
+    numero: int
+    nom: str
+    typeMesure: str
+    est: Optional[float]
+
+
+class Ligne(NamedTuple):
+    """ Ligne de mesure d'une série
+    """
+    serie: int
+    index: int
+    heure: int  # secondes depuis minuit
+    angle: float
+    mesure: float
+
+
+class Session(NamedTuple):
+    """ Fichier re complet
+    """
+    chemin: Optional[pathlib.Path]
+    station: str
+    date: date
+    azimuth: float
+    visees: tuple
+    series: tuple
+    lignes: tuple
+
+
+Record = Union[Entete, AzimuthRepere, Visee, Serie, Ligne]
+
+
+def _to_float(chemin, numLigne: int, text: str) -> float:
+    try:
+        return float(text)
+    except ValueError:
+        raise FormatReError(chemin, numLigne,
+                            f"valeur numérique attendue: {text!r}") from None
+
+
+def iter_lines(lines, chemin=None) -> Iterator[Record]:
+    """ Transforme des lignes au format re en enregistrements typés
+
+    Args:
+        lines (Iterable[str]): Lignes du fichier (avec ou sans '\\n')
+        chemin (optional): Chemin du fichier, pour les messages d'erreur
+
+    Raises:
+        FormatReError: Le contenu n'est pas au format re
+
+    Yields:
+        Record: Entete, AzimuthRepere, Visee, Serie puis Ligne
+    """
+    etape = 0  # 0 entete, 1 balise, 2 azimuth, 3-4 visées, 5 séries
+    estEnAttente = None
+    numSerie = -1
+    indexLigne = 4
+    numLigne = 0
+    for numLigne, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if etape == 0:
+            match = entete_re.match(line)
+            if not match:
+                raise FormatReError(chemin, numLigne, "entête invalide")
+            try:
+                dateMes = datetime.strptime(match[2], "%d %m %y").date()
+            except ValueError:
+                raise FormatReError(chemin, numLigne,
+                                    f"date invalide: {match[2]!r}") from None
+            yield Entete(match[1], dateMes, match[3])
+        elif etape == 1:
+            if line != "visees balise":
+                raise FormatReError(chemin, numLigne,
+                                    "'visees balise' attendu")
+        elif etape == 2:
+            yield AzimuthRepere(_to_float(chemin, numLigne, line))
+        elif etape in (3, 4):
+            angles = line.split()
+            if len(angles) != 2:
+                raise FormatReError(chemin, numLigne,
+                                    "deux angles de visée attendus")
+            yield Visee(etape - 2,
+                        _to_float(chemin, numLigne, angles[0]),
+                        _to_float(chemin, numLigne, angles[1]))
+        elif line in NOMS_SERIES:
+            if indexLigne != 4:
+                raise FormatReError(chemin, numLigne,
+                                    "série précédente incomplète")
+            numSerie += 1
+            indexLigne = 0
+            yield Serie(numSerie, line, line.split(" ", 1)[0], estEnAttente)
+            estEnAttente = None
+        elif line.startswith("est magnetique"):
+            match = est_re.match(line)
+            if not match:
+                raise FormatReError(chemin, numLigne,
+                                    "est magnétique invalide")
+            estEnAttente = _to_float(chemin, numLigne, match[1])
+        else:
+            match = ligne_re.match(line)
+            if not match or indexLigne >= 4:
+                raise FormatReError(chemin, numLigne,
+                                    f"ligne inattendue: {line!r}")
+            yield Ligne(
+                numSerie, indexLigne,
+                int(match[1]) * 3600 + int(match[2]) * 60 + int(match[3]),
+                _to_float(chemin, numLigne, match[4]),
+                _to_float(chemin, numLigne, match[5]),
+            )
+            indexLigne += 1
+        etape = min(etape + 1, 5)
+    if etape < 5:
+        raise FormatReError(chemin, numLigne, "fichier tronqué")
+
+
+def iter_records(chemin: pathlib.Path) -> Iterator[Record]:
+    """ Lit un fichier re en flux
+
+    Args:
+        chemin (pathlib.Path): Chemin du fichier re
+
+    Yields:
+        Record: Enregistrements du fichier, dans l'ordre
+    """
+    with open(chemin, "r", encoding="utf-8") as file:
+        yield from iter_lines(file, chemin)
+
+
+def session_from_records(records, chemin=None) -> Session:
+    """ Assemble les enregistrements d'un fichier en une session
+
+    Args:
+        records (Iterable[Record]): Enregistrements produits par iter_lines
+        chemin (optional): Chemin du fichier d'origine
+
+    Raises:
+        FormatReError: La session ne contient pas 4 séries de 4 lignes
+
+    Returns:
+        Session: Session de mesure
+    """
+    entete = None
+    azimuth = None
+    visees = []
+    series = []
+    lignes = []
+    for record in records:
+        if isinstance(record, Ligne):
+            lignes.append(record)
+        elif isinstance(record, Serie):
+            series.append(record)
+        elif isinstance(record, Visee):
+            visees.append(record)
+        elif isinstance(record, AzimuthRepere):
+            azimuth = record.angle
+        else:
+            entete = record
+    if len(series) != 4 or len(lignes) != 16:
+        raise FormatReError(chemin, 0, "4 séries de 4 lignes attendues")
+    return Session(chemin, entete.station, entete.date, azimuth,
+                   tuple(visees), tuple(series), tuple(lignes))
+
+
+def read_session(chemin: pathlib.Path) -> Session:
+    """ Lit un fichier re complet
+
+    Args:
+        chemin (pathlib.Path): Chemin du fichier re
+
+    Returns:
+        Session: Session de mesure
+    """
+    return session_from_records(iter_records(chemin), chemin)
+
+
+def expand_path_re(modele: str, station: str, annee) -> pathlib.Path:
+    """ Remplace $STATION et $YY dans le chemin PATH_RE de la configuration
+
+    Args:
+        modele (str): Chemin PATH_RE
+        station (str): Nom de la station
+        annee (int | str): Année sur 4 chiffres ou 2 derniers chiffres (yy)
+
+    Returns:
+        pathlib.Path: Dossier des mesures de la station pour l'année
+    """
+    if isinstance(annee, int):
+        annee = f"{annee % 100:02d}"
+    return pathlib.Path(
+        modele
+        .replace("$YY", annee)
+        .replace("$STATION", station.lower())
+    )
+
+
+def file_year(chemin: pathlib.Path) -> int:
+    """ Année d'un fichier reMMDDhhYY.station d'après son nom, sans le lire
+
+    Args:
+        chemin (pathlib.Path): Fichier re
+
+    Returns:
+        int: Année sur 4 chiffres
+    """
+    return 2000 + int(pathlib.Path(chemin).name[8:10])
+
+
+def iter_archive(racine: pathlib.Path) -> Iterator[pathlib.Path]:
+    """ Parcourt récursivement une archive à la recherche des fichiers re
+
+    Utilise os.scandir pour ne pas faire de stat inutile, les dossiers sont
+    parcourus dans l'ordre alphabétique.
+
+    Args:
+        racine (pathlib.Path): Dossier racine de l'archive
+
+    Yields:
+        pathlib.Path: Chemin de chaque fichier reMMDDhhYY.station
+    """
+    pile = [os.fspath(racine)]
+    while pile:
+        dossier = pile.pop()
+        try:
+            with os.scandir(dossier) as entries:
+                entries = sorted(entries, key=lambda e: e.name)
+        except (FileNotFoundError, PermissionError, NotADirectoryError):
+            continue
+        sousDossiers = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                sousDossiers.append(entry.path)
+            elif nom_fichier_re.match(entry.name):
+                yield pathlib.Path(entry.path)
+        pile.extend(reversed(sousDossiers))
+
+
+def iter_sessions(racine: pathlib.Path,
+                  ignoreErrors: bool = True) -> Iterator[Session]:
+    """ Lit toutes les sessions d'une archive, une à une
+
+    Args:
+        racine (pathlib.Path): Dossier racine de l'archive
+        ignoreErrors (bool, optional): Ignore les fichiers mal formés.
+                                       Defaults to True.
+
+    Yields:
+        Session: Session de chaque fichier re
+    """
+    for chemin in iter_archive(racine):
+        try:
+            yield read_session(chemin)
+        except (FormatReError, UnicodeDecodeError):
+            if not ignoreErrors:
+                raise
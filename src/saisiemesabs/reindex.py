@@ -0,0 +1,301 @@
+""" Index SQLite persistant des archives de fichiers re
+
+Chaque fichier est repéré par son chemin, sa date de modification et sa
+taille: une mise à jour ne relit que les fichiers ajoutés ou modifiés
+depuis la dernière indexation.
+
+L'index par défaut (voir index_path) est construit par la commande 'index'
+puis tenu à jour par l'application à chaque enregistrement.
+"""
+# pylint: disable= invalid-name
+
+import os
+import logging
+import pathlib
+import sqlite3
+import argparse
+from datetime import date
+from typing import Iterator, Optional
+
+from .cli import command_parser, setup_command
+from .refile import (
+    FormatReError,
+    Ligne,
+    Serie,
+    Session,
+    Visee,
+    expand_path_re,
+    iter_archive,
+    read_session,
+)
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fichiers (
+    id       INTEGER PRIMARY KEY,
+    chemin   TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    taille   INTEGER NOT NULL,
+    station  TEXT,
+    date     TEXT,
+    annee    INTEGER,
+    azimuth  REAL,
+    v1_haut  REAL,
+    v1_bas   REAL,
+    v2_haut  REAL,
+    v2_bas   REAL,
+    erreur   TEXT
+);
+CREATE INDEX IF NOT EXISTS fichiers_station_annee
+    ON fichiers (station, annee);
+CREATE TABLE IF NOT EXISTS series (
+    fichier INTEGER NOT NULL REFERENCES fichiers (id) ON DELETE CASCADE,
+    numero  INTEGER NOT NULL,
+    nom     TEXT NOT NULL,
+    est     REAL,
+    PRIMARY KEY (fichier, numero)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS lignes (
+    fichier INTEGER NOT NULL REFERENCES fichiers (id) ON DELETE CASCADE,
+    serie   INTEGER NOT NULL,
+    idx     INTEGER NOT NULL,
+    heure   INTEGER NOT NULL,
+    angle   REAL NOT NULL,
+    mesure  REAL NOT NULL,
+    PRIMARY KEY (fichier, serie, idx)
+) WITHOUT ROWID;
+"""
+
+
+class ArchiveIndex:
+    """ Index des fichiers re d'une ou plusieurs archives
+    """
+
+    def __init__(self, chemin: pathlib.Path) -> None:
+        """ Ouvre (ou crée) l'index
+
+        Args:
+            chemin (pathlib.Path): Chemin de la base SQLite
+        """
+        self.chemin = chemin
+        self.connexion = sqlite3.connect(os.fspath(chemin))
+        self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.execute("PRAGMA synchronous=NORMAL")
+        self.connexion.execute("PRAGMA foreign_keys=ON")
+        self.connexion.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """ Ferme la base
+        """
+        self.connexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _store(self, chemin: str, stat: os.stat_result) -> None:
+        """ Relit un fichier et remplace son entrée dans l'index
+
+        Raises:
+            OSError: Fichier illisible, l'entrée précédente est gardée
+        """
+        cur = self.connexion.cursor()
+        try:
+            session = read_session(pathlib.Path(chemin))
+        except (FormatReError, UnicodeDecodeError) as exc:
+            cur.execute("DELETE FROM fichiers WHERE chemin = ?", (chemin,))
+            # Le fichier est gardé pour ne pas être relu à chaque mise à jour
+            cur.execute(
+                "INSERT INTO fichiers (chemin, mtime_ns, taille, erreur) "
+                "VALUES (?, ?, ?, ?)",
+                (chemin, stat.st_mtime_ns, stat.st_size, str(exc)))
+            return
+        v1, v2 = session.visees
+        cur.execute("DELETE FROM fichiers WHERE chemin = ?", (chemin,))
+        cur.execute(
+            "INSERT INTO fichiers (chemin, mtime_ns, taille, station, date, "
+            "annee, azimuth, v1_haut, v1_bas, v2_haut, v2_bas) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (chemin, stat.st_mtime_ns, stat.st_size, session.station,
+             session.date.isoformat(), session.date.year, session.azimuth,
+             v1.haut, v1.bas, v2.haut, v2.bas))
+        idFichier = cur.lastrowid
+        cur.executemany(
+            "INSERT INTO series VALUES (?, ?, ?, ?)",
+            [(idFichier, s.numero, s.nom, s.est) for s in session.series])
+        cur.executemany(
+            "INSERT INTO lignes VALUES (?, ?, ?, ?, ?, ?)",
+            [(idFichier, l.serie, l.index, l.heure, l.angle, l.mesure)
+             for l in session.lignes])
+
+    def index_file(self, chemin: pathlib.Path) -> bool:
+        """ Met à jour l'index pour un seul fichier (ex: après enregistrement)
+
+        Args:
+            chemin (pathlib.Path): Chemin du fichier re
+
+        Returns:
+            bool: True si le fichier a été relu
+        """
+        chemin = os.path.abspath(chemin)
+        with self.connexion:
+            try:
+                stat = os.stat(chemin)
+            except FileNotFoundError:
+                self.connexion.execute(
+                    "DELETE FROM fichiers WHERE chemin = ?", (chemin,))
+                return False
+            connu = self.connexion.execute(
+                "SELECT mtime_ns, taille FROM fichiers WHERE chemin = ?",
+                (chemin,)).fetchone()
+            if connu == (stat.st_mtime_ns, stat.st_size):
+                return False
+            self._store(chemin, stat)
+        return True
+
+    def update(self, *racines: pathlib.Path) -> tuple:
+        """ Met à jour l'index de façon incrémentale
+
+        Seuls les fichiers nouveaux ou dont la date de modification ou la
+        taille ont changé sont relus. Les fichiers disparus sont retirés.
+        Un fichier qui disparaît ou devient illisible pendant la mise à jour
+        est ignoré sans interrompre les autres.
+
+        Args:
+            racines (pathlib.Path): Dossiers à indexer
+
+        Returns:
+            tuple (int, int): nombre de fichiers relus, nombre de retirés
+        """
+        relus = 0
+        retires = 0
+        with self.connexion:
+            for racine in racines:
+                racine = os.path.abspath(racine)
+                prefixe = os.path.join(racine, "")
+                connus = dict(
+                    (chemin, (mtime, taille))
+                    for chemin, mtime, taille in self.connexion.execute(
+                        "SELECT chemin, mtime_ns, taille FROM fichiers "
+                        "WHERE substr(chemin, 1, ?) = ?",
+                        (len(prefixe), prefixe)))
+                for chemin in iter_archive(racine):
+                    chemin = os.fspath(chemin)
+                    try:
+                        stat = os.stat(chemin)
+                        if connus.get(chemin) != (stat.st_mtime_ns,
+                                                  stat.st_size):
+                            self._store(chemin, stat)
+                            relus += 1
+                    except FileNotFoundError as exc:
+                        # Supprimé depuis le parcours: retiré de l'index
+                        log.warning("Fichier ignoré: %s", exc)
+                        continue
+                    except PermissionError as exc:
+                        log.warning("Fichier ignoré: %s", exc)
+                    connus.pop(chemin, None)
+                self.connexion.executemany(
+                    "DELETE FROM fichiers WHERE chemin = ?",
+                    [(chemin,) for chemin in connus])
+                retires += len(connus)
+        return relus, retires
+
+    def stations(self) -> list:
+        """ Liste des stations présentes dans l'index
+
+        Returns:
+            list: Noms des stations
+        """
+        return [station for (station,) in self.connexion.execute(
+            "SELECT DISTINCT station FROM fichiers "
+            "WHERE station IS NOT NULL ORDER BY station")]
+
+    def sessions(self, station: Optional[str] = None,
+                 annee: Optional[int] = None) -> Iterator[Session]:
+        """ Renvoie les sessions indexées, sans relire les fichiers
+
+        Args:
+            station (str, optional): Filtre sur la station. Defaults to None.
+            annee (int, optional): Filtre sur l'année. Defaults to None.
+
+        Yields:
+            Session: Sessions triées par date
+        """
+        filtre = "WHERE erreur IS NULL"
+        params = []
+        if station is not None:
+            filtre += " AND station = ?"
+            params.append(station.lower())
+        if annee is not None:
+            filtre += " AND annee = ?"
+            params.append(annee)
+        fichiers = self.connexion.execute(
+            "SELECT id, chemin, station, date, azimuth, v1_haut, v1_bas, "
+            f"v2_haut, v2_bas FROM fichiers {filtre} ORDER BY date, chemin",
+            params).fetchall()
+        # Deux requêtes groupées plutôt qu'une par fichier
+        series = {}
+        for idFichier, numero, nom, est in self.connexion.execute(
+                "SELECT s.fichier, s.numero, s.nom, s.est FROM series s "
+                f"JOIN fichiers ON fichiers.id = s.fichier {filtre} "
+                "ORDER BY s.fichier, s.numero", params):
+            series.setdefault(idFichier, []).append(
+                Serie(numero, nom, nom.split(" ", 1)[0], est))
+        lignes = {}
+        for idFichier, serie, idx, heure, angle, mesure in \
+                self.connexion.execute(
+                    "SELECT l.fichier, l.serie, l.idx, l.heure, l.angle, "
+                    "l.mesure FROM lignes l JOIN fichiers "
+                    f"ON fichiers.id = l.fichier {filtre} "
+                    "ORDER BY l.fichier, l.serie, l.idx", params):
+            lignes.setdefault(idFichier, []).append(
+                Ligne(serie, idx, heure, angle, mesure))
+        for (idFichier, chemin, stationMes, dateMes, azimuth,
+             v1h, v1b, v2h, v2b) in fichiers:
+            yield Session(
+                pathlib.Path(chemin), stationMes,
+                date.fromisoformat(dateMes), azimuth,
+                (Visee(1, v1h, v1b), Visee(2, v2h, v2b)),
+                tuple(series.get(idFichier, ())),
+                tuple(lignes.get(idFichier, ())))
+
+
+def index_path(dataDir: pathlib.Path) -> pathlib.Path:
+    """ Chemin de l'index par défaut dans le dossier de données
+
+    Args:
+        dataDir (pathlib.Path): Dossier de données de l'application
+
+    Returns:
+        pathlib.Path: Chemin de la base SQLite
+    """
+    return dataDir / "index.sqlite"
+
+
+def main_index(argv: list = None) -> None:
+    """ Point d'entrée de la commande 'index'
+
+    Args:
+        argv (list, optional): Arguments. Defaults to sys.argv[2:].
+    """
+    parser = argparse.ArgumentParser(
+        prog="saisiemesabs index", parents=[command_parser()],
+        description="Met à jour l'index SQLite d'une archive PATH_RE")
+    parser.add_argument("--index", type=pathlib.Path,
+                        help="Chemin de l'index (par défaut: index.sqlite "
+                        "du dossier de données)")
+    args, conf, dataDir = setup_command(parser, argv)
+    chemin = args.index or index_path(dataDir)
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    # Sans $YY dans PATH_RE, toutes les années partagent le même dossier
+    racines = dict.fromkeys(
+        expand_path_re(conf["Chemin_Sauvegarde"], station, annee)
+        for station in args.station or [conf["Station"]]
+        for annee in args.years)
+    with ArchiveIndex(chemin) as index:
+        relus, retires = index.update(*racines)
+    log.info("Index %s: %d fichiers relus, %d retirés", chemin, relus,
+             retires)
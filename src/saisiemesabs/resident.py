@@ -0,0 +1,113 @@
+""" Mode résident: une seule instance de l'application
+
+Le premier lancement avec --resident garde Qt chargé en tâche de fond et
+écoute sur une socket Unix locale. Les lancements suivants transmettent leurs
+arguments (--date, --conf, ...) à cette instance puis se terminent: la
+fenêtre est ouverte par l'instance résidente, sans réimporter PySide6.
+
+Ce module n'importe pas Qt pour que le client reste léger. Le serveur
+(QLocalServer) est dans app.py.
+"""
+# pylint: disable= invalid-name
+
+import os
+import json
+import socket
+import pathlib
+import tempfile
+from typing import Optional
+
+# Délai d'attente de la réponse de l'instance résidente (s)
+DELAI = 5.0
+# Arguments traités localement, jamais transmis
+ARGUMENTS_LOCAUX = ("-h", "--help", "--profile-startup")
+
+
+def socket_path(nom: str) -> pathlib.Path:
+    """ Chemin de la socket de l'instance résidente, propre à l'utilisateur
+
+    Args:
+        nom (str): Nom de l'application
+
+    Returns:
+        pathlib.Path: Chemin de la socket Unix
+    """
+    dossier = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return pathlib.Path(dossier) / f"{nom}-{os.getuid()}.sock"
+
+
+def encode_request(argv: list, cwd: str) -> bytes:
+    """ Requête envoyée à l'instance résidente (une ligne JSON)
+
+    Args:
+        argv (list): Arguments de la ligne de commande
+        cwd (str): Répertoire courant, pour les chemins relatifs
+
+    Returns:
+        bytes: Requête
+    """
+    return json.dumps({"argv": argv, "cwd": cwd}).encode() + b"\n"
+
+
+def decode_request(data: bytes) -> tuple:
+    """ Décode une requête reçue
+
+    Args:
+        data (bytes): Ligne reçue
+
+    Raises:
+        ValueError: Requête mal formée
+
+    Returns:
+        tuple (list, str): Arguments et répertoire courant du client
+    """
+    requete = json.loads(data)
+    if not isinstance(requete, dict) or not isinstance(requete.get("argv"),
+                                                       list):
+        raise ValueError(f"Requête invalide: {data!r}")
+    return [str(arg) for arg in requete["argv"]], str(requete.get("cwd", "."))
+
+
+def forward(argv: list, chemin: pathlib.Path,
+            delai: float = DELAI) -> Optional[str]:
+    """ Transmet les arguments à l'instance résidente
+
+    Seule une socket absente ou sans instance à l'écoute (ENOENT,
+    ECONNREFUSED) donne un lancement normal: une instance qui a accepté la
+    connexion mais ne répond pas à temps est occupée, une seconde instance
+    écrirait le même journal.
+
+    Args:
+        argv (list): Arguments de la ligne de commande
+        chemin (pathlib.Path): Chemin de la socket
+        delai (float, optional): Délai d'attente (s). Defaults to DELAI.
+
+    Returns:
+        str: Réponse de l'instance ("ok" ou message d'erreur, aussi en cas
+             d'instance occupée), None si aucune instance n'écoute
+             (lancement normal)
+    """
+    if (any(arg.partition("=")[0] in ARGUMENTS_LOCAUX for arg in argv)
+            or not chemin.exists()):
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(delai)
+        try:
+            client.connect(str(chemin))
+        except (FileNotFoundError, ConnectionRefusedError):
+            # Socket orpheline: pas d'instance résidente
+            return None
+        except OSError as exc:
+            return f"Instance résidente injoignable: {exc}"
+        try:
+            client.sendall(encode_request(argv, os.getcwd()))
+            with client.makefile("rb") as reponse:
+                ligne = reponse.readline()
+        except TimeoutError:
+            return (f"L'instance résidente est occupée (pas de réponse en "
+                    f"{delai:g} s)")
+        except OSError as exc:
+            return f"Instance résidente: {exc}"
+    if not ligne:
+        return "L'instance résidente a fermé la connexion sans répondre"
+    return ligne.decode("utf-8", "replace").strip()
@@ -0,0 +1,272 @@
+""" Résumés annuels des archives, reconstruits seulement si nécessaire
+
+Un résumé par station et par année (ex: paf2022.json) donne le nombre de
+sessions, la première et la dernière mesure et, pour D, I, la lecture de la
+cible et les lignes de base: moyenne, écart-type, minimum et maximum.
+
+    python -m saisiemesabs summary --station paf --years 2015-2025
+
+Le résumé garde la date de modification, la taille et l'empreinte SHA-256
+de chaque fichier re de l'année dans le dossier PATH_RE, ainsi que
+l'intensité et l'hémisphère de la réduction. Il n'est reconstruit que si
+un fichier est ajouté, retiré ou modifié, ou si ces paramètres changent:
+une date de modification différente avec la même empreinte (copie, touch)
+ne met à jour que le manifeste. Les
+rapports annuels et les tableaux de contrôle lisent ces quelques fichiers
+(read_summary) au lieu de parcourir l'archive.
+
+Les fichiers du variomètre ne sont pas suivis: après leur correction,
+reconstruire avec --force.
+"""
+# pylint: disable= invalid-name
+
+import os
+import json
+import hashlib
+import logging
+import pathlib
+import argparse
+import tempfile
+
+from .cli import command_parser, setup_command
+from .refile import (
+    FormatReError,
+    expand_path_re,
+    file_year,
+    iter_archive,
+    read_session
+)
+from .temps import format_instant
+
+log = logging.getLogger(__name__)
+
+# Version du format, un résumé d'une autre version est reconstruit
+VERSION = 1
+
+
+def summary_path(dossier: pathlib.Path, station: str,
+                 annee: int) -> pathlib.Path:
+    """ Fichier du résumé d'une station pour une année
+
+    Args:
+        dossier (pathlib.Path): Dossier des résumés
+        station (str): Nom de la station
+        annee (int): Année sur 4 chiffres
+
+    Returns:
+        pathlib.Path: Chemin du résumé
+    """
+    return pathlib.Path(dossier) / f"{station.lower()}{annee:04d}.json"
+
+
+def file_hash(chemin: pathlib.Path) -> str:
+    """ Empreinte SHA-256 d'un fichier
+
+    Args:
+        chemin (pathlib.Path): Fichier
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    with open(chemin, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def read_summary(chemin: pathlib.Path) -> dict:
+    """ Relit un résumé
+
+    Args:
+        chemin (pathlib.Path): Fichier du résumé
+
+    Returns:
+        dict: Résumé, vide s'il est absent ou illisible
+    """
+    try:
+        with open(chemin, "r", encoding='utf-8') as file:
+            resume = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return resume if resume.get("version") == VERSION else {}
+
+
+def check_files(racine: pathlib.Path, fichiers: dict,
+                annee: int = None) -> tuple:
+    """ Compare les fichiers re d'un dossier au manifeste d'un résumé
+
+    Seuls les fichiers dont la date de modification ou la taille a changé
+    sont relus pour calculer leur empreinte.
+
+    Args:
+        racine (pathlib.Path): Dossier PATH_RE de la station et de l'année
+        fichiers (dict): Manifeste {chemin relatif: [mtime_ns, taille,
+                         empreinte]}
+        annee (int, optional): Ne suit que les fichiers de cette année
+                               (PATH_RE sans $YY). Defaults to None.
+
+    Returns:
+        tuple (bool, dict): contenu inchangé, manifeste à jour
+    """
+    manifeste = {}
+    inchange = True
+    for chemin in iter_archive(racine):
+        if annee is not None and file_year(chemin) != annee:
+            continue
+        nom = chemin.relative_to(racine).as_posix()
+        stat = chemin.stat()
+        connu = fichiers.get(nom)
+        if connu and connu[:2] == [stat.st_mtime_ns, stat.st_size]:
+            manifeste[nom] = connu
+            continue
+        empreinte = file_hash(chemin)
+        manifeste[nom] = [stat.st_mtime_ns, stat.st_size, empreinte]
+        if not connu or connu[2] != empreinte:
+            inchange = False
+    return inchange and manifeste.keys() == fichiers.keys(), manifeste
+
+
+def build_summary(sessions, intensite: float, hemisphereSud: bool = True,
+                  variometre=None) -> dict:
+    """ Statistiques d'une année de sessions
+
+    Args:
+        sessions (list): Sessions de mesure (refile)
+        intensite (float): Intensité totale F (nT)
+        hemisphereSud (bool, optional): Inclinaison négative.
+                                        Defaults to True.
+        variometre (Variometre, optional): Variomètre de la station.
+                                           Defaults to None.
+
+    Returns:
+        dict: sessions, premiere, derniere et colonnes {nom: {n, moyenne,
+              ecart_type, min, max}}
+    """
+    # Import tardif: NumPy n'est utile qu'à la reconstruction
+    # pylint: disable= import-outside-toplevel
+    import numpy as np
+    from .baseline import COLONNES_STATS, make_points
+
+    points = make_points(sessions, intensite, hemisphereSud, variometre)
+    resume = {"sessions": len(points), "premiere": None, "derniere": None,
+              "colonnes": {}}
+    if len(points):
+        for cle, temps in (("premiere", points["temps"].min()),
+                           ("derniere", points["temps"].max())):
+            resume[cle] = format_instant(temps)
+    for nom in COLONNES_STATS:
+        valeurs = points[nom][~np.isnan(points[nom])]
+        colonne = {"n": len(valeurs)}
+        if len(valeurs):
+            colonne.update(
+                moyenne=float(valeurs.mean()),
+                ecart_type=float(valeurs.std(ddof=1)) if len(valeurs) > 1
+                else 0.0,
+                min=float(valeurs.min()), max=float(valeurs.max()))
+        resume["colonnes"][nom] = colonne
+    return resume
+
+
+def write_summary(chemin: pathlib.Path, resume: dict) -> None:
+    """ Écrit un résumé (remplacement atomique)
+
+    Args:
+        chemin (pathlib.Path): Fichier du résumé
+        resume (dict): Résumé
+    """
+    chemin = pathlib.Path(chemin)
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporaire = tempfile.mkstemp(dir=chemin.parent,
+                                      prefix=f".{chemin.stem}.",
+                                      suffix=".tmp")
+    with os.fdopen(fd, "w", encoding='utf-8') as file:
+        json.dump(resume, file, indent=1)
+    os.replace(temporaire, chemin)
+
+
+def update_summary(dossier: pathlib.Path, modele: str, station: str,
+                   annee: int, intensite: float, hemisphereSud: bool = True,
+                   variometre=None, force: bool = False) -> tuple:
+    """ Met à jour le résumé d'une station pour une année, en ne le
+        reconstruisant que si les fichiers re ou les paramètres de la
+        réduction ont changé
+
+    Args:
+        dossier (pathlib.Path): Dossier des résumés
+        modele (str): Chemin PATH_RE de la configuration
+        station (str): Nom de la station
+        annee (int): Année sur 4 chiffres
+        intensite (float): Intensité totale F (nT)
+        hemisphereSud (bool, optional): Inclinaison négative.
+                                        Defaults to True.
+        variometre (Variometre, optional): Variomètre de la station.
+                                           Defaults to None.
+        force (bool, optional): Reconstruit même sans changement.
+                                Defaults to False.
+
+    Returns:
+        tuple (dict, bool): résumé, True s'il a été reconstruit
+    """
+    chemin = summary_path(dossier, station, annee)
+    racine = expand_path_re(modele, station, annee)
+    ancien = read_summary(chemin)
+    inchange, manifeste = check_files(racine, ancien.get("fichiers", {}),
+                                      annee)
+    inchange &= (ancien.get("intensite") == intensite
+                 and ancien.get("hemisphereSud") == hemisphereSud)
+    if inchange and ancien and not force:
+        if manifeste != ancien["fichiers"]:
+            # Dates de modification seules: le contenu est le même
+            ancien["fichiers"] = manifeste
+            write_summary(chemin, ancien)
+        return ancien, False
+
+    sessions = []
+    ignores = 0
+    for nom in manifeste:
+        try:
+            session = read_session(racine / nom)
+        except (FormatReError, UnicodeDecodeError, OSError) as exc:
+            log.warning("Fichier ignoré: %s", exc)
+            ignores += 1
+            continue
+        if session.date.year == annee:
+            sessions.append(session)
+    resume = {"version": VERSION, "station": station.lower(),
+              "annee": annee, "dossier": str(racine),
+              "intensite": intensite, "hemisphereSud": hemisphereSud}
+    resume.update(build_summary(sessions, intensite, hemisphereSud,
+                                variometre))
+    resume["ignores"] = ignores
+    resume["fichiers"] = manifeste
+    write_summary(chemin, resume)
+    return resume, True
+
+
+def main_summary(argv: list = None) -> None:
+    """ Point d'entrée de la commande 'summary'
+
+    Args:
+        argv (list, optional): Arguments. Defaults to sys.argv[2:].
+    """
+    parser = argparse.ArgumentParser(
+        prog="saisiemesabs summary", parents=[command_parser()],
+        description="Met à jour les résumés annuels d'une archive PATH_RE")
+    parser.add_argument("--force", action="store_true",
+                        help="Reconstruit les résumés même sans changement "
+                        "des fichiers re")
+    args, conf, dataDir = setup_command(parser, argv)
+    variometre = None
+    if conf["Chemin_Vario"]:
+        # pylint: disable= import-outside-toplevel
+        from .variometre import Variometre
+        variometre = Variometre(conf["Chemin_Vario"],
+                                dataDir / "cache" / "variometre")
+
+    for station in args.station or [conf["Station"]]:
+        for annee in args.years:
+            resume, reconstruit = update_summary(
+                dataDir / "resumes", conf["Chemin_Sauvegarde"], station,
+                annee, conf["Intensite"], not args.nord, variometre,
+                args.force)
+            log.info("%s %d: %d sessions (%s)", station, annee,
+                     resume["sessions"],
+                     "reconstruit" if reconstruit else "à jour")
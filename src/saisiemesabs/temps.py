@@ -0,0 +1,106 @@
+""" Instants de mesure en secondes entières
+
+Une heure saisie (hhmmss) est un nombre de secondes depuis minuit et un
+instant de mesure un nombre de secondes depuis 1970 (UTC): date de la
+session plus heure de la ligne. Une ligne saisie après minuit est du
+lendemain (235950 puis 000020 le 19/07/22 -> 20/07/22 00:00:20).
+
+continuous_times et instants_array traitent d'un coup les heures de
+milliers de sessions d'une archive (tableaux NumPy), sans boucle Python.
+"""
+# pylint: disable= invalid-name
+
+from datetime import datetime, timezone
+
+SECONDES_PAR_JOUR = 86400
+
+
+def parse_hhmmss(text: str) -> int:
+    """ Secondes depuis minuit d'une heure hhmmss
+
+    Args:
+        text (str): Heure (ex: 130640)
+
+    Raises:
+        ValueError: Ce n'est pas une heure valide
+
+    Returns:
+        int: Secondes depuis minuit (ex: 47200)
+    """
+    if len(text) != 6 or not (text.isascii() and text.isdigit()):
+        raise ValueError(f"heure hhmmss attendue: {text!r}")
+    heures, minutes, secondes = int(text[0:2]), int(text[2:4]), int(text[4:6])
+    if heures > 23 or minutes > 59 or secondes > 59:
+        raise ValueError(f"heure hhmmss attendue: {text!r}")
+    return heures * 3600 + minutes * 60 + secondes
+
+
+def format_hhmmss(secondes: int) -> str:
+    """ Heure hhmmss d'un nombre de secondes, modulo un jour
+
+    Args:
+        secondes (int): Secondes depuis minuit (ou instant)
+
+    Returns:
+        str: Heure (ex: 130640)
+    """
+    minutes, secondes = divmod(int(secondes) % SECONDES_PAR_JOUR, 60)
+    heures, minutes = divmod(minutes, 60)
+    return f"{heures:02d}{minutes:02d}{secondes:02d}"
+
+
+def format_instant(secondes: int) -> str:
+    """ Texte ISO 8601 d'un instant
+
+    Args:
+        secondes (int): Secondes depuis 1970 (UTC)
+
+    Returns:
+        str: ex: 2022-07-19T13:06:40
+    """
+    return datetime.fromtimestamp(int(secondes), timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%S")
+
+
+def continuous_times(heures):
+    """ Rend les heures des lignes croissantes pour une session à cheval
+        sur minuit (00 00 15 après 23 59 40 devient 86415)
+
+    Une ligne plus de 12 h avant la première ligne de sa session est du
+    lendemain.
+
+    Args:
+        heures (np.ndarray): (N, ...) secondes depuis minuit, lignes de
+                             chaque session dans l'ordre de saisie
+
+    Returns:
+        np.ndarray: (N, ...) secondes depuis minuit du jour de la session
+    """
+    # pylint: disable= import-outside-toplevel
+    import numpy as np
+
+    heures = np.asarray(heures, dtype=np.int64)
+    plat = heures.reshape(len(heures), -1)
+    lendemain = plat < plat[:, :1] - SECONDES_PAR_JOUR // 2
+    return (plat + lendemain * SECONDES_PAR_JOUR).reshape(heures.shape)
+
+
+def instants_array(jours, heures):
+    """ Instants d'un tableau de lignes de mesure, passage de minuit
+        compris (voir continuous_times)
+
+    Args:
+        jours (np.ndarray | list): (N,) date de chaque session (date ou
+                                   datetime64[D])
+        heures (np.ndarray): (N, ...) secondes depuis minuit des lignes
+
+    Returns:
+        np.ndarray: (N, ...) secondes depuis 1970 (UTC), int64
+    """
+    # pylint: disable= import-outside-toplevel
+    import numpy as np
+
+    heures = continuous_times(heures)
+    debuts = (np.asarray(jours, dtype="datetime64[D]")
+              .astype(np.int64) * SECONDES_PAR_JOUR)
+    return debuts.reshape((-1,) + (1,) * (heures.ndim - 1)) + heures
@@ -0,0 +1,354 @@
+""" Valeurs du variomètre aux instants des lignes de mesure
+
+Les fichiers du variomètre sont des fichiers journaliers à la seconde au
+format IAGA-2002 (ex: paf20220719vsec.sec), rangés dans un même dossier.
+Un fichier texte n'est analysé qu'une fois: il est converti en tableau
+binaire (.npy) dans le dossier de cache, relu ensuite par np.load en mode
+memmap.
+
+Les valeurs aux instants des 16 lignes de N sessions sont obtenues en une
+fois par numpy.searchsorted et interpolation linéaire:
+
+    heures   (N, 4, 4)       secondes depuis minuit (voir sessions_to_arrays)
+    valeurs  (N, 4, 4, C)    C composantes du fichier (ex: X, Y, Z, F)
+"""
+# pylint: disable= invalid-name
+
+import os
+import pathlib
+import tempfile
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+
+from .reduction import sessions_to_arrays
+from .temps import SECONDES_PAR_JOUR, continuous_times
+
+# IAGA-2002: 99999 valeur absente, 88888 composante non enregistrée
+VALEUR_ABSENTE = 88888.0
+
+
+class FormatIagaError(ValueError):
+    """ Le fichier IAGA-2002 est mal formé
+    """
+
+    def __init__(self, chemin, message: str) -> None:
+        super().__init__(f"{chemin}: {message}")
+        self.chemin = chemin
+        self.message = message
+
+    def __reduce__(self):
+        # Permet le transfert de l'erreur entre processus
+        return (type(self), (self.chemin, self.message))
+
+
+def read_iaga2002(chemin: pathlib.Path) -> np.ndarray:
+    """ Lit un fichier journalier IAGA-2002
+
+    Args:
+        chemin (pathlib.Path): Fichier IAGA-2002
+
+    Raises:
+        FormatIagaError: Fichier mal formé
+
+    Returns:
+        np.ndarray: Tableau structuré, champ "secondes" (depuis minuit du
+                    premier enregistrement) puis un champ par composante
+                    (NaN pour les valeurs absentes)
+    """
+    composantes = None
+    lignes = []
+    with open(chemin, "r", encoding='ascii', errors='replace') as file:
+        for ligne in file:
+            if composantes is None:
+                # En-tête: lignes terminées par '|', la dernière nomme les
+                # colonnes (DATE TIME DOY PAFX PAFY PAFZ PAFF |)
+                if ligne.startswith("DATE"):
+                    noms = ligne.rstrip(" |\n").split()[3:]
+                    # Le code station préfixe le nom de la composante
+                    composantes = [nom[-1] for nom in noms]
+                continue
+            if ligne.strip():
+                lignes.append(ligne.split())
+    if composantes is None:
+        raise FormatIagaError(chemin, "ligne DATE TIME DOY ... absente")
+    try:
+        valeurs = np.array([ligne[3:] for ligne in lignes], dtype=float)
+        valeurs = valeurs.reshape(len(lignes), len(composantes))
+        jours = np.array([ligne[0] for ligne in lignes],
+                         dtype="datetime64[D]")
+        heures = np.array([ligne[1][:8].split(":") for ligne in lignes],
+                          dtype=np.int64).reshape(len(lignes), 3)
+    except ValueError as exc:
+        raise FormatIagaError(chemin, str(exc)) from None
+    valeurs[valeurs >= VALEUR_ABSENTE] = np.nan
+    donnees = np.empty(len(lignes), dtype=[("secondes", np.int32)] +
+                       [(nom, np.float64) for nom in composantes])
+    if len(lignes):
+        donnees["secondes"] = (
+            (jours - jours[0]).astype(np.int64) * SECONDES_PAR_JOUR
+            + heures @ np.array([3600, 60, 1])
+        )
+    for i, nom in enumerate(composantes):
+        donnees[nom] = valeurs[:, i]
+    return donnees
+
+
+def interpolate(secondes, valeurs, heures) -> np.ndarray:
+    """ Interpolation linéaire des valeurs du variomètre
+
+    Args:
+        secondes (np.ndarray): (M,) instants des valeurs, croissants
+        valeurs (np.ndarray): (M, C) valeurs
+        heures (np.ndarray): Instants recherchés, de forme quelconque
+
+    Returns:
+        np.ndarray: (*heures.shape, C), NaN hors des données
+    """
+    secondes = np.asarray(secondes, dtype=np.float64)
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    heures = np.asarray(heures, dtype=np.float64)
+    plat = heures.ravel()
+    resultat = np.full((plat.size, valeurs.shape[1]), np.nan)
+    if len(secondes) < 2:
+        if len(secondes) == 1:
+            resultat[plat == secondes[0]] = valeurs[0]
+        return resultat.reshape(heures.shape + (valeurs.shape[1],))
+    # Premier instant >= heure recherchée
+    droite = np.clip(np.searchsorted(secondes, plat), 1, len(secondes) - 1)
+    gauche = droite - 1
+    poids = ((plat - secondes[gauche])
+             / (secondes[droite] - secondes[gauche]))[:, None]
+    resultat = valeurs[gauche] * (1 - poids) + valeurs[droite] * poids
+    resultat[(plat < secondes[0]) | (plat > secondes[-1])] = np.nan
+    return resultat.reshape(heures.shape + (valeurs.shape[1],))
+
+
+class Variometre:
+    """ Fichiers journaliers du variomètre d'un dossier
+    """
+
+    def __init__(self, dossier: pathlib.Path,
+                 cache: pathlib.Path = None) -> None:
+        """ Accès aux fichiers du variomètre
+
+        Args:
+            dossier (pathlib.Path): Dossier des fichiers IAGA-2002
+            cache (pathlib.Path, optional): Dossier des tableaux binaires,
+                                            None pour toujours relire le
+                                            texte. Defaults to None.
+        """
+        self.dossier = pathlib.Path(dossier)
+        self.cache = pathlib.Path(cache) if cache else None
+        # Jours déjà ouverts: (station, date) -> (fichier, (mtime_ns,
+        # taille), tableau). Un fichier absent n'est pas retenu: il peut
+        # apparaître pendant la campagne
+        self.jours = {}
+
+    def find_file(self, station: str, jour: date) -> Optional[pathlib.Path]:
+        """ Fichier IAGA-2002 d'un jour (stationAAAAMMJJ*.sec)
+
+        Args:
+            station (str): Code IAGA de la station
+            jour (date): Jour
+
+        Returns:
+            pathlib.Path: Fichier, None s'il n'existe pas
+        """
+        for prefixe in (station.lower(), station.upper()):
+            fichiers = sorted(self.dossier.glob(f"{prefixe}{jour:%Y%m%d}*"))
+            fichiers = [f for f in fichiers if f.suffix.lower() == ".sec"]
+            if fichiers:
+                return fichiers[0]
+        return None
+
+    def day(self, station: str, jour: date) -> Optional[np.ndarray]:
+        """ Valeurs d'un jour (voir read_iaga2002), depuis le cache binaire
+            s'il est à jour
+            Le fichier du jour grandit pendant la campagne: il est relu dès
+            que sa date de modification ou sa taille change
+
+        Args:
+            station (str): Code IAGA de la station
+            jour (date): Jour
+
+        Raises:
+            FormatIagaError: Fichier mal formé
+
+        Returns:
+            np.ndarray: Tableau structuré, None si pas de fichier
+        """
+        cle = (station.lower(), jour)
+        entree = self.jours.get(cle)
+        source = entree[0] if entree else self.find_file(station, jour)
+        if source is None:
+            return None
+        try:
+            stat = source.stat()
+        except OSError:
+            # Fichier renommé ou supprimé
+            self.jours.pop(cle, None)
+            return self.day(station, jour) if entree else None
+        version = (stat.st_mtime_ns, stat.st_size)
+        if entree and entree[1] == version:
+            return entree[2]
+        if self.cache is None:
+            donnees = read_iaga2002(source)
+        else:
+            donnees = self._cached(source)
+        self.jours[cle] = (source, version, donnees)
+        return donnees
+
+    def loaded(self, station: str, jour: date) -> bool:
+        """ Indique si day() peut répondre sans lire de fichier: jour déjà
+            chargé et fichier inchangé, ou pas de fichier
+
+        Args:
+            station (str): Code IAGA de la station
+            jour (date): Jour
+
+        Returns:
+            bool: True si les valeurs du jour sont disponibles
+        """
+        entree = self.jours.get((station.lower(), jour))
+        if entree is None:
+            return self.find_file(station, jour) is None
+        try:
+            stat = entree[0].stat()
+        except OSError:
+            return False
+        return entree[1] == (stat.st_mtime_ns, stat.st_size)
+
+    def ready(self, station: str, jour: date, heures) -> bool:
+        """ Indique si values() peut répondre sans lire de fichier (voir
+            loaded)
+
+        Args:
+            station (str): Code IAGA de la station
+            jour (date): Jour
+            heures (np.ndarray): Secondes depuis minuit, au-delà de 86400
+                                 pour le lendemain
+
+        Returns:
+            bool: True si tous les jours couverts sont disponibles
+        """
+        heures = np.asarray(heures)
+        return all(self.loaded(station, jour + timedelta(days=decalage))
+                   for decalage in range(int(heures.max(initial=0))
+                                         // SECONDES_PAR_JOUR + 1))
+
+    def _cached(self, source: pathlib.Path) -> np.ndarray:
+        """ Tableau binaire d'un fichier texte, créé s'il est absent ou plus
+            ancien que le texte
+        """
+        binaire = self.cache / f"{source.name}.npy"
+        try:
+            if binaire.stat().st_mtime_ns >= source.stat().st_mtime_ns:
+                return np.load(binaire, mmap_mode="r")
+        except (OSError, ValueError):
+            pass
+        donnees = read_iaga2002(source)
+        try:
+            self.cache.mkdir(parents=True, exist_ok=True)
+            fd, temporaire = tempfile.mkstemp(dir=self.cache,
+                                              prefix=f".{source.name}.",
+                                              suffix=".tmp")
+            with os.fdopen(fd, "wb") as file:
+                np.save(file, donnees)
+            os.replace(temporaire, binaire)
+        except OSError:
+            pass
+        return donnees
+
+    def values(self, station: str, jour: date, heures) -> tuple:
+        """ Valeurs du variomètre à des instants d'un jour
+
+        Args:
+            station (str): Code IAGA de la station
+            jour (date): Jour
+            heures (np.ndarray): Secondes depuis minuit, au-delà de 86400
+                                 pour le lendemain
+
+        Returns:
+            tuple (np.ndarray, tuple): valeurs (*heures.shape, C), NaN sans
+                                       données, et noms des composantes
+                                       (vide sans fichier)
+        """
+        heures = np.asarray(heures)
+        morceaux = []
+        for decalage in range(int(heures.max(initial=0))
+                              // SECONDES_PAR_JOUR + 1):
+            donnees = self.day(station, jour + timedelta(days=decalage))
+            if donnees is not None:
+                morceaux.append((donnees, decalage * SECONDES_PAR_JOUR))
+        if not morceaux:
+            return np.full(heures.shape + (0,), np.nan), ()
+        composantes = morceaux[0][0].dtype.names[1:]
+        secondes = np.concatenate([donnees["secondes"] + decalage
+                                   for donnees, decalage in morceaux])
+        valeurs = np.concatenate([
+            np.column_stack([donnees[nom] for nom in composantes])
+            for donnees, _ in morceaux
+        ])
+        return interpolate(secondes, valeurs, heures), composantes
+
+    def values_sessions(self, sessions) -> tuple:
+        """ Valeurs du variomètre aux instants des 16 lignes de N sessions
+
+        Args:
+            sessions (Iterable[Session]): Sessions de mesure (refile)
+
+        Raises:
+            ValueError: Les fichiers n'ont pas les mêmes composantes
+
+        Returns:
+            tuple (np.ndarray, tuple): valeurs (N, 4, 4, C), NaN sans
+                                       données, et noms des composantes
+        """
+        sessions = list(sessions)
+        return self.values_arrays([session.station for session in sessions],
+                                  [session.date for session in sessions],
+                                  sessions_to_arrays(sessions)[2])
+
+    def values_arrays(self, stations, jours, heures) -> tuple:
+        """ Valeurs du variomètre aux instants des 16 lignes de N sessions
+            données sous forme de tableaux
+
+        Le fichier de chaque jour n'est ouvert qu'une fois et toutes les
+        lignes des sessions de ce jour sont interpolées ensemble.
+
+        Args:
+            stations (Sequence[str]): (N,) station de chaque session
+            jours (Sequence[date]): (N,) jour de chaque session (date ou
+                                    datetime64[D])
+            heures (np.ndarray): (N, 4, 4) secondes depuis minuit
+
+        Raises:
+            ValueError: Les fichiers n'ont pas les mêmes composantes
+
+        Returns:
+            tuple (np.ndarray, tuple): valeurs (N, 4, 4, C), NaN sans
+                                       données, et noms des composantes
+        """
+        heures = continuous_times(heures)
+        jours = np.asarray(jours, dtype="datetime64[D]").astype(object)
+        groupes = {}
+        for i, (station, jour) in enumerate(zip(stations, jours)):
+            groupes.setdefault((station, jour), []).append(i)
+        resultats = []
+        composantes = None
+        for (station, jour), indices in groupes.items():
+            valeurs, noms = self.values(station, jour, heures[indices])
+            if noms and composantes is None:
+                composantes = noms
+            elif noms and noms != composantes:
+                raise ValueError(f"Composantes {noms} au lieu de "
+                                 f"{composantes} ({station} {jour})")
+            resultats.append((indices, valeurs))
+        composantes = composantes or ()
+        valeurs = np.full(heures.shape + (len(composantes),), np.nan)
+        for indices, valeursJour in resultats:
+            if valeursJour.shape[-1]:
+                valeurs[indices] = valeursJour
+        return valeurs, composantes
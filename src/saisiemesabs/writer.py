@@ -0,0 +1,142 @@
+""" Écriture des fichiers de mesure en tâche de fond
+"""
+# pylint: disable= invalid-name
+
+import os
+import pathlib
+import tempfile
+
+from PySide6 import QtCore
+
+# Masque de création des fichiers, lu une fois au chargement (os.umask n'est
+# pas sûr entre threads)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class DirSyncError(OSError):
+    """ Le fichier est écrit et en place, seule la synchronisation de son
+        dossier (fsync) a échoué
+    """
+
+
+def atomic_write(chemin: pathlib.Path, contenu: str,
+                 fsync: bool = True) -> None:
+    """ Écrit un fichier de façon atomique (fichier temporaire + rename)
+
+    Le fichier final est soit l'ancien, soit le nouveau, jamais un fichier
+    à moitié écrit.
+
+    Args:
+        chemin (pathlib.Path): Chemin du fichier
+        contenu (str): Contenu à écrire
+        fsync (bool, optional): Force l'écriture sur le disque avant de
+                                rendre la main. Defaults to True.
+
+    Raises:
+        DirSyncError: Le fichier est en place mais la synchronisation du
+                      dossier a échoué
+        OSError: Le fichier n'a pas été écrit
+    """
+    chemin = pathlib.Path(chemin)
+    fd, temporaire = tempfile.mkstemp(
+        prefix=f".{chemin.name}.", suffix=".tmp", dir=chemin.parent)
+    try:
+        with os.fdopen(fd, "w", encoding='utf-8') as file:
+            file.write(contenu)
+            file.flush()
+            if fsync:
+                os.fsync(file.fileno())
+        # mkstemp crée en 0600, on revient aux droits d'un open() classique
+        os.chmod(temporaire, 0o666 & ~_UMASK)
+        os.replace(temporaire, chemin)
+    except BaseException:
+        try:
+            os.unlink(temporaire)
+        except OSError:
+            pass
+        raise
+    if fsync:
+        # Persistance du rename lui-même
+        try:
+            dirFd = os.open(chemin.parent, os.O_RDONLY)
+            try:
+                os.fsync(dirFd)
+            finally:
+                os.close(dirFd)
+        except OSError as exc:
+            raise DirSyncError(exc.errno, f"synchronisation du dossier "
+                               f"{chemin.parent}: {exc.strerror}") from exc
+
+
+class SaveSignals(QtCore.QObject):
+    """ Signaux d'une SaveTask, reçus dans le thread de l'interface
+    """
+    # Chemin du fichier écrit
+    saved = QtCore.Signal(str)
+    # Chemin tenté, message d'erreur
+    failed = QtCore.Signal(str, str)
+    # Chemin tenté, message d'erreur, chemin de repli
+    fallback = QtCore.Signal(str, str, str)
+    # Chemin écrit, message d'erreur de la synchronisation du dossier
+    unsynced = QtCore.Signal(str, str)
+
+
+class SaveTask(QtCore.QRunnable):
+    """ Écriture d'une mesure dans un thread du QThreadPool
+
+    En cas de FileNotFoundError/PermissionError, une seconde tentative est
+    faite dans le répertoire courant. L'échec de la seule synchronisation
+    du dossier n'en provoque pas: le fichier est en place (unsynced puis
+    saved).
+    Aucun log n'est émis depuis le thread: tout passe par les signaux.
+    """
+
+    def __init__(self, chemin: pathlib.Path, contenu: str,
+                 fsync: bool = True) -> None:
+        """ Tâche d'écriture
+
+        Args:
+            chemin (pathlib.Path): Chemin du fichier
+            contenu (str): Contenu à écrire
+            fsync (bool, optional): Voir atomic_write. Defaults to True.
+        """
+        super().__init__()
+        self.chemin = pathlib.Path(chemin)
+        self.contenu = contenu
+        self.fsync = fsync
+        self.signals = SaveSignals()
+
+    def run(self) -> None:
+        try:
+            self.ecrire(self.chemin)
+            return
+        except (FileNotFoundError, PermissionError) as exc:
+            erreur = str(exc)
+        except OSError as exc:
+            self.signals.failed.emit(str(self.chemin), str(exc))
+            return
+        # Tentative de sauvegarde dans le répertoire courant
+        repli = pathlib.Path(f"./{self.chemin.name}")
+        self.signals.fallback.emit(str(self.chemin), erreur, str(repli))
+        try:
+            self.ecrire(repli)
+        except OSError as exc:
+            self.signals.failed.emit(str(repli), str(exc))
+
+    def ecrire(self, chemin: pathlib.Path) -> None:
+        """ Écrit le fichier puis émet saved, y compris quand seule la
+            synchronisation du dossier échoue (le fichier est en place: pas
+            de repli)
+
+        Args:
+            chemin (pathlib.Path): Chemin du fichier
+
+        Raises:
+            OSError: Le fichier n'a pas été écrit
+        """
+        try:
+            atomic_write(chemin, self.contenu, self.fsync)
+        except DirSyncError as exc:
+            self.signals.unsynced.emit(str(chemin), str(exc))
+        self.signals.saved.emit(str(chemin))
@@ -0,0 +1,136 @@
+""" Séries de lignes de base (.bin et statistiques de Welford en .json)
+"""
+# pylint: disable= invalid-name
+
+import pathlib
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from saisiemesabs.baseline import (
+    COLONNES_STATS,
+    DTYPE_POINT,
+    append_point,
+    make_point,
+    read_points,
+    read_stats,
+    store_path,
+    update_baseline,
+    write_series,
+)
+from saisiemesabs.refile import read_session
+
+EXEMPLE = pathlib.Path(__file__).parents[1] / "Exemples" / "re07181322.paf"
+INTENSITE = 50000.0
+
+
+def sessions(nombre: int) -> list:
+    """ Sessions de jours successifs, aux résidus différents
+    """
+    session = read_session(EXEMPLE)
+    return [session._replace(
+        date=session.date + timedelta(days=jour),
+        lignes=tuple(ligne._replace(mesure=ligne.mesure + jour * 0.7)
+                     for ligne in session.lignes))
+        for jour in range(nombre)]
+
+
+def egaux(points, attendus) -> None:
+    """ Compare des points champ par champ (NaN égaux entre eux)
+    """
+    for nom in DTYPE_POINT.names:
+        np.testing.assert_array_equal(points[nom], attendus[nom])
+
+
+def verifier_stats(stats: dict, points: np.ndarray) -> None:
+    """ Les statistiques incrémentales sont celles de la série complète
+    """
+    assert stats["points"] == len(points)
+    assert stats["premier"] == int(points["temps"].min())
+    assert stats["dernier"] == int(points["temps"].max())
+    for nom in ("declinaison", "inclinaison", "mire"):
+        colonne = stats["colonnes"][nom]
+        assert colonne["n"] == len(points)
+        assert colonne["moyenne"] == pytest.approx(points[nom].mean())
+        assert colonne["ecart_type"] == pytest.approx(
+            points[nom].std(ddof=1), abs=1e-12)
+        assert colonne["derniere"] == points[nom][-1]
+    # Sans variomètre, les lignes de base sont à NaN et ne comptent pas
+    assert stats["colonnes"]["baseD"]["n"] == 0
+
+
+def test_ajout_et_relecture(tmp_path):
+    """ Les points ajoutés un à un sont relus dans l'ordre, avec les
+        statistiques de la série
+    """
+    stats = {}
+    for session in sessions(5):
+        stats = update_baseline(tmp_path, session, INTENSITE)
+    chemin = store_path(tmp_path, "paf", 2022)
+    points = read_points(chemin)
+    assert isinstance(points, np.memmap)
+    assert len(points) == 5
+    assert np.all(np.diff(points["temps"]) == 86400)
+    attendus = np.concatenate([make_point(session, INTENSITE)
+                               for session in sessions(5)])
+    egaux(points, attendus)
+    assert read_stats(chemin) == stats
+    verifier_stats(stats, np.array(points))
+
+
+def test_meme_instant_remplace(tmp_path):
+    """ Une session enregistrée une seconde fois remplace son point
+    """
+    liste = sessions(3)
+    for session in liste:
+        update_baseline(tmp_path, session, INTENSITE)
+    corrigee = liste[1]._replace(azimuth=liste[1].azimuth + 1.0)
+    stats = update_baseline(tmp_path, corrigee, INTENSITE)
+    points = np.array(read_points(store_path(tmp_path, "paf", 2022)))
+    assert len(points) == 3
+    egaux(points[1:2], make_point(corrigee, INTENSITE))
+    verifier_stats(stats, points)
+
+
+def test_point_tronque(tmp_path):
+    """ Un point tronqué par un arrêt brutal est ignoré puis écrasé
+    """
+    chemin = tmp_path / "paf2022.bin"
+    liste = sessions(3)
+    for session in liste[:2]:
+        append_point(chemin, make_point(session, INTENSITE))
+    with open(chemin, "ab") as file:
+        file.write(b"\x00" * (DTYPE_POINT.itemsize // 2))
+    assert len(read_points(chemin)) == 2
+    append_point(chemin, make_point(liste[2], INTENSITE))
+    points = read_points(chemin)
+    assert len(points) == 3
+    egaux(points[2:], make_point(liste[2], INTENSITE))
+
+
+def test_reecriture_identique(tmp_path):
+    """ Une série réécrite d'un coup a les statistiques de la série
+        construite point par point
+    """
+    points = np.concatenate([make_point(session, INTENSITE)
+                             for session in sessions(4)])
+    incremental = {}
+    for i in range(len(points)):
+        incremental = append_point(tmp_path / "a.bin", points[i:i + 1])
+    complete = write_series(tmp_path / "b.bin", points)
+    assert complete["points"] == incremental["points"]
+    for nom in COLONNES_STATS:
+        assert complete["colonnes"][nom] == pytest.approx(
+            incremental["colonnes"][nom], nan_ok=True)
+    assert (tmp_path / "a.bin").read_bytes() == \
+        (tmp_path / "b.bin").read_bytes()
+
+
+def test_fichier_etranger(tmp_path):
+    """ Un fichier sans l'entête des séries est refusé
+    """
+    chemin = tmp_path / "paf2022.bin"
+    chemin.write_bytes(b"pas une serie" * 10)
+    with pytest.raises(ValueError):
+        read_points(chemin)
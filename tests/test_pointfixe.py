@@ -0,0 +1,116 @@
+""" Angles et résidus en virgule fixe (pointfixe)
+"""
+# pylint: disable= invalid-name
+
+import numpy as np
+import pytest
+
+from saisiemesabs.model import angle_re, mesure_re
+from saisiemesabs.pointfixe import (
+    TOUR,
+    angle_mirror,
+    angle_shift,
+    format_angle,
+    format_mesure,
+    parse_angle,
+    parse_mesure,
+)
+
+
+@pytest.mark.parametrize("texte, attendu", [
+    ("233.1880", 2331880),
+    ("233.188", 2331880),
+    ("233.", 2330000),
+    (".5", 5000),
+    (" 12.3456 ", 123456),
+    ("+1.0", 10000),
+    ("-0.0001", -1),
+    ("400.0000", TOUR),
+    # Arrondi au plus proche, moitié loin de zéro
+    ("0.00005", 1),
+    ("0.00004", 0),
+    ("-0.00005", -1),
+    ("399.99995", TOUR),
+])
+def test_parse_angle(texte, attendu):
+    """ Conversion exacte des angles saisis
+    """
+    assert parse_angle(texte) == attendu
+
+
+@pytest.mark.parametrize("texte, attendu", [
+    ("-3.4", -34),
+    ("3", 30),
+    ("0.04", 0),
+    ("-0.05", -1),
+    ("-0.0", 0),
+    ("12.35", 124),
+])
+def test_parse_mesure(texte, attendu):
+    """ Conversion exacte des résidus saisis
+    """
+    assert parse_mesure(texte) == attendu
+
+
+@pytest.mark.parametrize("texte", [
+    "", " ", ".", "-", "+-1.0", "--5.0", "1.2.3", "abc", "1e3", "--.-",
+    "---.----",
+])
+def test_pas_un_nombre(texte):
+    """ Les textes qui ne sont pas des nombres sont refusés
+    """
+    with pytest.raises(ValueError):
+        parse_angle(texte)
+    with pytest.raises(ValueError):
+        parse_mesure(texte)
+
+
+@pytest.mark.parametrize("texte, valide", [
+    ("-3.4", True), ("3.4", True), ("0.0", True), ("-0.0", True),
+    ("123.4", True), ("--5.0", False), ("-5", False), ("5.", False),
+    ("5.00", False), ("--.-", False),
+])
+def test_validation_mesure(texte, valide):
+    """ Un résidu accepté par la validation de la saisie (mesure_re) est
+        convertible, sans quoi le contrôle des séries échouerait
+    """
+    assert bool(mesure_re.match(texte)) == valide
+    if valide:
+        assert format_mesure(parse_mesure(texte)).lstrip("-") == \
+            texte.lstrip("-")
+
+
+@pytest.mark.parametrize("texte, valide", [
+    ("233.1880", True), ("0.0000", True), ("400.0000", True),
+    ("33.18801", True), ("1.234", False), ("---.----", False),
+])
+def test_validation_angle(texte, valide):
+    """ Un angle accepté par angle_re est convertible et reformaté avec
+        4 décimales
+    """
+    assert bool(angle_re.match(texte)) == valide
+    if valide:
+        assert format_angle(parse_angle(texte)) == f"{float(texte):.4f}"
+
+
+def test_format():
+    """ Formatage des valeurs négatives de moins d'une unité
+    """
+    assert format_angle(-5) == "-0.0005"
+    assert format_mesure(-5) == "-0.5"
+    assert format_angle(2331880) == "233.1880"
+    assert format_mesure(0) == "0.0"
+
+
+def test_arithmetique_modulo():
+    """ Décalage et miroir restent dans [0, 400[ grades, sur un entier
+        comme sur un tableau
+    """
+    assert angle_shift(parse_angle("399.9999"), parse_angle("200")) == \
+        parse_angle("199.9999")
+    assert angle_mirror(0) == 0
+    assert angle_mirror(parse_angle("123.1470")) == parse_angle("276.8530")
+    angles = np.array([0, 1, TOUR - 1])
+    np.testing.assert_array_equal(angle_shift(angles, TOUR // 2),
+                                  [TOUR // 2, TOUR // 2 + 1, TOUR // 2 - 1])
+    np.testing.assert_array_equal(angle_mirror(angles), [0, TOUR - 1, 1])
@@ -0,0 +1,92 @@
+""" Réduction vectorisée de D et I (reduction), comparée au calcul fait
+pendant la saisie (baseline.provisional, SaisieMesAbs.controlerSerie)
+"""
+# pylint: disable= invalid-name
+
+import pathlib
+
+import numpy as np
+import pytest
+
+from saisiemesabs.baseline import provisional
+from saisiemesabs.pointfixe import (
+    ANGLE_ECHELLE,
+    MESURE_ECHELLE,
+    parse_angle,
+    parse_mesure,
+)
+from saisiemesabs.reduction import reduce_sessions
+from saisiemesabs.refile import read_session
+
+EXEMPLE = pathlib.Path(__file__).parents[1] / "Exemples" / "re07181322.paf"
+INTENSITE = 50000.0
+
+
+def serie_saisie(session, numero: int) -> tuple:
+    """ Angles et résidus d'une série tels que relus depuis les champs de
+        saisie (voir SaisieMesAbs.controlerSerie)
+    """
+    lignes = [ligne for ligne in session.lignes if ligne.serie == numero]
+    angles = [parse_angle(f"{ligne.angle:.4f}") / ANGLE_ECHELLE
+              for ligne in lignes]
+    mesures = [parse_mesure(f"{ligne.mesure:.1f}") / MESURE_ECHELLE
+               for ligne in lignes]
+    return angles, mesures
+
+
+def test_exemple():
+    """ D et I du fichier d'exemple, tels qu'affichés pendant la saisie
+    """
+    reduction = reduce_sessions([read_session(EXEMPLE)], INTENSITE)
+    assert reduction.declinaison.shape == (1, 2)
+    assert reduction.declinaison[0] == pytest.approx([-62.2148, -62.2178],
+                                                     abs=5e-5)
+    assert reduction.inclinaison[0] == pytest.approx([-76.8530, -76.8532],
+                                                     abs=5e-5)
+    assert reduction.mire[0] == pytest.approx(247.755)
+    assert reduction.offset[0] == pytest.approx([0.125, 0.275, -0.5, -0.625])
+
+
+@pytest.mark.parametrize("paire", [0, 1])
+def test_identique_a_la_saisie(paire):
+    """ Chaque paire de séries réduite en lot donne les valeurs calculées
+        série par série pendant la saisie
+    """
+    session = read_session(EXEMPLE)
+    reduction = reduce_sessions([session], INTENSITE)
+    angles, mesures = serie_saisie(session, 2 * paire + 1)
+    inclinaison = provisional("inclinaison", angles, mesures, INTENSITE)
+    assert inclinaison == pytest.approx(reduction.inclinaison[0, paire],
+                                        abs=1e-9)
+    angles, mesures = serie_saisie(session, 2 * paire)
+    visees = [[v.haut, v.bas] for v in session.visees]
+    declinaison = provisional("declinaison", angles, mesures, INTENSITE,
+                              inclinaison, visees, session.azimuth)
+    assert declinaison == pytest.approx(reduction.declinaison[0, paire],
+                                        abs=1e-9)
+
+
+def test_hemisphere_nord():
+    """ Dans l'hémisphère nord seule l'inclinaison change de signe
+    """
+    sessions = [read_session(EXEMPLE)]
+    sud = reduce_sessions(sessions, INTENSITE)
+    nord = reduce_sessions(sessions, INTENSITE, hemisphereSud=False)
+    np.testing.assert_allclose(nord.inclinaison, -sud.inclinaison)
+    np.testing.assert_allclose(nord.declinaison, sud.declinaison)
+
+
+def test_lot_sans_melange():
+    """ La réduction d'une session ne dépend pas des autres sessions du lot
+    """
+    session = read_session(EXEMPLE)
+    autre = session._replace(
+        azimuth=session.azimuth + 10.0,
+        lignes=tuple(ligne._replace(mesure=ligne.mesure + 5.0)
+                     for ligne in session.lignes))
+    seule = reduce_sessions([session], INTENSITE)
+    lot = reduce_sessions([autre, session, autre], INTENSITE)
+    for tableau, attendu in zip(lot, seule):
+        np.testing.assert_allclose(tableau[1], attendu[0])
+    assert lot.declinaison[0] == pytest.approx(seule.declinaison[0] + 10.0,
+                                               abs=0.01)
@@ -0,0 +1,88 @@
+""" Lecture des fichiers re (refile), sur le fichier d'exemple du dépôt
+"""
+# pylint: disable= invalid-name
+
+import pathlib
+from datetime import date
+
+import pytest
+
+from saisiemesabs.model import SessionMesure
+from saisiemesabs.refile import (
+    NOMS_SERIES,
+    FormatReError,
+    file_year,
+    iter_lines,
+    read_session,
+    session_from_records,
+)
+from saisiemesabs.temps import format_hhmmss
+
+EXEMPLE = pathlib.Path(__file__).parents[1] / "Exemples" / "re07181322.paf"
+
+
+def test_lecture_exemple():
+    """ Le fichier d'exemple est lu en une session complète
+    """
+    session = read_session(EXEMPLE)
+    assert session.chemin == EXEMPLE
+    assert session.station == "paf"
+    assert session.date == date(2022, 7, 19)
+    assert session.azimuth == pytest.approx(52.3584)
+    assert [(v.numero, v.haut, v.bas) for v in session.visees] == [
+        (1, 247.755, 47.755), (2, 247.755, 47.755)]
+    assert [s.nom for s in session.series] == list(NOMS_SERIES)
+    # L'est magnétique précède la série d'inclinaison qui l'utilise
+    assert [s.est for s in session.series] == [None, 233.188, None, 233.184]
+    assert len(session.lignes) == 16
+    premiere = session.lignes[0]
+    assert (premiere.serie, premiere.index) == (0, 0)
+    assert premiere.heure == 13 * 3600 + 6 * 60 + 40
+    assert (premiere.angle, premiere.mesure) == (233.188, 0.0)
+    assert session.lignes[-1].mesure == -2.0
+    assert file_year(EXEMPLE) == 2022
+
+
+def test_aller_retour_modele():
+    """ Une session recopiée dans le modèle de saisie puis sérialisée
+        (SessionMesure.to_re) est relue à l'identique
+    """
+    session = read_session(EXEMPLE)
+    modele = SessionMesure()
+    modele.setter("station")(session.station)
+    modele.setter("date")(session.date.strftime("%d/%m/%y"))
+    modele.setter("azimuth")(f"{session.azimuth:.5f}")
+    for visee in session.visees:
+        modele.setter(f"vise{visee.numero}.haut")(f"{visee.haut:.4f}")
+        modele.setter(f"vise{visee.numero}.bas")(f"{visee.bas:.4f}")
+    for serie in session.series:
+        if serie.est is not None:
+            modele.setter(f"mesure{serie.numero}.est")(f"{serie.est:.4f}")
+    for ligne in session.lignes:
+        prefixe = f"mesure{ligne.serie}.{ligne.index}"
+        modele.setter(f"{prefixe}.heure")(format_hhmmss(ligne.heure))
+        modele.setter(f"{prefixe}.angle")(f"{ligne.angle:.4f}")
+        modele.setter(f"{prefixe}.mesure")(f"{ligne.mesure:.1f}")
+    assert modele.valide()
+    assert modele.to_session() == session._replace(chemin=None)
+
+
+def test_fichier_tronque():
+    """ Un fichier coupé avant la fin des séries est refusé
+    """
+    lignes = EXEMPLE.read_text(encoding="utf-8").splitlines()
+    with pytest.raises(FormatReError):
+        session_from_records(iter_lines(lignes[:-3]))
+    with pytest.raises(FormatReError, match="tronqué"):
+        list(iter_lines(lignes[:4]))
+
+
+def test_ligne_invalide():
+    """ Une valeur non numérique est signalée avec son numéro de ligne
+    """
+    lignes = EXEMPLE.read_text(encoding="utf-8").splitlines()
+    lignes[7] = "13 06 40\t233.18x0\t0.0"
+    with pytest.raises(FormatReError) as erreur:
+        list(iter_lines(lignes, EXEMPLE))
+    assert erreur.value.numLigne == 8
+    assert erreur.value.chemin == EXEMPLE
@@ -0,0 +1,65 @@
+""" Cache de validation des champs de saisie (MyLineEdit.validations)
+"""
+# pylint: disable= invalid-name
+
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6 import QtWidgets  # noqa: E402
+from PySide6.QtTest import QTest  # noqa: E402
+
+from saisiemesabs import app, config  # noqa: E402
+from saisiemesabs.customwidgets import MyLineEdit  # noqa: E402
+
+
+@pytest.fixture(name="fenetre")
+def fixture_fenetre(tmp_path):
+    """ Fenêtre de saisie avec une configuration par défaut
+    """
+    qapp = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    chemin = tmp_path / "configuration.txt"
+    config.create_default_conf(chemin)
+    configuration = config.analyse_conf(chemin)
+    configuration["Chemin_Sauvegarde"] = str(tmp_path / "$STATION$YY")
+    window = app.SaisieMesAbs("19/07/22", {"version": "test"}, configuration)
+    yield window
+    window.close()
+    window.deleteLater()
+    qapp.processEvents()
+
+
+def test_validation_en_cache(fenetre):
+    """ Une seconde validation sans modification ne recalcule rien
+    """
+    fenetre.validateAll()
+    avant = MyLineEdit.validations
+    fenetre.validateAll()
+    assert MyLineEdit.validations == avant
+
+
+def test_validation_champ_modifie(fenetre):
+    """ Seul le champ modifié est revalidé
+    """
+    fenetre.validateAll()
+    avant = MyLineEdit.validations
+    champ = fenetre.mesure[0].ligne[0]["mesure"]
+    champ.clear()
+    QTest.keyClicks(champ, "-3.4")
+    fenetre.validateAll()
+    assert MyLineEdit.validations == avant + 1
+
+
+def test_saisie_heure_sans_validation(fenetre):
+    """ La frappe d'une heure propage l'heure suivante sans valider (ni
+        colorer) le champ
+    """
+    avant = MyLineEdit.validations
+    champ = fenetre.mesure[0].ligne[0]["heure"]
+    champ.clear()
+    QTest.keyClicks(champ, "130640")
+    assert MyLineEdit.validations == avant
+    assert (fenetre.mesure[0].ligne[1]["heure"].text()
+            == fenetre.mesure[0].heureSuivante("130640"))